@@ -1,15 +1,32 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash
+from flask import Flask, Response, before_render_template, template_rendered, render_template, request, redirect, url_for, session, jsonify, flash, g, has_app_context, abort, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_socketio import SocketIO, join_room
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+import click
+import bisect
+import cProfile
+import functools
+import gzip
+import heapq
+import io
 import json
+import math
 import os
-import pandas as pd
-import numpy as np
-import openpyxl
+import pstats
+import random
+import re
 import secrets
-from sqlalchemy import text
-from sqlalchemy.pool import NullPool
+import threading
+import time
+import unicodedata
+import zlib
+from sqlalchemy import and_, bindparam, case, event, func, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, DisconnectionError, IntegrityError
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from sqlalchemy.pool import NullPool, Pool
 
 # Create Flask app FIRST
 app = Flask(__name__)
@@ -25,8 +42,9 @@ if 'DATABASE_URL' in os.environ:
         database_url = database_url.replace('postgres://', 'postgresql://')
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 
-    # IMPORTANT: Add these settings for Render PostgreSQL
-    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    # IMPORTANT: Add these settings for Render PostgreSQL (a sqlite:// URL, e.g. the
+    # load test's scratch database, needs none of them)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {} if database_url.startswith('sqlite') else {
         'pool_pre_ping': True,  # Verify connections before using them
         'pool_recycle': 300,  # Recycle connections after 5 minutes
         'pool_size': 10,  # Number of connections to maintain in pool
@@ -48,8 +66,8 @@ else:
 # Other configurations
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-ALLOWED_EXTENSIONS = {'csv', 'json', 'xlsx', 'xls'}
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024  # 16MB default
+ALLOWED_EXTENSIONS = {'csv', 'json', 'jsonl', 'xlsx', 'xls'}
 
 # Create uploads folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -57,22 +75,562 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # Create database instance FOURTH
 db = SQLAlchemy(app)
 
+# Real-time draft updates. With several gunicorn workers set SOCKETIO_MESSAGE_QUEUE
+# (e.g. redis://...) so a pick emitted by one worker reaches sockets held by the others.
+socketio = SocketIO(app, message_queue=os.environ.get('SOCKETIO_MESSAGE_QUEUE'))
+
+
+# Database resilience
+# Connection blips (a Postgres restart, a dropped SSL connection, a locked SQLite file)
+# are classified as transient. db_operation_with_retry and every GET/HEAD view retry
+# them with jittered exponential backoff; other views answer 503 with Retry-After.
+# SQLAlchemy already drops the broken connection, so nothing here disposes of the
+# pool. After DB_BREAKER_THRESHOLD transient failures in a row the circuit opens and
+# requests get an immediate 503 for DB_BREAKER_RESET seconds, after which a single
+# request probes the database again.
+TRANSIENT_DB_ERRORS = ['ssl connection', 'server closed the connection', 'connection refused',
+                       'could not connect', 'terminating connection', 'connection reset', 'connection timed out',
+                       'database is locked']
+TRANSIENT_PGCODES = ('08', '57P01', '57P02', '57P03', '40001', '40P01')  # connection, shutdown, serialization
+DB_RETRY_BASE = 0.05  # seconds before the first retry, doubling each time
+DB_RETRY_CAP = 1.0
+
+
+class DatabaseUnavailable(Exception):
+    pass
+
+
+def is_transient_db_error(exc):
+    """Whether an exception is a connection or contention blip worth retrying"""
+    if isinstance(exc, DisconnectionError):
+        return True
+    if not isinstance(exc, DBAPIError):
+        return False
+    if exc.connection_invalidated:
+        return True
+    pgcode = getattr(exc.orig, 'pgcode', None)
+    if pgcode and pgcode.startswith(TRANSIENT_PGCODES):
+        return True
+    message = str(exc.orig).lower()
+    return any(marker in message for marker in TRANSIENT_DB_ERRORS)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff, so retrying workers don't hit the database in step"""
+    return random.uniform(0, min(DB_RETRY_CAP, DB_RETRY_BASE * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for the database, shared by a worker's threads"""
+
+    def __init__(self, threshold=5, reset_after=10.0):
+        self.lock = threading.Lock()
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None  # None while closed
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_after else 'open'
+
+    def allow(self):
+        """False while open; once reset_after has passed, lets a single probe request through"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.probing or time.monotonic() - self.opened_at < self.reset_after:
+                return False
+            self.probing = True
+            return True
+
+    def retry_after(self):
+        """Seconds until the next probe, for the Retry-After header"""
+        if self.opened_at is None:
+            return 1
+        return max(1, math.ceil(self.reset_after - (time.monotonic() - self.opened_at)))
+
+    def success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+                # Trip, or stay open for another reset_after when the probe fails
+                if self.opened_at is None:
+                    self.trips += 1
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+db_breaker = CircuitBreaker(int(os.environ.get('DB_BREAKER_THRESHOLD', 5)),
+                            float(os.environ.get('DB_BREAKER_RESET', 10)))
+
+
+class DatabaseHealth:
+    """Transient error, retry and connection pool counters for /admin/metrics"""
+
+    def __init__(self):
+        self.transient_errors = 0
+        self.retries = 0
+        self.unavailable = 0
+        self.connects = 0
+        self.invalidations = 0
+
+    def report(self):
+        pool = db.engine.pool
+        report = {
+            'breaker': db_breaker.state,
+            'breaker_trips': db_breaker.trips,
+            'transient_errors': self.transient_errors,
+            'retries': self.retries,
+            'unavailable_responses': self.unavailable,
+            'connections_opened': self.connects,
+            'connections_invalidated': self.invalidations,
+            'pool': pool.status()
+        }
+        if hasattr(pool, 'checkedout'):
+            report.update(pool_size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+        return report
+
+
+db_health = DatabaseHealth()
+
+
+@event.listens_for(Pool, 'connect')
+def count_connect(dbapi_connection, connection_record):
+    db_health.connects += 1
+
+
+@event.listens_for(Pool, 'invalidate')
+def count_invalidate(dbapi_connection, connection_record, exception):
+    db_health.invalidations += 1
+
+
+def reset_db_session():
+    """Drop the failed transaction and hand the session's connection back to the pool"""
+    try:
+        db.session.rollback()
+    except Exception:
+        pass
+    db.session.remove()
+
 
-# Add this helper function to handle database operations with retry
 def db_operation_with_retry(operation, max_retries=3):
-    """Execute a database operation with automatic retry on connection errors"""
+    """Run operation, retrying transient database errors with backoff"""
     for attempt in range(max_retries):
         try:
             return operation()
         except Exception as e:
-            if 'SSL connection' in str(e) or 'server closed the connection' in str(e):
-                if attempt < max_retries - 1:
-                    db.session.rollback()
-                    db.session.remove()
-                    db.session.begin()
-                    continue
-            raise e
-    return None
+            if not is_transient_db_error(e):
+                raise
+            db_health.transient_errors += 1
+            reset_db_session()
+            if attempt == max_retries - 1:
+                raise
+            db_health.retries += 1
+            app.logger.warning(f"Retrying database operation after transient error: {e}")
+            time.sleep(backoff_delay(attempt))
+
+
+def with_db_resilience(view, retry=False, max_retries=3):
+    """Wrap a view: transient database errors are retried for GET/HEAD when retry is set
+    (read-only views only), and answered with a 503 otherwise"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not db_breaker.allow():
+            raise DatabaseUnavailable('circuit open')
+        attempts = max_retries if retry and request.method in ('GET', 'HEAD') else 1
+        for attempt in range(attempts):
+            try:
+                response = view(*args, **kwargs)
+            except Exception as e:
+                if not is_transient_db_error(e):
+                    db_breaker.success()  # a 404 or an integrity error still means the database answered
+                    raise
+                db_health.transient_errors += 1
+                db_breaker.failure()
+                reset_db_session()
+                if attempt == attempts - 1 or not db_breaker.allow():
+                    raise DatabaseUnavailable(str(e)) from e
+                db_health.retries += 1
+                app.logger.warning(f"Retrying {request.endpoint} after transient database error: {e}")
+                time.sleep(backoff_delay(attempt))
+            else:
+                db_breaker.success()
+                return response
+    return wrapper
+
+
+@app.errorhandler(DatabaseUnavailable)
+def database_unavailable(e):
+    db_health.unavailable += 1
+    app.logger.warning(f"Answering {request.endpoint} with 503: {e}")
+    return ("The database is briefly unavailable - please try again in a moment.", 503,
+            {'Retry-After': str(db_breaker.retry_after())})
+
+
+# Query budgets per endpoint. A view that runs more statements than its budget is
+# logged, and raises under TESTING so a slide back into N+1 loading fails the tests.
+# Queries spent rebuilding a per-process index (see AvailablePlayerIndex) are not charged.
+QUERY_BUDGETS = {
+    'draft': 6,
+    'league_draft': 6,
+    'team_wishlist': 6,
+    'index': 4,
+    'list_leagues': 3,
+    'view_team': 3,
+    'available_players': 2,
+    'search_players': 2,
+    'league_lineups': 2
+}
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'query_count' in g:
+        g.query_count += 1
+        conn.info['query_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def time_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop('query_started', None)
+    if has_app_context() and 'query_count' in g and started is not None:
+        g.sql_ms += (time.perf_counter() - started) * 1000
+
+
+@app.before_request
+def start_query_count():
+    g.query_count = 0
+    g.warmup_queries = 0
+    g.sql_ms = 0.0
+    g.template_ms = 0.0
+    g.request_started = time.perf_counter()
+    request_metrics.start_profile()
+
+
+@app.after_request
+def check_query_budget(response):
+    # Queries that (re)built a per-process index for every later request are not this
+    # request's own; they still show up in the metrics and Server-Timing counts
+    budget = QUERY_BUDGETS.get(request.endpoint)
+    charged = g.get('query_count', 0) - g.get('warmup_queries', 0)
+    if budget is not None and charged > budget:
+        message = f"{request.endpoint} ran {charged} queries (budget {budget})"
+        if app.config.get('TESTING'):
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+    return response
+
+
+# Request metrics. Every request's latency, SQL statement count and time and template
+# render time go into per-endpoint histograms (per worker process) and out as a
+# Server-Timing header, so browser devtools show where a slow page spent its time.
+# /admin/metrics reports percentiles. Set PROFILE_SAMPLE_RATE (e.g. 0.05) to run
+# cProfile on that fraction of requests and keep the slowest PROFILE_KEEP profiles.
+LATENCY_BUCKET_RATIO = 1.25  # bucket i holds latencies up to 0.5 ms * 1.25^i
+LATENCY_BUCKETS = 64  # the last bucket (about 800 s) catches everything slower
+
+
+class RequestMetrics:
+    """Per-endpoint latency histograms and totals, plus the sampled slow-request profiles"""
+
+    def __init__(self, profile_rate=0.0, profile_keep=10):
+        self.lock = threading.Lock()
+        self.routes = {}
+        self.profile_rate = profile_rate
+        self.profile_keep = profile_keep
+        self.profiles = []  # min-heap of (duration ms, sequence, endpoint, path, report)
+        self.profiled = 0
+
+    @staticmethod
+    def bucket(ms):
+        if ms <= 0.5:
+            return 0
+        return min(int(math.ceil(math.log(ms / 0.5, LATENCY_BUCKET_RATIO))), LATENCY_BUCKETS - 1)
+
+    def record(self, endpoint, ms, queries, sql_ms, template_ms):
+        with self.lock:
+            route = self.routes.get(endpoint)
+            if route is None:
+                route = self.routes[endpoint] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'queries': 0,
+                                                 'sql_ms': 0.0, 'template_ms': 0.0,
+                                                 'buckets': [0] * LATENCY_BUCKETS}
+            route['count'] += 1
+            route['total_ms'] += ms
+            route['max_ms'] = max(route['max_ms'], ms)
+            route['queries'] += queries
+            route['sql_ms'] += sql_ms
+            route['template_ms'] += template_ms
+            route['buckets'][self.bucket(ms)] += 1
+
+    @staticmethod
+    def percentile(buckets, count, q, max_ms=None):
+        """Upper bound of the histogram bucket holding the q-th percentile (ms).
+
+        Capped at max_ms, the largest value recorded, when given: no sample was above it.
+        """
+        rank = q / 100 * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if n and seen >= rank:
+                bound = 0.5 * LATENCY_BUCKET_RATIO ** i
+                return round(bound if max_ms is None else min(bound, max_ms), 2)
+        return None
+
+    def report(self):
+        with self.lock:
+            routes = {endpoint: dict(route, buckets=list(route['buckets'])) for endpoint, route in self.routes.items()}
+            slowest = sorted(self.profiles, reverse=True)
+        return {
+            'routes': {endpoint: {
+                'count': route['count'],
+                'p50_ms': self.percentile(route['buckets'], route['count'], 50, route['max_ms']),
+                'p95_ms': self.percentile(route['buckets'], route['count'], 95, route['max_ms']),
+                'p99_ms': self.percentile(route['buckets'], route['count'], 99, route['max_ms']),
+                'max_ms': round(route['max_ms'], 2),
+                'mean_ms': round(route['total_ms'] / route['count'], 2),
+                'mean_queries': round(route['queries'] / route['count'], 2),
+                'mean_sql_ms': round(route['sql_ms'] / route['count'], 2),
+                'mean_template_ms': round(route['template_ms'] / route['count'], 2)
+            } for endpoint, route in sorted(routes.items())},
+            'profiled_requests': self.profiled,
+            'slowest_profiles': [{'ms': round(ms, 2), 'endpoint': endpoint, 'path': path}
+                                 for ms, _, endpoint, path, _ in slowest]
+        }
+
+    def profile_reports(self):
+        with self.lock:
+            return [(ms, endpoint, path, text) for ms, _, endpoint, path, text in sorted(self.profiles, reverse=True)]
+
+    def start_profile(self):
+        if not self.profile_rate or random.random() >= self.profile_rate:
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return  # another request on this process is already being profiled
+        g.profiler = profiler
+
+    def finish_profile(self, endpoint, path, ms):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return
+        profiler.disable()
+        with self.lock:
+            self.profiled += 1
+            if len(self.profiles) >= self.profile_keep and ms <= self.profiles[0][0]:
+                return
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(30)
+        with self.lock:
+            entry = (ms, self.profiled, endpoint, path, out.getvalue())
+            if len(self.profiles) < self.profile_keep:
+                heapq.heappush(self.profiles, entry)
+            else:
+                heapq.heappushpop(self.profiles, entry)
+
+
+request_metrics = RequestMetrics(float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+                                 int(os.environ.get('PROFILE_KEEP', 10)))
+
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+
+@template_rendered.connect_via(app)
+def stop_template_timer(sender, template, context, **extra):
+    if 'template_started' in g:
+        g.template_ms += (time.perf_counter() - g.pop('template_started')) * 1000
+
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_started' not in g:
+        return response
+    ms = (time.perf_counter() - g.request_started) * 1000
+    endpoint = request.endpoint or 'not_found'
+    request_metrics.finish_profile(endpoint, request.full_path.rstrip('?'), ms)
+    request_metrics.record(endpoint, ms, g.query_count, g.sql_ms, g.template_ms)
+    response.headers['Server-Timing'] = (
+        f'app;dur={ms:.1f}, db;dur={g.sql_ms:.1f};desc="{g.query_count} queries", tpl;dur={g.template_ms:.1f}'
+    )
+    return response
+
+
+@app.teardown_request
+def stop_abandoned_profile(exc):
+    # after_request never runs for an unhandled error; don't leave the profiler running
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+
+# Response cache for the read-heavy pages. Rendered pages are stored under their request
+# parameters plus the version counters of the data they show; every write bumps the
+# counters it touches, so stale entries are never read again and simply age out of the LRU.
+# The local backend's counters live in one process, so a write would only reach its own
+# worker: with several gunicorn workers (WEB_CONCURRENCY > 1, which gunicorn also reads as
+# its default --workers) RESPONSE_CACHE_URL (e.g. redis://...) is required, and the app
+# refuses to start without it. The board index follows the same 'players' counter.
+WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+
+class LocalCacheBackend:
+    """Process-local LRU, bounded by the total size of the stored text"""
+
+    def __init__(self, max_bytes):
+        self.lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.counters = {}
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes and self.entries:
+                self.size -= len(self.entries.popitem(last=False)[1])
+
+    def versions(self, scopes):
+        with self.lock:
+            return [self.counters.get(scope, 0) for scope in scopes]
+
+    def bump(self, scopes):
+        with self.lock:
+            for scope in scopes:
+                self.counters[scope] = self.counters.get(scope, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+class RedisCacheBackend:
+    """Shared backend: entries expire after ttl and Redis' allkeys-lru policy evicts them"""
+
+    def __init__(self, url, ttl=3600):
+        import redis  # only needed when RESPONSE_CACHE_URL is set
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def get(self, key):
+        value = self.client.get(f'page:{key}')
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value):
+        self.client.set(f'page:{key}', value.encode('utf-8'), ex=self.ttl)
+
+    def versions(self, scopes):
+        return [int(v or 0) for v in self.client.mget([f'version:{scope}' for scope in scopes])]
+
+    def bump(self, scopes):
+        pipe = self.client.pipeline()
+        for scope in scopes:
+            pipe.incr(f'version:{scope}')
+        pipe.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter('page:*'):
+            self.client.delete(key)
+
+
+class ResponseCache:
+    """Rendered pages keyed by request parameters and data versions.
+
+    Scopes name the data a page depends on:
+      'players'      player stats (imports, resets)
+      'leagues'      leagues, teams and draft setup
+      'picks'        any pick in any league (the league list shows every draft's pick)
+      'league:<id>'  one league's draft state
+      'team:<id>'    one team's wishlist
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def key(self, name, params, scopes):
+        versions = self.backend.versions(scopes)
+        return '|'.join([name] + [str(p) for p in params] + [f'{s}={v}' for s, v in zip(scopes, versions)])
+
+    def page(self, name, params, scopes, render):
+        """Return the cached text for this page, calling render() to fill a miss.
+
+        Versions are read before rendering, so a page rendered while a write lands is
+        at least as new as the key it is stored under. Only rendered text is stored; a
+        render that redirects is returned as is. Requests with a pending flash message
+        bypass the cache: the message is part of the page and only shown once.
+        """
+        if session.get('_flashes'):
+            return render()
+
+        key = self.key(name, params, scopes)
+        value = self.backend.get(key)
+        if value is None:
+            value = render()
+            if isinstance(value, str):
+                self.backend.set(key, value)
+        return value
+
+    def bump(self, *scopes):
+        self.backend.bump(scopes)
+
+
+if os.environ.get('RESPONSE_CACHE_URL'):
+    response_cache = ResponseCache(RedisCacheBackend(os.environ['RESPONSE_CACHE_URL']))
+elif WEB_WORKERS > 1:
+    raise RuntimeError(f'WEB_CONCURRENCY is {WEB_WORKERS} but RESPONSE_CACHE_URL is not set: workers '
+                       f'would serve each other stale pages and boards. Point RESPONSE_CACHE_URL at '
+                       f'Redis or run one worker.')
+else:
+    response_cache = ResponseCache(LocalCacheBackend(int(os.environ.get('RESPONSE_CACHE_MB', 64)) * 1024 * 1024))
+
+
+def team_league_scope(team_id):
+    """(cache scope of a team's league, or None if there is no such team; the team
+    if it had to be loaded, for the caller to reuse, else None).
+
+    Teams only change league when leagues are set up again, so the answer is itself
+    cached under the 'leagues' version and a warm wishlist view needs no query for it.
+    """
+    key = response_cache.key('team_league', [team_id], ['leagues'])
+    scope = response_cache.backend.get(key)
+    if scope is not None:
+        return scope, None
+    team = DraftTeam.query.get(team_id)
+    if not team:
+        return None, None
+    scope = f'league:{team.league_id}'
+    response_cache.backend.set(key, scope)
+    return scope, team
 
 
 # Database Models
@@ -90,9 +648,7 @@ class Player(db.Model):
     position = db.Column(db.String(20), nullable=False)
     status = db.Column(db.String(20))  # Changed from 1 char to accommodate "Available"
 
-    # Draft status
-    drafted = db.Column(db.Boolean, default=False)
-    drafted_by = db.Column(db.Integer, db.ForeignKey('draft_team.id'), nullable=True)
+    # Draft status is tracked per league in DraftPick
 
     # Cost and value
     now_cost = db.Column(db.Float, default=0.0)  # Current price
@@ -141,6 +697,17 @@ class Player(db.Model):
     saves_per_90 = db.Column(db.Float, default=0.0)
     clean_sheets_per_90 = db.Column(db.Float, default=0.0)
 
+    # Valuation, recomputed after every import (player_data.value_players)
+    vorp = db.Column(db.Float)
+    z_score = db.Column(db.Float)
+    draft_score = db.Column(db.Float, index=True)
+
+    # Folded names and club for search (fold_search_text), refreshed on import
+    search_text = db.Column(db.Text)
+
+    # Import matches players on (second_name, team) and upserts against this index
+    __table_args__ = (db.Index('ix_player_second_name_team', 'second_name', 'team', unique=True),)
+
     @property
     def name(self):
         """Display name for the player"""
@@ -154,7 +721,6 @@ class Player(db.Model):
             'position': self.position,
             'team': self.team,
             'status': self.status,
-            'drafted': self.drafted,
             'price': self.now_cost,
             'total_points': self.total_points,
             'points_per_game': self.points_per_game,
@@ -164,15 +730,35 @@ class Player(db.Model):
             'clean_sheets': self.clean_sheets,
             'expected_goals': round(self.expected_goals, 2) if self.expected_goals else 0,
             'expected_assists': round(self.expected_assists, 2) if self.expected_assists else 0,
-            'ict_index': self.ict_index
+            'ict_index': self.ict_index,
+            'vorp': self.vorp,
+            'draft_score': self.draft_score
         }
 
 
+# Squad rules: players allowed per position and per Premier League club. A league can
+# override any of them (League.roster_rules); these are the standard FPL limits.
+DEFAULT_ROSTER_RULES = {
+    'positions': {'GK': 2, 'DEF': 5, 'MID': 5, 'FWD': 3},
+    'max_per_club': 3
+}
+
+
+def roster_rules_from_json(raw):
+    """League rule overrides merged over DEFAULT_ROSTER_RULES"""
+    overrides = json.loads(raw) if raw else {}
+    return {
+        'positions': {**DEFAULT_ROSTER_RULES['positions'], **overrides.get('positions', {})},
+        'max_per_club': overrides.get('max_per_club', DEFAULT_ROSTER_RULES['max_per_club'])
+    }
+
+
 class League(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     access_code = db.Column(db.String(10), unique=True)  # Simple code for sharing
+    roster_rules = db.Column(db.Text)  # JSON overrides of DEFAULT_ROSTER_RULES
 
     # Relationships
     teams = db.relationship('DraftTeam', backref='league', lazy=True)
@@ -185,14 +771,20 @@ class League(db.Model):
         self.access_code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
         return self.access_code
 
+    @property
+    def rules(self):
+        """Squad limits for this league"""
+        return roster_rules_from_json(self.roster_rules)
+
 
 class DraftTeam(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     owner = db.Column(db.String(100), nullable=False)
     access_token = db.Column(db.String(32), unique=True)
-    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True)
-    players = db.relationship('Player', backref='draft_team', lazy=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True, index=True)
+    auto_draft = db.Column(db.Boolean, default=False)  # pick from the wishlist when on the clock
+    players = db.relationship('Player', secondary='draft_pick', lazy=True, viewonly=True)
 
     def generate_access_token(self):
         """Generate a unique access token for this team"""
@@ -217,26 +809,117 @@ class DraftTeam(db.Model):
             team_counts[player.team] = team_counts.get(player.team, 0) + 1
         return team_counts
 
-    def can_draft_player(self, player):
-        """Check if this player can be drafted based on constraints"""
-        # Check team limit (max 3 from same team)
-        team_counts = self.get_team_counts()
-        if team_counts.get(player.team, 0) >= 3:
-            return False, f"Already have 3 players from {player.team}"
-
-        # Check position limits
-        roster = self.get_roster()
-        position_limits = {
-            'GK': 2,
-            'DEF': 5,
-            'MID': 5,
-            'FWD': 3
-        }
 
-        if len(roster[player.position]) >= position_limits[player.position]:
-            return False, f"Already have {position_limits[player.position]} {player.position}s"
+# Draft order schedules
+DRAFT_ROUNDS = 15  # 2 GK + 5 DEF + 5 MID + 3 FWD
+DRAFT_ORDER_STYLES = ['snake', 'linear', 'third_round_reversal', 'custom']
 
-        return True, "OK"
+
+class PickSchedule:
+    """The complete pick order of a draft: pick number -> team id, round and reversed flag.
+
+    Built once when the draft is created and stored on Draft.pick_schedule, so the team
+    on the clock, the next few teams and "picks until my turn" are lookups rather than
+    per-request order arithmetic. Picks past the end of the schedule wrap around to it.
+    """
+
+    _cache = {}
+
+    def __init__(self, team_count, teams, reversed_rounds):
+        self.team_count = team_count
+        self.teams = teams  # team id for picks 1..N
+        self.reversed_rounds = reversed_rounds  # reversed flag for rounds 1..R
+
+        # Each team's pick numbers, for "picks until my turn"
+        self.team_picks = {}
+        for pick, team_id in enumerate(teams, start=1):
+            self.team_picks.setdefault(team_id, []).append(pick)
+
+    @classmethod
+    def build(cls, team_ids, style='snake', rounds=DRAFT_ROUNDS, custom_slots=None):
+        """Lay out every pick for the given base order.
+
+        custom_slots is a sequence of 1-based positions in team_ids, repeated as needed
+        to fill the draft - e.g. [1, 2, 2, 1] for an ABBA order.
+        """
+        team_count = len(team_ids)
+        teams = []
+        reversed_rounds = []
+        for draft_round in range(1, rounds + 1):
+            if style == 'linear':
+                is_reversed = False
+            elif style == 'third_round_reversal':
+                # 1->N, N->1, N->1 again, then alternate as a snake
+                is_reversed = draft_round in (2, 3) or (draft_round > 3 and draft_round % 2 == 1)
+            elif style == 'custom':
+                is_reversed = False
+            else:
+                is_reversed = draft_round % 2 == 0
+            reversed_rounds.append(is_reversed)
+            teams.extend(reversed(team_ids) if is_reversed else team_ids)
+
+        if style == 'custom' and custom_slots and team_count:
+            teams = [team_ids[custom_slots[i % len(custom_slots)] - 1] for i in range(len(teams))]
+
+        return cls(team_count, teams, reversed_rounds)
+
+    @classmethod
+    def for_draft(cls, draft):
+        """The draft's schedule, decoded once per process"""
+        key = (draft.id, draft.pick_schedule, draft.draft_order)
+        schedule = cls._cache.get(key)
+        if schedule is None:
+            if draft.pick_schedule:
+                data = json.loads(draft.pick_schedule)
+                schedule = cls(draft.total_teams or 0, data['teams'], [bool(r) for r in data['reversed']])
+            else:
+                # Drafts created before schedules were stored
+                schedule = cls.build(json.loads(draft.draft_order or '[]'),
+                                     'snake' if draft.is_snake_draft else 'linear')
+            cls._cache[key] = schedule
+        return schedule
+
+    def to_json(self):
+        return json.dumps({'teams': self.teams, 'reversed': [int(r) for r in self.reversed_rounds]},
+                          separators=(',', ':'))
+
+    def _index(self, pick):
+        return (pick - 1) % len(self.teams)
+
+    def team_for(self, pick):
+        return self.teams[self._index(pick)] if self.teams else None
+
+    def round_for(self, pick):
+        if not self.team_count:
+            return 1
+        return (pick - 1) // self.team_count + 1
+
+    def is_reversed(self, pick):
+        if not self.reversed_rounds:
+            return False
+        return self.reversed_rounds[(self.round_for(pick) - 1) % len(self.reversed_rounds)]
+
+    def round_order(self, pick):
+        """Team ids in the order they pick during this pick's round"""
+        if not self.teams:
+            return []
+        index = self._index(pick)
+        start = index - index % self.team_count
+        return self.teams[start:start + self.team_count]
+
+    def upcoming(self, pick, count):
+        """Team ids for the next count picks, starting with the one on the clock"""
+        return [self.team_for(p) for p in range(pick, pick + count)] if self.teams else []
+
+    def picks_until(self, team_id, pick):
+        """How many picks before team_id is on the clock (0 = now), None if never again"""
+        picks = self.team_picks.get(team_id)
+        if not picks:
+            return None
+        position = bisect.bisect_left(picks, self._index(pick) + 1)
+        if position == len(picks):
+            return None
+        return picks[position] - 1 - self._index(pick)
 
 
 class Draft(db.Model):
@@ -248,30 +931,35 @@ class Draft(db.Model):
     draft_order = db.Column(db.Text)
     is_snake_draft = db.Column(db.Boolean, default=True)
     is_locked = db.Column(db.Boolean, default=False)
-    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True, index=True)
+    order_style = db.Column(db.String(20), default='snake')
+    pick_schedule = db.Column(db.Text)  # PickSchedule as compact JSON
+    log_seq = db.Column(db.Integer, default=0)  # sequence of the league's latest pick log entry
+    pick_seconds = db.Column(db.Integer)  # pick clock length; None for no clock
+    pick_deadline = db.Column(db.DateTime)  # UTC deadline for the current pick
+
+    @property
+    def schedule(self):
+        return PickSchedule.for_draft(self)
+
+    @property
+    def rules(self):
+        """Squad limits of this draft's league (the defaults for a league-less draft)"""
+        return self.league.rules if self.league_id and self.league else roster_rules_from_json(None)
 
     @property
     def current_round(self):
         """Calculate what round we're in"""
-        if self.total_teams == 0:
-            return 1
-        return ((self.current_pick - 1) // self.total_teams) + 1
+        return self.schedule.round_for(self.current_pick)
 
     @property
     def is_reverse_round(self):
-        """Check if this round should go in reverse order"""
-        return self.is_snake_draft and (self.current_round % 2 == 0)
+        """Check if this round goes in reverse order"""
+        return self.schedule.is_reversed(self.current_pick)
 
     def get_current_team_id(self):
-        """Get the current team ID considering snake draft"""
-        draft_order = json.loads(self.draft_order)
-
-        if self.is_reverse_round:
-            # Reverse the order for even rounds
-            actual_index = self.total_teams - 1 - self.current_team_index
-            return draft_order[actual_index]
-        else:
-            return draft_order[self.current_team_index]
+        """Get the team on the clock from the precomputed schedule"""
+        return self.schedule.team_for(self.current_pick)
 
     def advance_to_next_pick(self):
         """Move to the next pick in snake draft order"""
@@ -283,6 +971,46 @@ class Draft(db.Model):
             self.current_team_index = 0
 
 
+class DraftPick(db.Model):
+    """A player taken in one league's draft - each league keeps its own pool"""
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True)
+    player_id = db.Column(db.Integer, db.ForeignKey('player.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('draft_team.id'), nullable=False, index=True)
+    pick_number = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # A player can only be picked once per league; also serves the available-pool anti-join
+    __table_args__ = (db.Index('ix_draft_pick_league_player', 'league_id', 'player_id', unique=True),
+                      db.Index('ix_draft_pick_league_number', 'league_id', 'pick_number'))
+
+
+class PickLogEntry(db.Model):
+    """One pick or undo in a league's append-only draft history"""
+    __tablename__ = 'pick_log'
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True)
+    seq = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(10), nullable=False)  # 'pick' or 'undo'
+    pick_number = db.Column(db.Integer)
+    team_id = db.Column(db.Integer, nullable=False)
+    player_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_pick_log_league_seq', 'league_id', 'seq', unique=True),)
+
+
+class DraftSnapshot(db.Model):
+    """A league's full pick list as of one pick log entry, so replays start near the end"""
+    id = db.Column(db.Integer, primary_key=True)
+    league_id = db.Column(db.Integer, db.ForeignKey('league.id'), nullable=True)
+    seq = db.Column(db.Integer, nullable=False)
+    picks = db.Column(db.Text, nullable=False)  # [[pick number, team id, player id], ...]
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_draft_snapshot_league_seq', 'league_id', 'seq'),)
+
+
 class Wishlist(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     team_id = db.Column(db.Integer, db.ForeignKey('draft_team.id'), nullable=False)
@@ -297,8 +1025,11 @@ class Wishlist(db.Model):
     team = db.relationship('DraftTeam', backref='wishlist_items')
     player = db.relationship('Player', backref='wishlist_entries')
 
-    # Ensure unique player per team
-    __table_args__ = (db.UniqueConstraint('team_id', 'player_id'),)
+    # Ensure unique player per team; (team_id, rank) serves the ordered wishlist read
+    __table_args__ = (
+        db.UniqueConstraint('team_id', 'player_id'),
+        db.Index('ix_wishlist_team_rank', 'team_id', 'rank'),
+    )
 
 
 # Helper function
@@ -306,43 +1037,1331 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-# Database initialization and migration function
-def init_and_migrate_db():
-    """Initialize database and handle migrations"""
-    with app.app_context():
-        # Create all tables
-        db.create_all()
+# Helper for the setup forms
+def roster_rules_from_form():
+    """Squad limits entered on the league setup form, as JSON overrides of the defaults"""
+    positions = {pos: request.form.get(f'limit_{pos}', type=int) for pos in DEFAULT_ROSTER_RULES['positions']}
+    rules = {'positions': {pos: limit for pos, limit in positions.items() if limit is not None and limit >= 0}}
+    max_per_club = request.form.get('max_per_club', type=int)
+    if max_per_club and max_per_club > 0:
+        rules['max_per_club'] = max_per_club
+    return json.dumps(rules)
+
+
+def schedule_from_form(team_ids, rounds=DRAFT_ROUNDS):
+    """Draft order style and pick schedule chosen on a setup form"""
+    order_style = request.form.get('order_style', 'snake')
+    if order_style not in DRAFT_ORDER_STYLES:
+        order_style = 'snake'
+
+    custom_slots = None
+    if order_style == 'custom':
+        custom_slots = [int(slot) for slot in request.form.get('custom_order', '').replace(' ', '').split(',')
+                        if slot.isdigit() and 1 <= int(slot) <= len(team_ids)]
+        if not custom_slots:
+            order_style = 'snake'
+
+    return order_style, PickSchedule.build(team_ids, order_style, rounds=rounds, custom_slots=custom_slots)
+
+
+# Per-league draft pool
+def league_picks(league_id):
+    """Picks made in a league's draft (league_id None is the original single draft)"""
+    return DraftPick.query.filter(DraftPick.league_id == league_id)
+
+
+# Pick commits
+class PickRejected(Exception):
+    pass
+
+
+def commit_pick(draft, player, team):
+    """Record a pick and advance the draft as one atomic step.
+
+    The draft row only moves on if current_pick is still the pick that was validated
+    (a compare-and-swap, which also takes the row lock on Postgres), and the unique
+    (league_id, player_id) index refuses a player that is already taken. Two requests
+    racing for the same pick can therefore never both succeed. The pick is appended to
+    the league's pick log in the same transaction.
+    """
+    expected_pick = draft.current_pick
+    expected_seq = draft.log_seq
+    deadline = next_pick_deadline(draft)
+    advanced = db.session.execute(
+        db.update(Draft).where(
+            Draft.id == draft.id,
+            Draft.current_pick == expected_pick,
+            Draft.log_seq == expected_seq
+        ).values(
+            current_pick=expected_pick + 1,
+            current_team_index=(draft.current_team_index + 1) % draft.total_teams,
+            log_seq=expected_seq + 1,
+            pick_deadline=deadline
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    if not advanced:
+        db.session.rollback()
+        raise PickRejected('that pick was already made')
+
+    db.session.add(DraftPick(
+        league_id=draft.league_id,
+        player_id=player.id,
+        team_id=team.id,
+        pick_number=expected_pick
+    ))
+    log_picks(draft.league_id, expected_seq, [(expected_pick, team.id, player.id)])
 
-        # Check if we need to add league columns (migration)
-        from sqlalchemy import inspect
-        inspector = inspect(db.engine)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise PickRejected('player was already drafted in this league')
+
+    roster_constraints.apply_pick(draft, expected_seq, team.id, player)
+    pick_clock.schedule(draft.id, expected_seq + 1, deadline)
+    response_cache.bump('picks', f'league:{draft.league_id}')
+
+
+# Pick log
+# Every pick and undo is appended to pick_log under a per-league sequence number, in
+# the same transaction as the draft_pick change and the draft's move. draft_pick and
+# Draft.current_pick stay the fast read path; the log is the history they can be
+# rebuilt from. Every SNAPSHOT_INTERVAL entries the whole pick list is stored as a
+# snapshot, so a replay reads one snapshot and fewer than SNAPSHOT_INTERVAL entries.
+SNAPSHOT_INTERVAL = 50
+
+
+def league_pick_log(league_id):
+    """Log entries for a league's draft (league_id None is the original single draft)"""
+    return PickLogEntry.query.filter(PickLogEntry.league_id == league_id)
+
+
+def clear_pick_log(league_id):
+    """Drop a league's log and snapshots, for when its draft is set up from scratch"""
+    league_pick_log(league_id).delete(synchronize_session=False)
+    DraftSnapshot.query.filter(DraftSnapshot.league_id == league_id).delete(synchronize_session=False)
+
+
+def log_picks(league_id, seq, picks, action='pick'):
+    """Stage log entries seq+1.. for picks [(pick number, team id, player id)], and a
+    snapshot if they cross a SNAPSHOT_INTERVAL boundary; the caller commits"""
+    db.session.execute(db.insert(PickLogEntry), [
+        {'league_id': league_id, 'seq': seq + i, 'action': action,
+         'pick_number': pick_number, 'team_id': team_id, 'player_id': player_id}
+        for i, (pick_number, team_id, player_id) in enumerate(picks, start=1)
+    ])
+    last_seq = seq + len(picks)
+    if last_seq // SNAPSHOT_INTERVAL > seq // SNAPSHOT_INTERVAL:
+        # draft_pick already holds this transaction's changes, i.e. the log replayed to last_seq
+        rows = league_picks(league_id).with_entities(
+            DraftPick.pick_number, DraftPick.team_id, DraftPick.player_id).order_by(DraftPick.pick_number)
+        db.session.add(DraftSnapshot(league_id=league_id, seq=last_seq,
+                                     picks=json.dumps([list(row) for row in rows], separators=(',', ':'))))
+
+
+def replay_pick_log(league_id, upto=None):
+    """(seq, [(pick number, team id, player id)]): a league's picks as of log entry upto
+    (the latest by default), from the nearest snapshot and the entries after it.
+
+    Raises ValueError on an entry without a pick number rather than replaying it wrong.
+    """
+    snapshots = DraftSnapshot.query.filter(DraftSnapshot.league_id == league_id)
+    entries = league_pick_log(league_id)
+    if upto is not None:
+        snapshots = snapshots.filter(DraftSnapshot.seq <= upto)
+        entries = entries.filter(PickLogEntry.seq <= upto)
+
+    snapshot = snapshots.order_by(DraftSnapshot.seq.desc()).first()
+    seq, picks = 0, {}
+    if snapshot:
+        seq = snapshot.seq
+        picks = {row[0]: tuple(row) for row in json.loads(snapshot.picks)}
+        if None in picks:
+            raise ValueError(f'snapshot at log entry {seq} has a pick without a pick number - run the migrations')
+
+    for entry_seq, action, pick_number, team_id, player_id in entries.filter(PickLogEntry.seq > seq).with_entities(
+            PickLogEntry.seq, PickLogEntry.action, PickLogEntry.pick_number,
+            PickLogEntry.team_id, PickLogEntry.player_id).order_by(PickLogEntry.seq):
+        # Entries are keyed on pick number; unnumbered ones would collapse into one
+        if pick_number is None:
+            raise ValueError(f'pick log entry {entry_seq} has no pick number - run the migrations')
+        if action == 'pick':
+            picks[pick_number] = (pick_number, team_id, player_id)
+        else:
+            picks.pop(pick_number, None)
+        seq = entry_seq
+    return seq, sorted(picks.values())
+
+
+def undo_last_pick(draft):
+    """Take back the draft's latest pick and return it as (pick number, team id, player id).
+
+    The pick is one lookup on the (league_id, pick_number) index. The draft steps back
+    with the same compare-and-swap as commit_pick, keyed on log_seq, so an undo racing
+    a pick or another undo fails with PickRejected rather than removing the wrong pick.
+    """
+    expected_seq = draft.log_seq
+    league_id = draft.league_id
+    last = league_picks(league_id).filter(DraftPick.pick_number == draft.current_pick - 1).first()
+    if last is None:
+        raise PickRejected('there is no pick to undo')
+    undone = (last.pick_number, last.team_id, last.player_id)
+
+    deadline = next_pick_deadline(draft)
+    moved = db.session.execute(
+        db.update(Draft).where(
+            Draft.id == draft.id,
+            Draft.log_seq == expected_seq
+        ).values(
+            current_pick=last.pick_number,
+            current_team_index=(draft.current_team_index - 1) % draft.total_teams,
+            log_seq=expected_seq + 1,
+            pick_deadline=deadline
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not moved:
+        db.session.rollback()
+        raise PickRejected('the draft moved on before the undo')
+
+    db.session.execute(db.delete(DraftPick).where(DraftPick.id == last.id))
+    log_picks(league_id, expected_seq, [undone], action='undo')
+    db.session.commit()
+    pick_clock.schedule(draft.id, expected_seq + 1, deadline)
+    response_cache.bump('picks', f'league:{league_id}')
+    return undone
+
+
+def rebuild_draft_from_log(draft):
+    """Rewrite a league's draft_pick rows and draft position from its pick log.
+
+    For audits and repairs; returns the number of picks. Only this process's board
+    and roster caches are dropped, so other workers should be restarted afterwards.
+    """
+    seq, picks = replay_pick_log(draft.league_id)
+    league_id = draft.league_id
+    league_picks(league_id).delete(synchronize_session=False)
+    if picks:
+        db.session.execute(db.insert(DraftPick), [
+            {'league_id': league_id, 'pick_number': pick_number, 'team_id': team_id, 'player_id': player_id}
+            for pick_number, team_id, player_id in picks
+        ])
+    draft.current_pick = len(picks) + 1
+    draft.current_team_index = len(picks) % draft.total_teams if draft.total_teams else 0
+    draft.log_seq = seq
+    db.session.commit()
+
+    board_index.forget_league(league_id)
+    roster_constraints.invalidate(league_id)
+    response_cache.bump('picks', f'league:{league_id}')
+    return len(picks)
+
+
+# Auto-draft
+# Teams with auto_draft set pick for themselves: the best-ranked wishlist player they
+# can still legally take, else the best available by draft score. Consecutive picks
+# are planned in memory from the board index and roster counters, then written in one
+# transaction, so fast-forwarding the rest of a draft costs a handful of statements.
+def plan_auto_picks(draft, max_picks=None, auto_only=True):
+    """[(pick number, team id, player)] for the next picks, stopping at a team that isn't
+    on auto-draft (when auto_only), at max_picks, at the end of the schedule or when a
+    team has nothing legal left."""
+    schedule = draft.schedule
+    teams = {team.id: team for team in DraftTeam.query.filter_by(league_id=draft.league_id)}
+    on_clock = teams.get(schedule.team_for(draft.current_pick))
+    if on_clock is None or (auto_only and not on_clock.auto_draft):
+        return []  # the common case after a manual pick: nothing more to load
+
+    rules = draft.rules
+    players, ordered, _ = board_index.snapshot()
+    taken = set(board_index.drafted_ids(draft, draft.league_id))
+    counts = {team_id: {'positions': dict(counters['positions']), 'clubs': dict(counters['clubs'])}
+              for team_id, counters in roster_constraints.counts(draft).items()}
+
+    wishlists = {}
+    for team_id, player_id in Wishlist.query.join(DraftTeam, DraftTeam.id == Wishlist.team_id).filter(
+            DraftTeam.league_id == draft.league_id).order_by(Wishlist.team_id, Wishlist.rank).with_entities(
+            Wishlist.team_id, Wishlist.player_id):
+        wishlists.setdefault(team_id, []).append(player_id)
+
+    ranking = ordered[('draft_score', 'all')]
+    ranking_start = 0  # everything before this is taken
+    picks = []
+    pick = draft.current_pick
+    while pick <= len(schedule.teams) and (max_picks is None or len(picks) < max_picks):
+        team = teams.get(schedule.team_for(pick))
+        if team is None or (auto_only and not team.auto_draft):
+            break
+        counters = counts.setdefault(team.id, RosterConstraints.new_counters())
+
+        def legal(player_id):
+            player = players[player_id]
+            return (counters['clubs'].get(player.team, 0) < rules['max_per_club']
+                    and counters['positions'].get(player.position, 0) < rules['positions'].get(player.position, 0))
+
+        while ranking_start < len(ranking) and ranking[ranking_start] in taken:
+            ranking_start += 1
+        choice = next((player_id for player_id in wishlists.get(team.id, ())
+                       if player_id not in taken and player_id in players and legal(player_id)), None)
+        if choice is None:
+            choice = next((player_id for player_id in ranking[ranking_start:]
+                           if player_id not in taken and legal(player_id)), None)
+        if choice is None:
+            break
+
+        player = players[choice]
+        taken.add(choice)
+        counters['positions'][player.position] = counters['positions'].get(player.position, 0) + 1
+        counters['clubs'][player.team] = counters['clubs'].get(player.team, 0) + 1
+        picks.append((pick, team.id, player))
+        pick += 1
+    return picks
+
+
+def commit_auto_picks(draft, picks):
+    """Write planned picks and advance the draft past them in one transaction.
+
+    The same compare-and-swap on current_pick as commit_pick, so a manual pick that
+    lands first makes the whole batch fail with PickRejected instead of clashing.
+    """
+    expected_pick, expected_seq = draft.current_pick, draft.log_seq
+    draft_id, league_id, team_index = draft.id, draft.league_id, draft.current_team_index
+    deadline = next_pick_deadline(draft)
+    advanced = db.session.execute(
+        db.update(Draft).where(
+            Draft.id == draft_id,
+            Draft.current_pick == expected_pick,
+            Draft.log_seq == expected_seq
+        ).values(
+            current_pick=expected_pick + len(picks),
+            current_team_index=(team_index + len(picks)) % draft.total_teams,
+            log_seq=expected_seq + len(picks),
+            pick_deadline=deadline
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not advanced:
+        db.session.rollback()
+        raise PickRejected('the draft moved on while auto-picking')
+
+    db.session.execute(db.insert(DraftPick), [
+        {'league_id': league_id, 'player_id': player.id, 'team_id': team_id, 'pick_number': pick_number}
+        for pick_number, team_id, player in picks
+    ])
+    log_picks(league_id, expected_seq, [(pick_number, team_id, player.id) for pick_number, team_id, player in picks])
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise PickRejected('a player was already drafted in this league')
+
+    for seq, (pick_number, team_id, player) in enumerate(picks, start=expected_seq):
+        roster_constraints.apply_pick(draft, seq, team_id, player)
+    pick_clock.schedule(draft_id, expected_seq + len(picks), deadline)
+    response_cache.bump('picks', f'league:{league_id}')
+
+
+def run_auto_draft(draft, max_picks=None, auto_only=True):
+    """Plan, commit and announce auto-picks from the current pick; returns the picks made.
+
+    A single pick (a pick clock timeout, one auto-drafting team) goes out as an ordinary
+    player_drafted event so boards patch it in place; only a batch makes them reload.
+    """
+    picks = plan_auto_picks(draft, max_picks, auto_only)
+    if len(picks) == 1:
+        commit_auto_picks(draft, picks)
+        _, team_id, player = picks[0]
+        announce_pick(draft, player, db.session.get(DraftTeam, team_id))
+    elif picks:
+        commit_auto_picks(draft, picks)
+        announce_auto_picks(draft, picks)
+    return picks
+
+
+# Pick clock
+# A draft with pick_seconds set gives each pick a deadline, stored on the draft row
+# (pick_deadline) by the same compare-and-swap that moves the draft on. Every running
+# clock in the process sits in one heap served by one background task, so hundreds of
+# leagues drafting at once cost one sleeping thread, not a thread or poll per league.
+# When a deadline passes the team on the clock gets an auto-pick.
+PICK_CLOCK_CHOICES = [30, 60, 90, 120, 180]
+
+
+def next_pick_deadline(draft):
+    """Deadline for the pick after a move made now, or None when the draft has no clock"""
+    return datetime.utcnow() + timedelta(seconds=draft.pick_seconds) if draft.pick_seconds else None
+
+
+def clock_payload(draft):
+    """The pick clock as pages and events see it: deadline as epoch seconds"""
+    deadline = draft.pick_deadline if draft.pick_seconds else None
+    return {
+        'seconds': draft.pick_seconds,
+        'deadline': deadline.replace(tzinfo=timezone.utc).timestamp() if deadline else None,
+        'locked': bool(draft.is_locked)
+    }
+
+
+class PickClock:
+    """Deadlines for every running pick clock in one heap, served by one background task.
+
+    Heap entries are (deadline, draft id, log seq). A move pushes a new entry instead of
+    removing the old one; current holds each draft's live entry, so superseded entries
+    are dropped as they surface. The live entry re-reads the draft row when it fires: if
+    another worker moved the draft on it follows the row's deadline, otherwise the team
+    on the clock is auto-picked. The task rebuilds the heap from Draft.pick_deadline when
+    it starts, so a worker restart loses no deadlines.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.heap = []
+        self.current = {}  # draft id -> (deadline, log seq)
+        self.started = False
+        self.fired = 0
+        self.late_buckets = [0] * LATENCY_BUCKETS  # how long after its deadline each pick landed
+        self.late_max_ms = 0.0
+
+    def start(self):
+        with self.condition:
+            if self.started:
+                return
+            self.started = True
+        socketio.start_background_task(self.run)
+
+    def schedule(self, draft_id, seq, deadline):
+        """Track a draft's deadline for the pick after log entry seq (None stops its clock)"""
+        with self.condition:
+            if deadline is None:
+                self.current.pop(draft_id, None)
+                return
+            self.current[draft_id] = (deadline, seq)
+            heapq.heappush(self.heap, (deadline, draft_id, seq))
+            self.condition.notify()
+
+    def reload(self):
+        """Forget every tracked deadline and read them again, after the drafts were replaced"""
+        with self.condition:
+            self.heap.clear()
+            self.current.clear()
+        self.load()
+
+    def load(self):
+        rows = Draft.query.filter(Draft.pick_deadline.isnot(None), Draft.pick_seconds.isnot(None)).with_entities(
+            Draft.id, Draft.log_seq, Draft.pick_deadline)
+        for draft_id, seq, deadline in rows:
+            self.schedule(draft_id, seq, deadline)
+
+    def next_due(self):
+        """Block until the earliest live deadline passes and return its entry"""
+        with self.condition:
+            while True:
+                now = datetime.utcnow()
+                while self.heap and self.current.get(self.heap[0][1]) != (self.heap[0][0], self.heap[0][2]):
+                    heapq.heappop(self.heap)
+                if self.heap and self.heap[0][0] <= now:
+                    deadline, draft_id, seq = heapq.heappop(self.heap)
+                    del self.current[draft_id]
+                    return deadline, draft_id, seq
+                self.condition.wait((self.heap[0][0] - now).total_seconds() if self.heap else None)
+
+    def run(self):
+        with app.app_context():
+            self.load()
+            db.session.remove()
+        while True:
+            deadline, draft_id, seq = self.next_due()
+            try:
+                with app.app_context():
+                    self.expire(draft_id, seq)
+                    db.session.remove()
+            except Exception as e:
+                app.logger.error(f"Pick clock failed for draft {draft_id}: {str(e)}")
+                continue
+            late_ms = (datetime.utcnow() - deadline).total_seconds() * 1000
+            with self.condition:
+                self.fired += 1
+                self.late_buckets[RequestMetrics.bucket(late_ms)] += 1
+                self.late_max_ms = max(self.late_max_ms, late_ms)
+
+    def expire(self, draft_id, seq):
+        draft = db.session.get(Draft, draft_id)
+        if draft is None or not draft.pick_seconds or draft.pick_deadline is None or draft.is_locked:
+            return
+        if draft.log_seq != seq or draft.pick_deadline > datetime.utcnow():
+            # Moved on or restarted elsewhere; follow the row
+            self.schedule(draft.id, draft.log_seq, draft.pick_deadline)
+            return
+
+        try:
+            if run_auto_draft(draft, max_picks=1, auto_only=False):
+                run_auto_draft(draft)
+            else:
+                # Nobody left that the team can legally draft: the draft is over
+                Draft.query.filter_by(id=draft_id, log_seq=seq).update({'pick_deadline': None})
+                db.session.commit()
+        except PickRejected:
+            # A manual pick beat the clock; its commit scheduled the next deadline
+            db.session.rollback()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'running': len(self.current),
+                'fired': self.fired,
+                'late_p50_ms': RequestMetrics.percentile(self.late_buckets, self.fired, 50, self.late_max_ms),
+                'late_p99_ms': RequestMetrics.percentile(self.late_buckets, self.fired, 99, self.late_max_ms),
+                'late_max_ms': round(self.late_max_ms, 2)
+            }
+
+
+pick_clock = PickClock()
+
+
+@app.before_request
+def start_pick_clock():
+    pick_clock.start()
+
+
+# Wishlist ranking
+# Ranks are spaced RANK_GAP apart so a drag-and-drop move usually rewrites only the moved
+# row (it takes the midpoint of its new neighbours). Only when two neighbours have run out
+# of room is the team's list respaced, and that is still a single UPDATE.
+RANK_GAP = 1024
+
+
+def respace_wishlist(team_id, player_ids):
+    """Give a team's wishlist evenly spaced ranks in the given order with one CASE UPDATE"""
+    if not player_ids:
+        return
+    db.session.execute(
+        db.update(Wishlist).where(
+            Wishlist.team_id == team_id,
+            Wishlist.player_id.in_(player_ids)
+        ).values(rank=db.case(
+            {player_id: (index + 1) * RANK_GAP for index, player_id in enumerate(player_ids)},
+            value=Wishlist.player_id
+        )).execution_options(synchronize_session=False)
+    )
+
+
+def move_wishlist_item(team_id, player_id, before_player_id=None):
+    """Move one wishlist entry in front of another (or to the end when before is None)"""
+    others = Wishlist.query.filter(Wishlist.team_id == team_id, Wishlist.player_id != player_id)
+
+    if before_player_id is None:
+        upper = None
+        lower = others.with_entities(db.func.max(Wishlist.rank)).scalar() or 0
+    else:
+        upper = others.filter(Wishlist.player_id == before_player_id).with_entities(Wishlist.rank).scalar()
+        if upper is None:
+            return
+        lower = others.filter(Wishlist.rank < upper).with_entities(db.func.max(Wishlist.rank)).scalar() or 0
+
+    if upper is None:
+        new_rank = lower + RANK_GAP
+    elif upper - lower > 1:
+        new_rank = (lower + upper) // 2
+    else:
+        # No room between the neighbours - respace the whole list with the move applied
+        order = [pid for (pid,) in others.order_by(Wishlist.rank).with_entities(Wishlist.player_id)]
+        order.insert(order.index(before_player_id), player_id)
+        respace_wishlist(team_id, order)
+        return
+
+    Wishlist.query.filter_by(team_id=team_id, player_id=player_id).update(
+        {'rank': new_rank}, synchronize_session=False
+    )
+
+
+# Board data loading
+def load_board_teams(draft):
+    """Teams with rosters for a draft board, plus the on-the-clock team and the order display.
+
+    Rosters are eager-loaded so the templates, get_roster() and get_team_counts() never
+    fall back to one lazy load per team: two queries however many teams the league has.
+    """
+    teams = DraftTeam.query.filter_by(league_id=draft.league_id).options(
+        selectinload(DraftTeam.players)
+    ).all()
+    teams_by_id = {team.id: team for team in teams}
+
+    # Get current team using snake draft logic
+    current_team = teams_by_id.get(draft.get_current_team_id())
+
+    # Draft order display for the current round, straight from the schedule
+    display_teams = [teams_by_id[team_id] for team_id in draft.schedule.round_order(draft.current_pick)
+                     if team_id in teams_by_id]
+
+    return teams, current_team, display_teams
+
+
+# Sort keys offered on the draft board and wishlist pages
+BOARD_SORT_KEYS = ['total_points', 'draft_score', 'vorp', 'points_per_game', 'now_cost', 'goals_scored', 'assists',
+                   'minutes', 'name']
+POSITIONS = ['GK', 'DEF', 'MID', 'FWD']
+
+
+class AvailablePlayerIndex:
+    """Per-process index behind the draft board and wishlist player lists.
+
+    Every player is pre-sorted once on each board sort key and bucketed by position.
+    Each league only adds the set of player ids drafted so far, tagged with the
+    (draft id, pick log seq) it was read at - the seq rather than the pick number, since
+    an undo reuses pick numbers. A view that sees the same draft state serves straight
+    from memory; a pick or undo elsewhere (another worker, a reset) just
+    reloads that league's picks. Imports call invalidate() to re-sort everything, and
+    bump the response cache's 'players' counter, which tells the other workers to.
+
+    Request threads and the pick clock task share one index. Drafted sets are frozen
+    and replaced, never changed in place, so a reader never sees one mid-update, and
+    drafted_lock covers swapping them in and out.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.drafted_lock = threading.Lock()
+        self.players = None  # player id -> detached Player
+        self.players_version = None  # response cache 'players' counter the players were read at
+        self.ordered = {}  # (sort key, position) -> player ids in board order
+        self.positions = {}  # (sort key, position) -> {player id: index in that order}
+        self.drafted = {}  # league id -> ((draft id, log seq), frozenset of drafted player ids)
+
+    def invalidate(self):
+        with self.lock:
+            self.players = None
+        with self.drafted_lock:
+            self.drafted = {}
+
+    def forget_league(self, league_id):
+        """Drop a league's drafted set, for when its picks were rewritten in place"""
+        with self.drafted_lock:
+            self.drafted.pop(league_id, None)
+
+    def rebuild(self):
+        players = Player.query.all()
+        for player in players:
+            db.session.expunge(player)
+
+        ordered = {}
+        for sort_key in BOARD_SORT_KEYS:
+            if sort_key == 'name':
+                ranked = sorted(players, key=lambda p: (p.second_name, p.id))
+            else:
+                # Highest first, missing values last
+                ranked = sorted(players, key=lambda p: (getattr(p, sort_key) is None,
+                                                        -(getattr(p, sort_key) or 0), p.id))
+            ordered[(sort_key, 'all')] = [p.id for p in ranked]
+            for position in POSITIONS:
+                ordered[(sort_key, position)] = [p.id for p in ranked if p.position == position]
+
+        self.players = {p.id: p for p in players}
+        self.ordered = ordered
+        self.positions = {key: {player_id: i for i, player_id in enumerate(ids)}
+                          for key, ids in ordered.items()}
+
+    def drafted_ids(self, draft, league_id):
+        """Drafted player ids for a league, reloaded only when the draft has moved on"""
+        version = (draft.id, draft.log_seq) if draft else None
+        with self.drafted_lock:
+            cached = self.drafted.get(league_id)
+        if cached and version and cached[0] == version:
+            return cached[1]
+
+        ids = frozenset(player_id for (player_id,) in league_picks(league_id).with_entities(DraftPick.player_id))
+        with self.drafted_lock:
+            self.drafted[league_id] = (version, ids)
+        return ids
+
+    def on_player_drafted(self, payload):
+        """Event bus listener: apply a pick made in this process without a reload"""
+        league_id = payload['league_id']
+        with self.drafted_lock:
+            cached = self.drafted.get(league_id)
+            if cached and cached[0] == (payload['draft_id'], payload['log_seq'] - 1):
+                self.drafted[league_id] = ((payload['draft_id'], payload['log_seq']),
+                                           cached[1] | {payload['player_id']})
+
+    def snapshot(self):
+        version, = response_cache.backend.versions(['players'])
+        with self.lock:
+            if self.players is None or self.players_version != version:
+                counted = g.query_count if has_app_context() and 'query_count' in g else None
+                self.rebuild()
+                self.players_version = version
+                if counted is not None:
+                    g.warmup_queries += g.query_count - counted
+            return self.players, self.ordered, self.positions
+
+    def available(self, draft, league_id, sort_by='total_points', position='all', exclude=()):
+        """Undrafted players for a league's board, in board order"""
+        players, ordered, _ = self.snapshot()
+
+        if sort_by not in BOARD_SORT_KEYS:
+            sort_by = 'total_points'
+        taken = self.drafted_ids(draft, league_id)
+        return [players[player_id] for player_id in ordered.get((sort_by, position), [])
+                if player_id not in taken and player_id not in exclude]
+
+    def page(self, draft, league_id, sort_by='total_points', position='all', search='', after=None, limit=50):
+        """One page of undrafted players in board order, and the cursor for the next page.
+
+        The cursor is the id of the last player returned, i.e. its place in the sort
+        order (keyset pagination), so picks made between requests never shift or skip
+        rows the way an offset would. The next cursor is None on the last page.
+        """
+        players, ordered, positions = self.snapshot()
+
+        if sort_by not in BOARD_SORT_KEYS:
+            sort_by = 'total_points'
+        key = (sort_by, position)
+        ids = ordered.get(key, [])
+
+        start = 0
+        if after is not None:
+            if after not in positions.get(key, {}):
+                raise ValueError(f'Unknown cursor {after}')
+            start = positions[key][after] + 1
+
+        taken = self.drafted_ids(draft, league_id)
+        search = search.lower()
+        page = []
+        for player_id in ids[start:]:
+            player = players[player_id]
+            if player_id in taken:
+                continue
+            if search and search not in player.name.lower() and search not in (player.team or '').lower():
+                continue
+            if len(page) == limit:
+                return page, page[-1].id
+            page.append(player)
+        return page, None
+
+
+board_index = AvailablePlayerIndex()
+
+
+# Player search
+# Search-as-you-type over full name, display name, surname and club. Text is folded
+# (accents stripped, case-folded) the same way at import and query time. The default
+# backend is a trigram and word-prefix index over the board index's players, rebuilt
+# whenever that is; PLAYER_SEARCH_BACKEND=pg_trgm queries Postgres instead, through
+# Player.search_text and its trigram index (see migrate_player_search).
+SEARCH_MIN_SIMILARITY = 0.2  # trigram similarity a match needs without a prefix hit
+
+
+def fold_search_text(*values):
+    """Lowercase, accent-free words: 'Ødegaard, M.' -> 'odegaard m'"""
+    text = unicodedata.normalize('NFKD', ' '.join(value for value in values if value))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = text.replace('ø', 'o').replace('ß', 'ss').replace('æ', 'ae').replace('ł', 'l')
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def player_search_text(player):
+    return fold_search_text(player.full_name, player.web_name, player.second_name, player.team)
+
+
+def trigrams(text):
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PlayerSearchIndex:
+    """In-memory trigram and word-prefix index over every player.
+
+    A match either starts a word of the player's text with every query word (typing
+    'sal' finds Salah) or shares enough trigrams with the query to survive a typo
+    ('salha'). Prefix hits rank first, then trigram similarity, then draft score.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.source = None  # the board index players dict this was built from
+        self.grams = {}  # trigram -> set of player ids
+        self.gram_counts = {}  # player id -> number of trigrams
+        self.words = []  # sorted (word, player id) for prefix lookups
+
+    def current(self):
+        players, _, _ = board_index.snapshot()
+        with self.lock:
+            if self.source is not players:
+                self.build(players)
+            return players
+
+    def build(self, players):
+        grams, gram_counts, words = {}, {}, []
+        for player in players.values():
+            text = player_search_text(player)
+            player_grams = trigrams(text)
+            gram_counts[player.id] = len(player_grams)
+            for gram in player_grams:
+                grams.setdefault(gram, set()).add(player.id)
+            words.extend((word, player.id) for word in set(text.split()))
+        words.sort()
+        self.grams, self.gram_counts, self.words, self.source = grams, gram_counts, words, players
+
+    def prefix_matches(self, prefix):
+        start = bisect.bisect_left(self.words, (prefix,))
+        end = bisect.bisect_left(self.words, (prefix + '\uffff',))
+        return {player_id for _, player_id in self.words[start:end]}
+
+    def search(self, query, exclude=(), position='all', limit=10):
+        """(player, score) pairs best first; the score is prefix words matched plus similarity"""
+        players = self.current()
+        folded = fold_search_text(query)
+        if not folded:
+            return []
+
+        prefix_hits = None
+        for word in folded.split():
+            matches = self.prefix_matches(word)
+            prefix_hits = matches if prefix_hits is None else prefix_hits & matches
+
+        query_grams = trigrams(folded)
+        shared = {}
+        for gram in query_grams:
+            for player_id in self.grams.get(gram, ()):
+                shared[player_id] = shared.get(player_id, 0) + 1
+
+        scored = []
+        for player_id in prefix_hits | shared.keys():
+            if player_id in exclude:
+                continue
+            player = players[player_id]
+            if position != 'all' and player.position != position:
+                continue
+            common = shared.get(player_id, 0)
+            similarity = common / (len(query_grams) + self.gram_counts[player_id] - common)
+            if player_id not in prefix_hits and similarity < SEARCH_MIN_SIMILARITY:
+                continue
+            score = (1.0 if player_id in prefix_hits else 0.0) + similarity
+            scored.append((-score, -(player.draft_score or 0), player_id))
+
+        scored.sort()
+        return [(players[player_id], round(-score, 3)) for score, _, player_id in scored[:limit]]
+
+
+class PostgresPlayerSearch:
+    """The same search answered by Postgres with pg_trgm over Player.search_text"""
+
+    @staticmethod
+    def prefix_filter(folded):
+        """Every query word starts some word of the player's text, as in PlayerSearchIndex"""
+        return and_(*[or_(Player.search_text.like(f'{word}%'), Player.search_text.like(f'% {word}%'))
+                      for word in folded.split()])
+
+    def search(self, query, exclude=(), position='all', limit=10):
+        folded = fold_search_text(query)
+        if not folded:
+            return []
+        prefix = self.prefix_filter(folded)
+        score = case((prefix, 1.0), else_=0.0) + func.word_similarity(folded, Player.search_text)
+        rows = db.session.query(Player, score).filter(
+            prefix | Player.search_text.op('%>')(folded)
+        )
+        if position != 'all':
+            rows = rows.filter(Player.position == position)
+        if exclude:
+            rows = rows.filter(Player.id.notin_(exclude))
+        rows = rows.order_by(score.desc(), Player.draft_score.desc().nulls_last()).limit(limit)
+        return [(player, round(float(score), 3)) for player, score in rows]
+
+
+if os.environ.get('PLAYER_SEARCH_BACKEND') == 'pg_trgm':
+    player_search = PostgresPlayerSearch()
+else:
+    player_search = PlayerSearchIndex()
+
+
+class RosterConstraints:
+    """Per-team position and club counters behind the squad rules.
+
+    A league's counters come from one grouped query over its picks and are tagged with
+    the (draft id, pick log seq) they were read at, like the board index. commit_pick
+    bumps them in place, so the next check costs nothing; a pick made by another worker
+    just triggers a reload. A player is legal for a team unless their position or club
+    is already full, so blocked() - the full positions and clubs - lets the board grey
+    out every illegal card with a set lookup instead of a check per player.
+
+    Request threads and the pick clock task share the counters, so like the board
+    index's drafted sets they are copied and replaced under the lock, never changed in
+    place: a caller holding a league's counters never sees them move.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.leagues = {}  # league id -> ((draft id, log seq), {team id: counters})
+
+    def invalidate(self, league_id=None):
+        """Drop one league's counters, or every league's"""
+        with self.lock:
+            if league_id is None:
+                self.leagues = {}
+            else:
+                self.leagues.pop(league_id, None)
+
+    @staticmethod
+    def new_counters():
+        return {'positions': {}, 'clubs': {}}
+
+    def counts(self, draft):
+        """{team id: {'positions': {pos: n}, 'clubs': {club: n}}} for the draft's league"""
+        version = (draft.id, draft.log_seq)
+        with self.lock:
+            cached = self.leagues.get(draft.league_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        teams = {}
+        rows = league_picks(draft.league_id).join(Player, Player.id == DraftPick.player_id).with_entities(
+            DraftPick.team_id, Player.position, Player.team, db.func.count()
+        ).group_by(DraftPick.team_id, Player.position, Player.team)
+        for team_id, position, club, n in rows:
+            counters = teams.setdefault(team_id, self.new_counters())
+            counters['positions'][position] = counters['positions'].get(position, 0) + n
+            counters['clubs'][club] = counters['clubs'].get(club, 0) + n
+
+        with self.lock:
+            self.leagues[draft.league_id] = (version, teams)
+        return teams
+
+    def team_counts(self, draft, team_id):
+        return self.counts(draft).get(team_id, self.new_counters())
+
+    def apply_pick(self, draft, seq, team_id, player):
+        """Count a pick just committed after log entry seq, if our counters were current at it"""
+        with self.lock:
+            cached = self.leagues.get(draft.league_id)
+            if not cached or cached[0] != (draft.id, seq):
+                return
+            old = cached[1].get(team_id, self.new_counters())
+            counters = {'positions': dict(old['positions']), 'clubs': dict(old['clubs'])}
+            counters['positions'][player.position] = counters['positions'].get(player.position, 0) + 1
+            counters['clubs'][player.team] = counters['clubs'].get(player.team, 0) + 1
+            teams = dict(cached[1])
+            teams[team_id] = counters
+            self.leagues[draft.league_id] = ((draft.id, seq + 1), teams)
+
+    def blocked(self, draft, team_id, rules):
+        """Positions and clubs a team can no longer draft from"""
+        counters = self.team_counts(draft, team_id)
+        return {
+            'positions': sorted(pos for pos, limit in rules['positions'].items()
+                                if counters['positions'].get(pos, 0) >= limit),
+            'clubs': sorted(club for club, n in counters['clubs'].items() if n >= rules['max_per_club'])
+        }
+
+    def check(self, draft, team_id, player, rules):
+        """(True, "OK") if the team may draft this player, else (False, reason)"""
+        counters = self.team_counts(draft, team_id)
+        if counters['clubs'].get(player.team, 0) >= rules['max_per_club']:
+            return False, f"Already have {rules['max_per_club']} players from {player.team}"
+
+        limit = rules['positions'].get(player.position, 0)
+        if counters['positions'].get(player.position, 0) >= limit:
+            return False, f"Already have {limit} {player.position}s"
+
+        return True, "OK"
 
-        # Check if draft_team table exists and has league_id column
-        if 'draft_team' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('draft_team')]
-            if 'league_id' not in columns:
-                print("Adding league_id to draft_team table...")
-                with db.engine.connect() as conn:
-                    conn.execute(text('ALTER TABLE draft_team ADD COLUMN league_id INTEGER'))
-                    conn.commit()
-
-        # Check if draft table exists and has league_id column
-        if 'draft' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('draft')]
-            if 'league_id' not in columns:
-                print("Adding league_id to draft table...")
-                with db.engine.connect() as conn:
-                    conn.execute(text('ALTER TABLE draft ADD COLUMN league_id INTEGER'))
-                    conn.commit()
-
-        # Check if wishlist table exists and has league_id column
-        if 'wishlist' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('wishlist')]
-            if 'league_id' not in columns:
-                print("Adding league_id to wishlist table...")
-                with db.engine.connect() as conn:
-                    conn.execute(text('ALTER TABLE wishlist ADD COLUMN league_id INTEGER'))
-                    conn.commit()
+
+roster_constraints = RosterConstraints()
+
+
+# Real-time draft events
+def league_room(league_id):
+    """Socket.io room that every client watching a league's draft joins"""
+    return f'league_{league_id}' if league_id else 'league_default'
+
+
+class DraftEventBus:
+    """Publish draft events to in-process listeners and to the league's socket.io room.
+
+    The listener registry is the local pub/sub: it works with a single worker and in
+    tests without any broker. Cross-worker delivery of the socket.io side goes through
+    SOCKETIO_MESSAGE_QUEUE when it is configured.
+    """
+
+    def __init__(self, socketio):
+        self.socketio = socketio
+        self.listeners = {}
+
+    def subscribe(self, event, callback):
+        """Call callback(payload) whenever event is published in this process"""
+        self.listeners.setdefault(event, []).append(callback)
+
+    def publish(self, event, payload, league_id=None):
+        for callback in self.listeners.get(event, []):
+            try:
+                callback(payload)
+            except Exception as e:
+                app.logger.error(f"Draft event listener failed for {event}: {str(e)}")
+        self.socketio.emit(event, payload, to=league_room(league_id))
+
+
+draft_events = DraftEventBus(socketio)
+draft_events.subscribe('player_drafted', board_index.on_player_drafted)
+
+
+def next_team_payload(draft, rules):
+    """The team now on the clock with its squad counts, for pick events"""
+    if not draft.is_active:
+        return None
+    on_clock = DraftTeam.query.get(draft.get_current_team_id())
+    if not on_clock:
+        return None
+    counters = roster_constraints.team_counts(draft, on_clock.id)
+    return {
+        'id': on_clock.id,
+        'name': on_clock.name,
+        'owner': on_clock.owner,
+        'roster_counts': {pos: counters['positions'].get(pos, 0) for pos in POSITIONS},
+        'club_counts': counters['clubs'],
+        'blocked': roster_constraints.blocked(draft, on_clock.id, rules)
+    }
+
+
+def announce_pick(draft, player, team):
+    """Broadcast a completed pick so clients can patch their board instead of reloading"""
+    rules = draft.rules
+    next_team = next_team_payload(draft, rules)
+
+    draft_events.publish('player_drafted', {
+        'league_id': draft.league_id,
+        'draft_id': draft.id,
+        'player_id': player.id,
+        'player_name': player.name,
+        'position': player.position,
+        'team_id': team.id,
+        'team_name': team.name,
+        'team_player_count': sum(roster_constraints.team_counts(draft, team.id)['positions'].values()),
+        'team_blocked': roster_constraints.blocked(draft, team.id, rules),
+        'current_pick': draft.current_pick,
+        'log_seq': draft.log_seq,
+        'clock': clock_payload(draft),
+        'current_round': draft.current_round,
+        'is_reverse_round': draft.is_reverse_round,
+        'next_team': next_team
+    }, league_id=draft.league_id)
+
+    # One query for every wishlist in the league that had this player, with its
+    # position in that list (ranks are spaced, so count the entries at or above it)
+    above = aliased(Wishlist)
+    position = db.session.query(db.func.count(above.id)).filter(
+        above.team_id == Wishlist.team_id,
+        above.rank <= Wishlist.rank
+    ).correlate(Wishlist).scalar_subquery()
+    affected = db.session.query(Wishlist.team_id, position).join(
+        DraftTeam, DraftTeam.id == Wishlist.team_id
+    ).filter(
+        Wishlist.player_id == player.id,
+        DraftTeam.league_id == draft.league_id
+    ).all()
+
+    if affected:
+        draft_events.publish('wishlist_player_drafted', {
+            'player_id': player.id,
+            'player_name': player.name,
+            'drafted_by': team.name,
+            'affected_teams': [{'team_id': team_id, 'rank': rank} for team_id, rank in affected]
+        }, league_id=draft.league_id)
+
+
+def announce_auto_picks(draft, picks):
+    """Broadcast a batch of auto-picks as one event; boards reload rather than patch"""
+    rules = draft.rules
+    teams = {team.id: team for team in DraftTeam.query.filter_by(league_id=draft.league_id)}
+    draft_events.publish('draft_fast_forwarded', {
+        'league_id': draft.league_id,
+        'draft_id': draft.id,
+        'picks': [{
+            'pick_number': pick_number,
+            'player_id': player.id,
+            'player_name': player.name,
+            'position': player.position,
+            'team_id': team_id,
+            'team_name': teams[team_id].name
+        } for pick_number, team_id, player in picks],
+        'team_blocked': {team_id: roster_constraints.blocked(draft, team_id, rules)
+                         for team_id in {team_id for _, team_id, _ in picks}},
+        'current_pick': draft.current_pick,
+        'log_seq': draft.log_seq,
+        'next_team': next_team_payload(draft, rules)
+    }, league_id=draft.league_id)
+
+
+def announce_undo(draft, undone):
+    """Broadcast a taken-back pick; boards reload since the player returns to the pool"""
+    pick_number, team_id, player_id = undone
+    player = db.session.get(Player, player_id)
+    draft_events.publish('pick_undone', {
+        'league_id': draft.league_id,
+        'draft_id': draft.id,
+        'pick_number': pick_number,
+        'player_id': player_id,
+        'player_name': player.name if player else None,
+        'team_id': team_id,
+        'current_pick': draft.current_pick,
+        'log_seq': draft.log_seq
+    }, league_id=draft.league_id)
+
+
+@socketio.on('watch_import')
+def handle_watch_import(data):
+    """The upload page listens for progress on the import it just started"""
+    join_room(f"import_{(data or {}).get('import_id')}")
+
+
+@socketio.on('join_league')
+def handle_join_league(data):
+    """Clients join their league's room right after connecting"""
+    league_id = (data or {}).get('league_id')
+    join_room(league_room(league_id))
+
+
+# Database migrations
+# Each migration runs once, in order, and is recorded in schema_migration. Startup only
+# reads the latest recorded version; pending migrations run together in one transaction
+# (atomic on Postgres, whose DDL is transactional). Databases created before the runner
+# existed have none recorded, so every step checks before it changes anything. To change
+# the schema, update the model and append a migration - never edit an applied one.
+schema_migrations = db.Table(
+    'schema_migration', db.MetaData(),  # own metadata: not part of create_all or snapshots
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(100), nullable=False),
+    db.Column('applied_at', db.DateTime, default=datetime.utcnow)
+)
+
+# Indexes behind the board, roster and wishlist reads (declared on the models)
+HOT_PATH_INDEXES = ['ix_draft_team_league_id', 'ix_draft_league_id', 'ix_draft_pick_team_id',
+                    'ix_wishlist_team_rank']
+
+
+def add_missing_columns(conn, table, columns):
+    from sqlalchemy import inspect
+    existing = [col['name'] for col in inspect(conn).get_columns(table)]
+    for column, column_type in columns:
+        if column not in existing:
+            print(f"Adding {column} to {table} table...")
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {column_type}'))
+
+
+def migrate_create_tables(conn):
+    db.metadata.create_all(conn)
+
+
+def migrate_league_columns(conn):
+    for table in ['draft_team', 'draft', 'wishlist']:
+        add_missing_columns(conn, table, [('league_id', 'INTEGER')])
+
+
+def migrate_pick_schedule(conn):
+    add_missing_columns(conn, 'draft', [('order_style', 'VARCHAR(20)'), ('pick_schedule', 'TEXT')])
+
+
+def migrate_player_upsert_index(conn):
+    # Unique (second_name, team) index used by the bulk import upsert
+    for index in Player.__table__.indexes:
+        if index.name == 'ix_player_second_name_team':
+            index.create(conn, checkfirst=True)
+
+
+def migrate_draft_pick_backfill(conn):
+    # Move the old global Player.drafted flags into per-league draft picks
+    from sqlalchemy import inspect
+    columns = [col['name'] for col in inspect(conn).get_columns('player')]
+    has_picks = conn.execute(text('SELECT 1 FROM draft_pick LIMIT 1')).first()
+    if 'drafted_by' in columns and not has_picks:
+        print("Copying drafted players into draft_pick...")
+        conn.execute(text('''
+            INSERT INTO draft_pick (league_id, player_id, team_id)
+            SELECT draft_team.league_id, player.id, player.drafted_by
+            FROM player JOIN draft_team ON draft_team.id = player.drafted_by
+            WHERE player.drafted = :drafted
+        '''), {'drafted': True})
+
+
+def migrate_hot_path_indexes(conn):
+    from sqlalchemy import inspect
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        existing = [index['name'] for index in inspector.get_indexes(table.name)]
+        for index in table.indexes:
+            if index.name in HOT_PATH_INDEXES and index.name not in existing:
+                print(f"Adding index {index.name}...")
+                index.create(conn)
+
+
+def migrate_league_roster_rules(conn):
+    add_missing_columns(conn, 'league', [('roster_rules', 'TEXT')])
+
+
+def migrate_player_search(conn):
+    add_missing_columns(conn, 'player', [('search_text', 'TEXT')])
+    refresh_search_text(conn)
+    if conn.dialect.name == 'postgresql':
+        # The pg_trgm backend's index; needs the extension, which not every host allows
+        try:
+            with conn.begin_nested():
+                conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_player_search_trgm '
+                                  'ON player USING gin (search_text gin_trgm_ops)'))
+        except Exception as e:
+            print(f"Skipping pg_trgm search index: {e}")
+
+
+def migrate_team_auto_draft(conn):
+    add_missing_columns(conn, 'draft_team', [('auto_draft', 'BOOLEAN DEFAULT FALSE')])
+
+
+def migrate_player_valuation(conn):
+    import player_data
+    add_missing_columns(conn, 'player', [('vorp', 'FLOAT'), ('z_score', 'FLOAT'), ('draft_score', 'FLOAT')])
+    for index in Player.__table__.indexes:
+        if index.name == 'ix_player_draft_score':
+            index.create(conn, checkfirst=True)
+    player_data.value_players(conn, Player.__table__, valuation_slots(conn))
+
+
+def migrate_pick_log(conn):
+    add_missing_columns(conn, 'draft', [('log_seq', 'INTEGER DEFAULT 0')])
+    PickLogEntry.__table__.create(conn, checkfirst=True)
+    DraftSnapshot.__table__.create(conn, checkfirst=True)
+    for index in DraftPick.__table__.indexes:
+        if index.name == 'ix_draft_pick_league_number':
+            index.create(conn, checkfirst=True)
+
+    # Start each existing draft's log with the picks already made
+    pick_log = PickLogEntry.__table__
+    for draft_id, league_id in conn.execute(text('SELECT id, league_id FROM draft')).all():
+        if not conn.execute(db.select(pick_log.c.id).where(same_league(pick_log, league_id)).limit(1)).first():
+            seed_pick_log(conn, draft_id, league_id)
+
+
+def migrate_number_backfilled_picks(conn):
+    # Databases that ran the pick log migration before it numbered the picks copied
+    # from Player.drafted have NULL pick numbers in draft_pick and the log; number
+    # them and start those leagues' logs again from their picks
+    picks, pick_log = DraftPick.__table__, PickLogEntry.__table__
+    for draft_id, league_id in conn.execute(text('SELECT id, league_id FROM draft')).all():
+        if any(conn.execute(db.select(table.c.id).where(
+                same_league(table, league_id), table.c.pick_number.is_(None)).limit(1)).first()
+               for table in (picks, pick_log)):
+            print(f"Numbering backfilled picks for league {league_id}...")
+            seed_pick_log(conn, draft_id, league_id)
+
+
+def same_league(table, league_id):
+    """WHERE clause for a league's rows (league_id None is the original single draft)"""
+    return table.c.league_id.is_(None) if league_id is None else table.c.league_id == league_id
+
+
+def seed_pick_log(conn, draft_id, league_id):
+    """Replace a league's pick log with one entry per pick in draft_pick, in pick order.
+
+    Picks copied from the old Player.drafted flags have no pick number. They go
+    first, and when there are any the league's picks are renumbered 1..n (and the
+    draft put on pick n + 1), since undo and replay both key on the pick number.
+    """
+    picks, pick_log = DraftPick.__table__, PickLogEntry.__table__
+    rows = conn.execute(db.select(picks.c.id, picks.c.pick_number, picks.c.team_id, picks.c.player_id).where(
+        same_league(picks, league_id)
+    ).order_by(picks.c.pick_number.is_not(None), picks.c.pick_number, picks.c.id)).all()
+
+    if any(pick_number is None for _, pick_number, _, _ in rows):
+        conn.execute(picks.update().where(picks.c.id == bindparam('pick_id')).values(
+            pick_number=bindparam('number')
+        ), [{'pick_id': pick_id, 'number': number} for number, (pick_id, _, _, _) in enumerate(rows, start=1)])
+        conn.execute(text('UPDATE draft SET current_pick = :pick, current_team_index = :pick_count % '
+                          'CASE WHEN total_teams > 0 THEN total_teams ELSE 1 END WHERE id = :id'),
+                     {'pick': len(rows) + 1, 'pick_count': len(rows), 'id': draft_id})
+
+    conn.execute(pick_log.delete().where(same_league(pick_log, league_id)))
+    conn.execute(DraftSnapshot.__table__.delete().where(same_league(DraftSnapshot.__table__, league_id)))
+    if rows:
+        conn.execute(pick_log.insert(), [
+            {'league_id': league_id, 'seq': number, 'action': 'pick', 'pick_number': number,
+             'team_id': team_id, 'player_id': player_id, 'created_at': datetime.utcnow()}
+            for number, (_, _, team_id, player_id) in enumerate(rows, start=1)
+        ])
+    conn.execute(text('UPDATE draft SET log_seq = :seq WHERE id = :id'), {'seq': len(rows), 'id': draft_id})
+
+
+def migrate_pick_clock(conn):
+    add_missing_columns(conn, 'draft', [('pick_seconds', 'INTEGER'), ('pick_deadline', 'TIMESTAMP')])
+
+
+def migrate_missing_model_columns(conn):
+    # Databases from before the migration runner can lack columns the models declared
+    # even then (draft.is_locked on the original SQLite file); add every model column a
+    # table doesn't have, filling existing rows with the column's default when it has one
+    from sqlalchemy import inspect
+    inspector = inspect(conn)
+    for table in db.metadata.sorted_tables:
+        existing = {col['name'] for col in inspector.get_columns(table.name)}
+        missing = []
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            if column.default is not None and column.default.is_scalar:
+                default = db.literal(column.default.arg, column.type).compile(
+                    dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+                column_type += f' DEFAULT {default}'
+            missing.append((column.name, column_type))
+        add_missing_columns(conn, table.name, missing)
+
+
+MIGRATIONS = [
+    (1, 'create tables', migrate_create_tables),
+    (2, 'league columns', migrate_league_columns),
+    (3, 'draft pick schedule', migrate_pick_schedule),
+    (4, 'player upsert index', migrate_player_upsert_index),
+    (5, 'draft pick backfill', migrate_draft_pick_backfill),
+    (6, 'hot path indexes', migrate_hot_path_indexes),
+    (7, 'league roster rules', migrate_league_roster_rules),
+    (8, 'player valuation', migrate_player_valuation),
+    (9, 'player search text', migrate_player_search),
+    (10, 'team auto draft', migrate_team_auto_draft),
+    (11, 'pick log', migrate_pick_log),
+    (12, 'pick clock', migrate_pick_clock),
+    (13, 'number backfilled picks', migrate_number_backfilled_picks),
+    (14, 'missing model columns', migrate_missing_model_columns),
+]
+
+
+def schema_version():
+    """Latest applied migration, or 0 for a database the runner has never seen"""
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(db.select(db.func.max(schema_migrations.c.version))).scalar() or 0
+    except Exception:
+        return 0
+
+
+def init_and_migrate_db():
+    """Bring the schema up to date - a single version lookup when it already is"""
+    with app.app_context():
+        if schema_version() >= MIGRATIONS[-1][0]:
+            return
+
+        with db.engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                # Workers booting together queue here; the loser sees the work done
+                conn.execute(text('SELECT pg_advisory_xact_lock(421337)'))
+            schema_migrations.create(conn, checkfirst=True)
+            applied = set(conn.execute(db.select(schema_migrations.c.version)).scalars())
+
+            for version, name, migrate in MIGRATIONS:
+                if version in applied:
+                    continue
+                print(f"Applying migration {version}: {name}")
+                migrate(conn)
+                conn.execute(schema_migrations.insert().values(version=version, name=name,
+                                                               applied_at=datetime.utcnow()))
 
         print("Database initialization and migration complete!")
 
@@ -356,11 +2375,11 @@ def setup():
         session['is_admin'] = True
 
         # Clear only teams and draft data - NOT players!
+        PickLogEntry.query.delete()
+        DraftSnapshot.query.delete()
+        DraftPick.query.delete()
         DraftTeam.query.delete()
         Draft.query.delete()
-
-        # Reset all players to undrafted status
-        Player.query.update({'drafted': False, 'drafted_by': None})
         db.session.commit()
 
         # Create teams
@@ -377,14 +2396,19 @@ def setup():
 
         db.session.commit()
 
-        # Create draft
+        # Create draft with its full pick schedule
         draft_order = [team.id for team in teams]
+        order_style, schedule = schedule_from_form(draft_order)
         draft = Draft(
             total_teams=len(teams),
-            draft_order=json.dumps(draft_order)
+            draft_order=json.dumps(draft_order),
+            order_style=order_style,
+            is_snake_draft=order_style == 'snake',
+            pick_schedule=schedule.to_json()
         )
         db.session.add(draft)
         db.session.commit()
+        response_cache.bump('leagues')
 
         return redirect(url_for('draft'))
 
@@ -397,148 +2421,76 @@ def draft():
     if not draft:
         return redirect(url_for('setup'))
 
-    teams = DraftTeam.query.all()
+    # Teams, rosters and draft order in a fixed number of queries
+    teams, current_team, display_teams = load_board_teams(draft)
 
     # Get sorting preference from URL parameters
     sort_by = request.args.get('sort', 'total_points')
     position_filter = request.args.get('position', 'all')
 
-    # Build query for available players
-    query = Player.query.filter_by(drafted=False)
-
-    # Apply position filter
-    if position_filter != 'all':
-        query = query.filter_by(position=position_filter)
-
-    # Apply sorting
-    from sqlalchemy import desc, nullslast
-
-    if sort_by == 'name':
-        query = query.order_by(Player.second_name)
-    elif sort_by == 'total_points':
-        query = query.order_by(nullslast(desc(Player.total_points)))
-    elif sort_by == 'points_per_game':
-        query = query.order_by(nullslast(desc(Player.points_per_game)))
-    elif sort_by == 'now_cost':
-        query = query.order_by(nullslast(desc(Player.now_cost)))
-    elif sort_by == 'goals_scored':
-        query = query.order_by(nullslast(desc(Player.goals_scored)))
-    elif sort_by == 'assists':
-        query = query.order_by(nullslast(desc(Player.assists)))
-    elif sort_by == 'minutes':
-        query = query.order_by(nullslast(desc(Player.minutes)))
-    else:
-        query = query.order_by(nullslast(desc(Player.total_points)))
-
-    available_players = query.all()
-
-    # Get current team using snake draft logic
-    current_team_id = draft.get_current_team_id()
-    current_team = DraftTeam.query.get(current_team_id)
-
-    # Create draft order display
-    draft_order_ids = json.loads(draft.draft_order)
-    if draft.is_reverse_round:
-        # Show reversed order for even rounds
-        display_order = list(reversed(draft_order_ids))
-    else:
-        display_order = draft_order_ids
-
-    # Get team objects in display order
-    display_teams = [DraftTeam.query.get(team_id) for team_id in display_order]
+    # Squad rules, and what the team on the clock can no longer draft
+    rules = draft.rules
+    blocked = roster_constraints.blocked(draft, current_team.id, rules)
 
+    # Available players are paged in by the board from /api/available_players
     return render_template('draft.html',
                            draft=draft,
                            teams=teams,
-                           available_players=available_players,
+                           rules=rules,
+                           blocked=blocked,
                            current_team=current_team,
                            current_sort=sort_by,
                            current_position=position_filter,
                            display_teams=display_teams,
                            current_round=draft.current_round,
-                           is_reverse_round=draft.is_reverse_round)
+                           is_reverse_round=draft.is_reverse_round,
+                           clock=clock_payload(draft),
+                           clock_choices=PICK_CLOCK_CHOICES)
 
 
 @app.route('/create_league', methods=['GET', 'POST'])
 def create_league():
     """Create a new league"""
     if request.method == 'POST':
-        try:
-            league_name = request.form.get('league_name')
-
-            # Handle the database query with retry logic
-            def check_existing():
-                # Force a new connection
-                db.session.remove()
-                db.session.begin()
-                return League.query.filter_by(name=league_name).first()
+        league_name = request.form.get('league_name')
 
-            try:
-                existing = db_operation_with_retry(check_existing)
-            except Exception as e:
-                # If still failing, try to reconnect completely
-                db.session.rollback()
-                db.session.remove()
-                db.engine.dispose()  # Dispose of the connection pool
-                existing = League.query.filter_by(name=league_name).first()
-
-            if existing:
-                flash('A league with this name already exists. Please choose another name.', 'error')
-                return render_template('create_league.html')
-
-            # Create new league with retry logic
-            def create_new_league():
-                league = League(name=league_name)
-                league.generate_access_code()
-                db.session.add(league)
-                db.session.commit()
-                return league
+        # Connection blips are retried here and, failing that, answered with a 503 by
+        # with_db_resilience
+        existing = db_operation_with_retry(lambda: League.query.filter_by(name=league_name).first())
+        if existing:
+            flash('A league with this name already exists. Please choose another name.', 'error')
+            return render_template('create_league.html')
 
-            try:
-                league = db_operation_with_retry(create_new_league)
-            except Exception as e:
-                # Final fallback
-                db.session.rollback()
-                db.session.remove()
-                db.engine.dispose()
-
-                league = League(name=league_name)
-                league.generate_access_code()
-                db.session.add(league)
-                db.session.commit()
+        def create_new_league():
+            league = League(name=league_name)
+            league.generate_access_code()
+            db.session.add(league)
+            db.session.commit()
+            return league
 
-            # Store league ID in session
-            session['current_league_id'] = league.id
-            session['is_league_admin'] = True
+        try:
+            league = db_operation_with_retry(create_new_league)
+        except IntegrityError:
+            # Taken by a concurrent request since the check above
+            db.session.rollback()
+            flash('A league with this name already exists. Please choose another name.', 'error')
+            return render_template('create_league.html')
 
-            return redirect(url_for('setup_league', league_id=league.id))
+        response_cache.bump('leagues')
 
-        except Exception as e:
-            # Log the error for debugging
-            app.logger.error(f"Error creating league: {str(e)}")
+        # Store league ID in session; its creator runs this league's draft (and only this one)
+        session['current_league_id'] = league.id
+        session['is_league_admin'] = True
+        session['admin_league_ids'] = session.get('admin_league_ids', []) + [league.id]
 
-            # Try to rollback the session
-            db.session.rollback()
-            db.session.remove()
+        return redirect(url_for('setup_league', league_id=league.id))
 
-            # Check the type of error
-            if 'SSL connection' in str(e) or 'closed unexpectedly' in str(e):
-                flash('Database connection lost. Please try again.', 'warning')
-                # Force reconnection
-                db.engine.dispose()
-            elif 'relation "league" does not exist' in str(e).lower():
-                # Try to create the table
-                try:
-                    db.create_all()
-                    flash('Database tables were missing but have been created. Please try again.', 'warning')
-                except:
-                    flash('Database error: Tables need to be initialized. Please contact admin.', 'error')
-            else:
-                flash(f'An error occurred: {str(e)}', 'error')
+    return render_template('create_league.html')
 
-            return render_template('create_league.html')
 
-    return render_template('create_league.html')
+def administers_league(league_id):
+    """Whether this session may run a league's draft: the site admin or that league's creator"""
+    return bool(session.get('is_admin')) or league_id in session.get('admin_league_ids', [])
 
 
 @app.route('/league/<int:league_id>/setup', methods=['GET', 'POST'])
@@ -547,16 +2499,14 @@ def setup_league(league_id):
     league = League.query.get_or_404(league_id)
 
     if request.method == 'POST':
-        # Clear only teams and draft data for THIS league
+        # Squad limits for this league
+        league.roster_rules = roster_rules_from_form()
+
+        # Clear only teams, picks and draft data for THIS league
+        clear_pick_log(league_id)
+        league_picks(league_id).delete()
         DraftTeam.query.filter_by(league_id=league_id).delete()
         Draft.query.filter_by(league_id=league_id).delete()
-
-        # Reset players to undrafted only for this league's teams
-        for team in league.teams:
-            for player in team.players:
-                player.drafted = False
-                player.drafted_by = None
-
         db.session.commit()
 
         # Create teams
@@ -573,15 +2523,20 @@ def setup_league(league_id):
 
         db.session.commit()
 
-        # Create draft for this league
+        # Create draft for this league with its full pick schedule - one round per squad slot
         draft_order = [team.id for team in teams]
+        order_style, schedule = schedule_from_form(draft_order, rounds=sum(league.rules['positions'].values()))
         draft = Draft(
             total_teams=len(teams),
             draft_order=json.dumps(draft_order),
-            league_id=league_id
+            league_id=league_id,
+            order_style=order_style,
+            is_snake_draft=order_style == 'snake',
+            pick_schedule=schedule.to_json()
         )
         db.session.add(draft)
         db.session.commit()
+        response_cache.bump('leagues')
 
         return redirect(url_for('league_draft', league_id=league_id))
 
@@ -591,83 +2546,60 @@ def setup_league(league_id):
 @app.route('/league/<int:league_id>/draft')
 def league_draft(league_id):
     """Draft page for a specific league"""
-    league = League.query.get_or_404(league_id)
-    draft = Draft.query.filter_by(league_id=league_id).first()
-
-    if not draft:
-        return redirect(url_for('setup_league', league_id=league_id))
-
-    # Store current league in session
-    session['current_league_id'] = league_id
-
-    # Get teams for this league only
-    teams = DraftTeam.query.filter_by(league_id=league_id).all()
-
     # Get sorting preference from URL parameters
     sort_by = request.args.get('sort', 'total_points')
     position_filter = request.args.get('position', 'all')
 
-    # Build query for available players
-    query = Player.query.filter_by(drafted=False)
-
-    # Apply position filter
-    if position_filter != 'all':
-        query = query.filter_by(position=position_filter)
-
-    # Apply sorting
-    from sqlalchemy import desc, nullslast
-
-    if sort_by == 'name':
-        query = query.order_by(Player.second_name)
-    elif sort_by == 'total_points':
-        query = query.order_by(nullslast(desc(Player.total_points)))
-    elif sort_by == 'points_per_game':
-        query = query.order_by(nullslast(desc(Player.points_per_game)))
-    elif sort_by == 'now_cost':
-        query = query.order_by(nullslast(desc(Player.now_cost)))
-    elif sort_by == 'goals_scored':
-        query = query.order_by(nullslast(desc(Player.goals_scored)))
-    elif sort_by == 'assists':
-        query = query.order_by(nullslast(desc(Player.assists)))
-    elif sort_by == 'minutes':
-        query = query.order_by(nullslast(desc(Player.minutes)))
-    else:
-        query = query.order_by(nullslast(desc(Player.total_points)))
+    def render():
+        league = League.query.get_or_404(league_id)
+        draft = Draft.query.filter_by(league_id=league_id).first()
+
+        if not draft:
+            return redirect(url_for('setup_league', league_id=league_id))
+
+        # Teams for this league only, with rosters, in a fixed number of queries
+        teams, current_team, display_teams = load_board_teams(draft)
+
+        # Squad rules, and what the team on the clock can no longer draft
+        rules = league.rules
+        blocked = roster_constraints.blocked(draft, current_team.id, rules)
+
+        # Available players are paged in by the board from the JSON API
+        return render_template('league_draft.html',
+                               league=league,
+                               draft=draft,
+                               teams=teams,
+                               rules=rules,
+                               blocked=blocked,
+                               current_team=current_team,
+                               current_sort=sort_by,
+                               current_position=position_filter,
+                               display_teams=display_teams,
+                               current_round=draft.current_round,
+                               is_reverse_round=draft.is_reverse_round,
+                               clock=clock_payload(draft),
+                               clock_choices=PICK_CLOCK_CHOICES)
+
+    # Repeat views between picks are served without touching the database
+    page = response_cache.page('league_draft', [league_id, sort_by, position_filter],
+                               ['players', 'leagues', f'league:{league_id}'], render)
 
-    available_players = query.all()
-
-    # Get current team using snake draft logic
-    current_team_id = draft.get_current_team_id()
-    current_team = DraftTeam.query.get(current_team_id)
-
-    # Create draft order display
-    draft_order_ids = json.loads(draft.draft_order)
-    if draft.is_reverse_round:
-        display_order = list(reversed(draft_order_ids))
-    else:
-        display_order = draft_order_ids
-
-    # Get team objects in display order
-    display_teams = [DraftTeam.query.get(team_id) for team_id in display_order]
-
-    return render_template('league_draft.html',
-                           league=league,
-                           draft=draft,
-                           teams=teams,
-                           available_players=available_players,
-                           current_team=current_team,
-                           current_sort=sort_by,
-                           current_position=position_filter,
-                           display_teams=display_teams,
-                           current_round=draft.current_round,
-                           is_reverse_round=draft.is_reverse_round)
+    # Store current league in session
+    if isinstance(page, str):
+        session['current_league_id'] = league_id
+    return page
 
 
 @app.route('/leagues')
 def list_leagues():
     """List all leagues"""
-    leagues = League.query.order_by(League.created_at.desc()).all()
-    return render_template('leagues.html', leagues=leagues)
+    def render():
+        leagues = League.query.options(
+            selectinload(League.teams), selectinload(League.draft)
+        ).order_by(League.created_at.desc()).all()
+        return render_template('leagues.html', leagues=leagues)
+
+    return response_cache.page('list_leagues', [], ['leagues', 'picks'], render)
 
 
 @app.route('/join_league', methods=['GET', 'POST'])
@@ -693,11 +2625,20 @@ def index():
     # Show league selection or current league
     current_league_id = session.get('current_league_id')
     if current_league_id:
-        league = League.query.get(current_league_id)
-        if league:  # Check if league actually exists
-            teams = DraftTeam.query.filter_by(league_id=current_league_id).all()
+        def render():
+            league = League.query.get(current_league_id)
+            if not league:
+                return None
+            teams = DraftTeam.query.filter_by(league_id=current_league_id).options(
+                selectinload(DraftTeam.players)
+            ).all()
             draft = Draft.query.filter_by(league_id=current_league_id).first()
             return render_template('league_home.html', league=league, teams=teams, draft=draft)
+
+        page = response_cache.page('index', [current_league_id],
+                                   ['leagues', f'league:{current_league_id}'], render)
+        if page is not None:  # Check if league actually exists
+            return page
         else:
             # League doesn't exist anymore, clear session
             session.pop('current_league_id', None)
@@ -707,19 +2648,31 @@ def index():
 
 
 @app.route('/draft_player/<int:player_id>', methods=['POST'])
-def draft_player(player_id):
-    draft = Draft.query.first()
+@app.route('/league/<int:league_id>/draft_player/<int:player_id>', methods=['POST'])
+def draft_player(player_id, league_id=None):
+    if league_id:
+        draft = Draft.query.filter_by(league_id=league_id).first()
+        board_url = url_for('league_draft', league_id=league_id)
+    else:
+        draft = Draft.query.first()
+        board_url = url_for('draft')
 
     # Check if draft is locked
     if getattr(draft, 'is_locked', False):
         flash('Draft is currently locked. Wait for draft night!', 'error')
-        return redirect(url_for('draft'))
+        return redirect(board_url)
 
     if not draft or not draft.is_active:
         return jsonify({'error': 'No active draft'}), 400
 
+    # Cheap early out for a click made from a board that is already a pick behind
+    expected_pick = request.form.get('expected_pick', type=int)
+    if expected_pick and expected_pick != draft.current_pick:
+        flash('That pick has already been made - the board has moved on.', 'error')
+        return redirect(board_url)
+
     player = Player.query.get(player_id)
-    if not player or player.drafted:
+    if not player or league_picks(draft.league_id).filter_by(player_id=player_id).first():
         return jsonify({'error': 'Player not available'}), 400
 
     # Get current team using snake draft logic
@@ -727,21 +2680,342 @@ def draft_player(player_id):
     current_team = DraftTeam.query.get(current_team_id)
 
     # CHECK DRAFT CONSTRAINTS
-    can_draft, reason = current_team.can_draft_player(player)
+    can_draft, reason = roster_constraints.check(draft, current_team.id, player, draft.rules)
     if not can_draft:
         flash(f"Cannot draft {player.name}: {reason}", 'error')
-        return redirect(url_for('draft'))
+        return redirect(board_url)
+
+    # Draft the player and advance to the next pick in one atomic step
+    try:
+        commit_pick(draft, player, current_team)
+    except PickRejected as e:
+        flash(f"Cannot draft {player.name}: {str(e)}", 'error')
+        return redirect(board_url)
+
+    # Push the pick to everyone watching the draft
+    announce_pick(draft, player, current_team)
+
+    # Teams on auto-draft that are now on the clock pick straight away
+    try:
+        run_auto_draft(draft)
+    except PickRejected:
+        pass  # someone else's pick got in first; they will trigger it
+
+    return redirect(board_url)
+
 
-    # Draft the player
-    player.drafted = True
-    player.drafted_by = current_team.id
+# JSON board API
+BOARD_PAGE_SIZE = 50
 
-    # Advance to next pick
-    draft.advance_to_next_pick()
 
+@app.route('/undo_pick', methods=['POST'])
+@app.route('/league/<int:league_id>/undo_pick', methods=['POST'])
+def undo_pick(league_id=None):
+    """Commissioner undo: take back the latest pick and put that team back on the clock.
+
+    A league's own admin may undo its picks; the original single draft has no league
+    and needs the site admin.
+    """
+    if not (administers_league(league_id) if league_id else session.get('is_admin')):
+        return "Admin access required", 403
+
+    if league_id:
+        draft = Draft.query.filter_by(league_id=league_id).first_or_404()
+        board_url = url_for('league_draft', league_id=league_id)
+    else:
+        draft = Draft.query.first_or_404()
+        board_url = url_for('draft')
+
+    try:
+        undone = undo_last_pick(draft)
+    except PickRejected as e:
+        flash(f"Cannot undo: {str(e)}", 'error')
+        return redirect(board_url)
+
+    announce_undo(draft, undone)
+    flash(f"Pick #{undone[0]} was taken back.", 'success')
+    return redirect(board_url)
+
+
+@app.route('/pick_clock', methods=['POST'])
+@app.route('/league/<int:league_id>/pick_clock', methods=['POST'])
+def set_pick_clock(league_id=None):
+    """Commissioner control: start the pick clock at the given seconds per pick, or stop it (0)"""
+    if not (administers_league(league_id) if league_id else session.get('is_admin')):
+        return "Admin access required", 403
+
+    if league_id:
+        draft = Draft.query.filter_by(league_id=league_id).first_or_404()
+        board_url = url_for('league_draft', league_id=league_id)
+    else:
+        draft = Draft.query.first_or_404()
+        board_url = url_for('draft')
+
+    seconds = request.form.get('seconds', 0, type=int)
+    draft.pick_seconds = max(seconds, 0) or None
+    draft.pick_deadline = next_pick_deadline(draft)
     db.session.commit()
+    pick_clock.schedule(draft.id, draft.log_seq, draft.pick_deadline)
+    response_cache.bump(f'league:{draft.league_id}')
+    draft_events.publish('pick_clock', dict(clock_payload(draft), league_id=draft.league_id),
+                         league_id=draft.league_id)
 
-    return redirect(url_for('draft'))
+    flash(f"Pick clock set to {draft.pick_seconds} seconds." if draft.pick_seconds else "Pick clock stopped.",
+          'success')
+    return redirect(board_url)
+
+
+@app.route('/league/<int:league_id>/auto_pick', methods=['POST'])
+def league_auto_pick(league_id):
+    """Commissioner fast-forward: auto-pick the next N picks (or the rest of the draft),
+    whether or not those teams are on auto-draft"""
+    if not administers_league(league_id):
+        return "Admin access required", 403
+
+    draft = Draft.query.filter_by(league_id=league_id).first_or_404()
+    board_url = url_for('league_draft', league_id=league_id)
+    requested = request.form.get('picks', '1')
+    if requested == 'all':
+        max_picks = None
+    else:
+        try:
+            max_picks = max(1, int(requested))
+        except ValueError:
+            flash('Number of picks must be a whole number or "all".', 'error')
+            return redirect(board_url)
+
+    try:
+        picks = run_auto_draft(draft, max_picks, auto_only=False)
+    except PickRejected:
+        flash('The board moved on while auto-picking - try again.', 'error')
+        return redirect(board_url)
+
+    flash(f"Auto-picked {len(picks)} player{'s' if len(picks) != 1 else ''}.", 'success')
+    return redirect(board_url)
+
+
+@app.route('/api/available_players')
+@app.route('/api/league/<int:league_id>/available_players')
+def available_players(league_id=None):
+    """One page of a league's undrafted players as JSON.
+
+    Query args: sort, position, q (name or club search), after (the previous page's
+    'next' cursor) and limit. The ETag only changes when the league's draft moves on
+    (a pick or an undo) or players are re-imported, so boards revalidating between
+    picks get a 304.
+    """
+    if league_id:
+        draft = Draft.query.filter_by(league_id=league_id).first()
+    else:
+        draft = Draft.query.first()
+        league_id = draft.league_id if draft else None
+
+    players_version, = response_cache.backend.versions(['players'])
+    log_seq = draft.log_seq if draft else 0
+    etag = f"{league_id}-{draft.id if draft else 0}-{log_seq}-{players_version}"
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        try:
+            page, next_cursor = board_index.page(
+                draft, league_id,
+                sort_by=request.args.get('sort', 'total_points'),
+                position=request.args.get('position', 'all'),
+                search=request.args.get('q', '').strip(),
+                after=request.args.get('after', type=int),
+                limit=min(max(request.args.get('limit', BOARD_PAGE_SIZE, type=int), 1), 200)
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        response = jsonify({
+            'players': [player.to_dict() for player in page],
+            'next': next_cursor,
+            'current_pick': draft.current_pick if draft else None
+        })
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+@app.route('/api/search')
+@app.route('/api/league/<int:league_id>/search')
+def search_players(league_id=None):
+    """Undrafted players matching a search-as-you-type query, best match first, as JSON.
+
+    Query args: q, position and limit (up to 50).
+    """
+    if league_id:
+        draft = Draft.query.filter_by(league_id=league_id).first()
+    else:
+        draft = Draft.query.first()
+        league_id = draft.league_id if draft else None
+
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    matches = player_search.search(request.args.get('q', ''),
+                                   exclude=board_index.drafted_ids(draft, league_id),
+                                   position=request.args.get('position', 'all'),
+                                   limit=limit)
+    return jsonify({
+        'players': [dict(player.to_dict(), score=score) for player, score in matches],
+        'current_pick': draft.current_pick if draft else None
+    })
+
+
+# Mock drafts
+# Odds that players are still on the board at a team's next picks, from Monte Carlo
+# runs of the rest of the draft (see mock_draft.py). Requests run in-process by
+# default: forking a process pool from a threaded web worker can deadlock the child,
+# and 2000 simulations take well under a second on one core. MOCK_DRAFT_WORKERS > 1
+# runs larger requests on a spawned pool of that many processes instead.
+MOCK_DRAFT_SIMULATIONS = 2000
+MOCK_DRAFT_HORIZON = 3  # future picks reported
+MOCK_DRAFT_DEPTH = 20  # candidates per position beyond those the draft can reach
+MOCK_DRAFT_WORKERS = max(int(os.environ.get('MOCK_DRAFT_WORKERS', 1)), 1)
+
+
+def mock_draft_state(draft, team_id, horizon=MOCK_DRAFT_HORIZON, include_ids=()):
+    """A MockDraftState for the rest of a draft, with its candidate players and target pick numbers.
+
+    Candidates are the best available players by draft score at each position, as
+    deep as the picks up to the team's last target pick could go, plus include_ids.
+    """
+    import mock_draft
+
+    rules = draft.rules
+    schedule = draft.schedule
+    remaining = schedule.teams[draft.current_pick - 1:]
+    target_steps = [step for step, pick_team in enumerate(remaining) if pick_team == team_id][:horizon]
+    if not target_steps:
+        return None, [], []
+
+    team_ids = sorted(set(schedule.teams))
+    counts = roster_constraints.counts(draft)
+    team_counters = [counts.get(t, RosterConstraints.new_counters()) for t in team_ids]
+    positions = list(rules['positions'])
+
+    candidates = []
+    for position in positions:
+        open_slots = sum(max(rules['positions'][position] - counters['positions'].get(position, 0), 0)
+                         for counters in team_counters)
+        ranked = board_index.available(draft, draft.league_id, sort_by='draft_score', position=position)
+        candidates.extend(ranked[:min(open_slots, target_steps[-1] + 1) + MOCK_DRAFT_DEPTH])
+    chosen = {player.id for player in candidates}
+    candidates.extend(player for player in board_index.available(draft, draft.league_id)
+                      if player.id in include_ids and player.id not in chosen and player.position in positions)
+
+    clubs = sorted({player.team for player in candidates})
+    club_codes = {club: i for i, club in enumerate(clubs)}
+    state = mock_draft.MockDraftState(
+        scores=[player.draft_score or 0.0 for player in candidates],
+        positions=[positions.index(player.position) for player in candidates],
+        clubs=[club_codes[player.team] for player in candidates],
+        pick_teams=[team_ids.index(pick_team) for pick_team in remaining[:target_steps[-1] + 1]],
+        position_counts=[[counters['positions'].get(position, 0) for position in positions]
+                         for counters in team_counters],
+        club_counts=[[counters['clubs'].get(club, 0) for club in clubs] for counters in team_counters],
+        position_limits=[rules['positions'][position] for position in positions],
+        max_per_club=rules['max_per_club'],
+        target_steps=target_steps
+    )
+    return state, candidates, [draft.current_pick + step for step in target_steps]
+
+
+@app.route('/team/<int:team_id>/mock_draft')
+def team_mock_draft(team_id):
+    """Availability odds for players at the team's next picks as JSON.
+
+    Query args: simulations (100-20000) and horizon (future picks, up to 10). Players
+    missing from 'odds' were too far down the board to be reached - treat them as
+    available.
+    """
+    if not session.get(f'team_{team_id}_access') and not session.get('is_admin'):
+        return jsonify({'error': 'Access denied'}), 403
+
+    import mock_draft
+
+    team = DraftTeam.query.get_or_404(team_id)
+    draft = Draft.query.filter_by(league_id=team.league_id).first()
+    if not draft:
+        return jsonify({'error': 'This league has no draft yet'}), 404
+
+    simulations = min(max(request.args.get('simulations', MOCK_DRAFT_SIMULATIONS, type=int), 100), 20000)
+    horizon = min(max(request.args.get('horizon', MOCK_DRAFT_HORIZON, type=int), 1), 10)
+    wishlist_ids = {player_id for (player_id,) in
+                    Wishlist.query.filter_by(team_id=team_id).with_entities(Wishlist.player_id)}
+
+    state, candidates, picks = mock_draft_state(draft, team_id, horizon, include_ids=wishlist_ids)
+    odds = mock_draft.availability(state, simulations, workers=MOCK_DRAFT_WORKERS) if state else []
+
+    return jsonify({
+        'simulations': simulations,
+        'current_pick': draft.current_pick,
+        'picks': [{
+            'pick': pick,
+            'round': draft.schedule.round_for(pick),
+            'odds': {str(player.id): round(float(p), 3) for player, p in zip(candidates, row)}
+        } for pick, row in zip(picks, odds)]
+    })
+
+
+# Lineups
+# Recommended starting XIs, solved by lineup.py for any number of squads in one pass.
+# Projections are points per game scaled by injury status.
+def recommended_lineups(league_id=None, all_leagues=False):
+    """Best XI for every squad in a league, or (all_leagues) every squad with a pick,
+    from one query and one solver pass; see solve_lineups"""
+    rows = db.session.query(DraftPick).join(Player, Player.id == DraftPick.player_id).with_entities(
+        DraftPick.team_id, Player.id, Player.position, Player.points_per_game, Player.status)
+    if not all_leagues:
+        rows = rows.filter(DraftPick.league_id == league_id)
+    return solve_lineups(rows)
+
+
+def solve_lineups(rows):
+    """{team id: {'formation', 'projected', 'starters', 'bench'}} from drafted players as
+    (team id, player id, position, points per game, status) rows.
+
+    starters and bench are player ids - starters by position then projection, bench
+    with any spare keeper first. Squads that cannot field a legal XI yet get formation
+    None and no starters.
+    """
+    import lineup
+
+    rows = [row for row in rows if row[2] in lineup.POSITIONS]
+    if not rows:
+        return {}
+
+    team_list = sorted({row[0] for row in rows})
+    team_index = {team_id: i for i, team_id in enumerate(team_list)}
+    teams = [team_index[row[0]] for row in rows]
+    positions = [lineup.POSITIONS.index(row[2]) for row in rows]
+    scores = lineup.projected_points([row[3] for row in rows], [row[4] for row in rows])
+    table, choice, starter, total = lineup.best_lineups(teams, positions, scores, len(team_list))
+
+    squads = {team_id: {'starters': [], 'bench': []} for team_id in team_list}
+    for (team_id, player_id, _, _, _), position, score, starts in zip(rows, positions, scores, starter):
+        squads[team_id]['starters' if starts else 'bench'].append((position, -score, player_id))
+
+    lineups = {}
+    for team_id, i in team_index.items():
+        starters = sorted(squads[team_id]['starters'])
+        bench = sorted(squads[team_id]['bench'], key=lambda entry: (entry[0] != 0, entry[1], entry[2]))
+        lineups[team_id] = {
+            'formation': lineup.formation_name(table[choice[i]]) if choice[i] >= 0 else None,
+            'projected': round(float(total[i]), 2) if choice[i] >= 0 else None,
+            'starters': [player_id for _, _, player_id in starters],
+            'bench': [player_id for _, _, player_id in bench]
+        }
+    return lineups
+
+
+@app.route('/api/league/<int:league_id>/lineups')
+def league_lineups(league_id):
+    """Recommended XI for every team in a league as JSON"""
+    League.query.get_or_404(league_id)
+    return jsonify({str(team_id): lineup for team_id, lineup in recommended_lineups(league_id).items()})
 
 
 @app.route('/team/access/<token>')
@@ -758,67 +3032,63 @@ def team_access(token):
 def view_team(team_id):
     team = DraftTeam.query.get_or_404(team_id)
     roster = team.get_roster()
-    draft = Draft.query.first()
-    return render_template('team.html', team=team, roster=roster, draft=draft)
+    draft = Draft.query.filter_by(league_id=team.league_id).first()
+
+    # Best XI from the drafted squad, with the players looked up from the roster
+    players = {player.id: player for group in roster.values() for player in group}
+    best = solve_lineups([(team.id, player.id, player.position, player.points_per_game, player.status)
+                          for player in players.values()]).get(team.id)
+    if best:
+        best = dict(best, starters=[players[player_id] for player_id in best['starters']],
+                    bench=[players[player_id] for player_id in best['bench']])
+    return render_template('team.html', team=team, roster=roster, draft=draft, lineup=best)
 
 
 @app.route('/team/<int:team_id>/wishlist')
 def team_wishlist(team_id):
-    team = DraftTeam.query.get_or_404(team_id)
-
     # Check if user has access (either admin or has the token)
     if not session.get(f'team_{team_id}_access') and not session.get('is_admin'):
+        DraftTeam.query.get_or_404(team_id)
         return "Access denied. Please use your team's secret link.", 403
 
     # Get sorting and filtering preferences from URL parameters
     sort_by = request.args.get('sort', 'total_points')
     position_filter = request.args.get('position', 'all')
 
-    # Get wishlist items ordered by rank
-    wishlist = Wishlist.query.filter_by(team_id=team_id).order_by(Wishlist.rank).all()
-
-    # Get available players for adding to wishlist
-    wishlisted_player_ids = [w.player_id for w in wishlist]
-
-    # Build query for available players
-    query = Player.query.filter(Player.drafted == False)
-
-    # Exclude already wishlisted players
-    if wishlisted_player_ids:
-        query = query.filter(~Player.id.in_(wishlisted_player_ids))
-
-    # Apply position filter
-    if position_filter != 'all':
-        query = query.filter_by(position=position_filter)
-
-    # Apply sorting
-    from sqlalchemy import desc, nullslast
-
-    if sort_by == 'name':
-        query = query.order_by(Player.second_name)
-    elif sort_by == 'total_points':
-        query = query.order_by(nullslast(desc(Player.total_points)))
-    elif sort_by == 'points_per_game':
-        query = query.order_by(nullslast(desc(Player.points_per_game)))
-    elif sort_by == 'now_cost':
-        query = query.order_by(nullslast(desc(Player.now_cost)))
-    elif sort_by == 'goals_scored':
-        query = query.order_by(nullslast(desc(Player.goals_scored)))
-    elif sort_by == 'assists':
-        query = query.order_by(nullslast(desc(Player.assists)))
-    elif sort_by == 'minutes':
-        query = query.order_by(nullslast(desc(Player.minutes)))
-    else:
-        query = query.order_by(nullslast(desc(Player.total_points)))
+    league_scope, loaded_team = team_league_scope(team_id)
+    if league_scope is None:
+        abort(404)
 
-    available_players = query.all()
+    def render():
+        team = loaded_team or DraftTeam.query.get_or_404(team_id)
 
-    return render_template('wishlist.html',
-                           team=team,
-                           wishlist=wishlist,
-                           available_players=available_players,
-                           current_sort=sort_by,
-                           current_position=position_filter)
+        # Get wishlist items ordered by rank
+        wishlist = Wishlist.query.filter_by(team_id=team_id).options(
+            joinedload(Wishlist.player)
+        ).order_by(Wishlist.rank).all()
+
+        wishlisted_player_ids = [w.player_id for w in wishlist]
+
+        # Wishlisted players already taken in this team's league
+        drafted_ids = {pick.player_id for pick in league_picks(team.league_id).filter(
+            DraftPick.player_id.in_(wishlisted_player_ids)
+        )} if wishlisted_player_ids else set()
+
+        # Players to add are paged in from the JSON API, minus those already wishlisted
+        draft = Draft.query.filter_by(league_id=team.league_id).first()
+
+        return render_template('wishlist.html',
+                               team=team,
+                               wishlist=wishlist,
+                               drafted_ids=drafted_ids,
+                               blocked=roster_constraints.blocked(draft, team.id, draft.rules) if draft else None,
+                               picks_until=draft.schedule.picks_until(team.id, draft.current_pick) if draft else None,
+                               current_sort=sort_by,
+                               current_position=position_filter)
+
+    # The page changes with the team's wishlist, its league's picks and player data
+    return response_cache.page('team_wishlist', [team_id, sort_by, position_filter],
+                               ['players', 'leagues', league_scope, f'team:{team_id}'], render)
 
 
 @app.route('/team/<int:team_id>/wishlist/add/<int:player_id>', methods=['POST'])
@@ -838,47 +3108,64 @@ def add_to_wishlist(team_id, player_id):
     wishlist_item = Wishlist(
         team_id=team_id,
         player_id=player_id,
-        rank=max_rank + 1
+        rank=max_rank + RANK_GAP
     )
     db.session.add(wishlist_item)
     db.session.commit()
+    response_cache.bump(f'team:{team_id}')
 
     return redirect(url_for('team_wishlist', team_id=team_id))
 
 
 @app.route('/team/<int:team_id>/wishlist/remove/<int:player_id>', methods=['POST'])
 def remove_from_wishlist(team_id, player_id):
-    wishlist_item = Wishlist.query.filter_by(team_id=team_id, player_id=player_id).first_or_404()
+    # Ranks only need to stay in order, so the entries below keep theirs - one DELETE
+    removed = Wishlist.query.filter_by(team_id=team_id, player_id=player_id).delete()
+    if not removed:
+        abort(404)
 
-    # Get items that need to move up in rank
-    items_to_update = Wishlist.query.filter(
-        Wishlist.team_id == team_id,
-        Wishlist.rank > wishlist_item.rank
-    ).all()
+    db.session.commit()
+    response_cache.bump(f'team:{team_id}')
+    return redirect(url_for('team_wishlist', team_id=team_id))
 
-    # Remove the item
-    db.session.delete(wishlist_item)
 
-    # Update ranks
-    for item in items_to_update:
-        item.rank -= 1
+@app.route('/team/<int:team_id>/auto_draft', methods=['POST'])
+def toggle_auto_draft(team_id):
+    """Switch a team's auto-draft on or off; switching on while on the clock picks at once"""
+    if not session.get(f'team_{team_id}_access') and not session.get('is_admin'):
+        return "Access denied. Please use your team's secret link.", 403
 
+    team = DraftTeam.query.get_or_404(team_id)
+    team.auto_draft = not team.auto_draft
     db.session.commit()
+    response_cache.bump(f'team:{team_id}')
+
+    draft = Draft.query.filter_by(league_id=team.league_id).first()
+    if team.auto_draft and draft and not draft.is_locked and draft.get_current_team_id() == team.id:
+        try:
+            run_auto_draft(draft)
+        except PickRejected:
+            pass  # a manual pick got in first; the next pick triggers it again
+
     return redirect(url_for('team_wishlist', team_id=team_id))
 
 
 @app.route('/team/<int:team_id>/wishlist/reorder', methods=['POST'])
 def reorder_wishlist(team_id):
-    """Update wishlist order via drag and drop"""
-    new_order = request.json.get('order', [])
+    """Update wishlist order via drag and drop.
+
+    Takes either a single move ({'move': player_id, 'before': player_id or null}), which
+    costs the same however long the list is, or a full {'order': [player_ids]}.
+    """
+    data = request.json or {}
 
-    for index, player_id in enumerate(new_order):
-        Wishlist.query.filter_by(
-            team_id=team_id,
-            player_id=player_id
-        ).update({'rank': index + 1})
+    if 'move' in data:
+        move_wishlist_item(team_id, data['move'], data.get('before'))
+    else:
+        respace_wishlist(team_id, data.get('order', []))
 
     db.session.commit()
+    response_cache.bump(f'team:{team_id}')
     return jsonify({'success': True})
 
 
@@ -899,28 +3186,25 @@ def import_excel():
         if file.filename == '':
             return render_template('import_excel.html', error='No file selected')
 
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            return render_template('import_excel.html', error='Please upload an Excel file')
+        filename = secure_filename(file.filename)
+        if player_file_format(filename) not in ALLOWED_EXTENSIONS:
+            return render_template('import_excel.html', error='Please upload an Excel, CSV or JSON Lines file')
 
-        filepath = None
+        # Chunk progress goes to the upload page over socket.io while the POST is running
+        import_id = request.form.get('import_id')
 
-        try:
-            # Save the file temporarily
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-
-            # Import the data
-            result = import_fpl_excel(filepath)
-
-            # Clean up
-            os.remove(filepath)
+        def report_progress(progress):
+            app.logger.info(f"Import {filename}: {progress['total_processed']} rows in {progress['chunks']} chunks")
+            if import_id:
+                socketio.emit('import_progress', progress, to=f'import_{import_id}')
 
+        try:
+            # Stream straight from the upload - nothing is saved to disk
+            result = import_player_stream(file.stream, filename, progress=report_progress)
             return render_template('import_excel.html', success=True, **result)
 
         except Exception as e:
-            if filepath and os.path.exists(filepath):
-                os.remove(filepath)
+            db.session.rollback()
             return render_template('import_excel.html', error=f'Error: {str(e)}')
 
     # GET request
@@ -930,141 +3214,79 @@ def import_excel():
 
 def import_fpl_excel(filepath):
     """Import FPL data from Excel file - handles both old and new formats"""
-    imported = 0
-    updated = 0
-    errors = []
-
     try:
-        # Read the Excel file
-        df = pd.read_excel(filepath, sheet_name='Player Data')
-
-        # Map FPL positions to our positions
-        position_map = {
-            'GKP': 'GK',
-            'GK': 'GK',
-            'DEF': 'DEF',
-            'Def': 'DEF',
-            'MID': 'MID',
-            'Mid': 'MID',
-            'FWD': 'FWD',
-            'For': 'FWD',
-            'FW': 'FWD'
-        }
+        with open(filepath, 'rb') as stream:
+            return import_player_stream(stream, filepath)
 
-        for idx, row in df.iterrows():
-            try:
-                # Get position
-                pos = row.get('position', '').strip()
-                position = position_map.get(pos, pos.upper())
+    except Exception as e:
+        raise Exception(f"Failed to read Excel file: {str(e)}")
 
-                if position not in ['GK', 'DEF', 'MID', 'FWD']:
-                    errors.append(f"Row {idx + 2}: Unknown position '{pos}'")
-                    continue
 
-                # Handle name fields - new format has full_name, old format has first_name/second_name
-                if 'full_name' in row and pd.notna(row['full_name']):
-                    # New format - split full_name
-                    full_name = str(row['full_name']).strip()
-                    name_parts = full_name.split()
-
-                    if len(name_parts) >= 2:
-                        first_name = ' '.join(name_parts[:-1])  # Everything except last word
-                        second_name = name_parts[-1]  # Last word
-                    else:
-                        first_name = ''
-                        second_name = full_name
-
-                    web_name = second_name  # Use last name as display name
-                else:
-                    # Old format
-                    first_name = str(row.get('first_name', '')).strip()
-                    second_name = str(row.get('second_name', '')).strip()
-                    full_name = f"{first_name} {second_name}".strip()
-                    web_name = second_name
-
-                # Check if player exists
-                existing = Player.query.filter_by(
-                    second_name=second_name,
-                    team=row.get('team', '').strip()
-                ).first()
-
-                if existing:
-                    # Update existing player
-                    for field in ['total_points', 'points_per_game', 'minutes', 'goals_scored',
-                                  'assists', 'clean_sheets', 'goals_conceded', 'yellow_cards',
-                                  'red_cards', 'saves', 'bonus', 'bps', 'influence', 'creativity',
-                                  'threat', 'ict_index', 'expected_goals', 'expected_assists',
-                                  'expected_goal_involvements', 'expected_goals_conceded',
-                                  'expected_goals_per_90', 'expected_assists_per_90',
-                                  'saves_per_90', 'clean_sheets_per_90', 'starts']:
-                        if field in row and pd.notna(row[field]):
-                            setattr(existing, field, row[field])
-
-                    # Update price field (might be 'now_cost' or 'price')
-                    if 'price' in row and pd.notna(row['price']):
-                        existing.now_cost = float(row['price'])
-                    elif 'now_cost' in row and pd.notna(row['now_cost']):
-                        existing.now_cost = float(row['now_cost'])
-
-                    existing.position = position
-                    existing.status = row.get('status', 'Available')
-                    existing.full_name = full_name
-                    existing.first_name = first_name
-                    existing.web_name = web_name
-                    updated += 1
-                else:
-                    # Create new player
-                    player = Player(
-                        first_name=first_name,
-                        second_name=second_name,
-                        full_name=full_name,
-                        web_name=web_name,
-                        team=row.get('team', '').strip(),
-                        position=position,
-                        status=row.get('status', 'Available'),
-                        drafted=False
-                    )
-
-                    # Add all numeric fields
-                    for field in ['total_points', 'points_per_game', 'minutes', 'goals_scored',
-                                  'assists', 'clean_sheets', 'goals_conceded', 'own_goals',
-                                  'penalties_saved', 'penalties_missed', 'yellow_cards',
-                                  'red_cards', 'saves', 'bonus', 'influence', 'creativity',
-                                  'threat', 'ict_index', 'starts']:
-                        if field in row and pd.notna(row[field]):
-                            setattr(player, field, row[field])
-
-                    # Handle price field
-                    if 'price' in row and pd.notna(row['price']):
-                        player.now_cost = float(row['price'])
-                    elif 'now_cost' in row and pd.notna(row['now_cost']):
-                        player.now_cost = float(row['now_cost'])
-
-                    # Handle BPS field if it exists
-                    if 'bps' in row and pd.notna(row['bps']):
-                        player.bps = int(row['bps'])
-                    elif 'bonus' in row and pd.notna(row['bonus']):
-                        # If no bps but has bonus, estimate bps
-                        player.bps = int(row['bonus']) * 3
-
-                    db.session.add(player)
-                    imported += 1
+def player_file_format(filename):
+    """File format of a player upload, looking through a .gz suffix"""
+    filename = filename.lower()
+    if filename.endswith('.gz'):
+        filename = filename[:-3]
+    return filename.rsplit('.', 1)[-1] if '.' in filename else ''
 
-            except Exception as e:
-                errors.append(f"Row {idx + 2}: {str(e)}")
-                continue
 
-        db.session.commit()
+def refresh_search_text(conn):
+    """Recompute Player.search_text where names or club changed, in one executemany"""
+    table = Player.__table__
+    rows = conn.execute(select(table.c.id, table.c.full_name, table.c.web_name, table.c.second_name,
+                               table.c.team, table.c.search_text)).all()
+    changes = [{'player_id': row.id, 'folded': fold_search_text(*row[1:5])} for row in rows]
+    changes = [change for change, row in zip(changes, rows) if change['folded'] != row.search_text]
+    if changes:
+        conn.execute(table.update().where(table.c.id == bindparam('player_id')).values(
+            search_text=bindparam('folded')), changes)
 
-        return {
-            'imported': imported,
-            'updated': updated,
-            'errors': errors[:10],
-            'total_processed': len(df)
-        }
 
-    except Exception as e:
-        raise Exception(f"Failed to read Excel file: {str(e)}")
+VALUATION_DEFAULT_TEAMS = 10  # replacement depth before any league exists
+
+
+def valuation_slots(conn):
+    """Players drafted per position across the largest league - the VORP replacement depth"""
+    league_sizes = select(func.count(DraftTeam.id).label('teams')).group_by(DraftTeam.league_id).subquery()
+    teams = conn.execute(select(func.max(league_sizes.c.teams))).scalar() or VALUATION_DEFAULT_TEAMS
+    return {position: teams * limit for position, limit in DEFAULT_ROSTER_RULES['positions'].items()}
+
+
+def import_player_stream(stream, filename, progress=None):
+    """Import a player file chunk by chunk, committing each chunk in its own transaction.
+
+    progress, if given, is called after every chunk with the running totals.
+    """
+    import player_data  # pandas and openpyxl load here, on the first import, not at boot
+
+    file_format = player_file_format(filename)
+    if filename.lower().endswith('.gz'):
+        stream = gzip.GzipFile(fileobj=stream)
+
+    header_rows = 0 if file_format in ('json', 'jsonl') else 1
+    totals = {'imported': 0, 'updated': 0, 'errors': [], 'total_processed': 0, 'chunks': 0}
+
+    try:
+        for chunk in player_data.iter_player_chunks(stream, file_format):
+            result = player_data.upsert_player_frame(db.session, Player.__table__, chunk,
+                                                     first_row=totals['total_processed'] + header_rows + 1)
+            totals['imported'] += result['imported']
+            totals['updated'] += result['updated']
+            totals['errors'].extend(result['errors'][:10 - len(totals['errors'])])
+            totals['total_processed'] += result['total_processed']
+            totals['chunks'] += 1
+            if progress:
+                progress(dict(totals))
+
+        player_data.value_players(db.session, Player.__table__, valuation_slots(db.session))
+        refresh_search_text(db.session)
+        db.session.commit()
+    finally:
+        # Committed chunks change the board, even if a later chunk failed
+        board_index.invalidate()
+        response_cache.bump('players')
+
+    return totals
 
 
 # Admin routes
@@ -1119,7 +3341,14 @@ def admin_database():
 def admin_players():
     """View all players in a table format"""
     players = Player.query.all()
-    return render_template('admin_players.html', players=players)
+
+    # Which teams (across all leagues) have drafted each player
+    drafted_by = {}
+    for player_id, team_name in db.session.query(DraftPick.player_id, DraftTeam.name).join(
+            DraftTeam, DraftTeam.id == DraftPick.team_id):
+        drafted_by.setdefault(player_id, []).append(team_name)
+
+    return render_template('admin_players.html', players=players, drafted_by=drafted_by)
 
 
 @app.route('/admin/team_links')
@@ -1138,39 +3367,181 @@ def admin_team_links():
 
 @app.route('/admin/export_db')
 def export_database():
-    """Export entire database as JSON for backup"""
-    try:
-        data = {
-            'players': [p.to_dict() for p in Player.query.all()],
-            'teams': [{
-                'id': t.id,
-                'name': t.name,
-                'owner': t.owner,
-                'access_token': t.access_token,
-                'players': [p.name for p in t.players]
-            } for t in DraftTeam.query.all()],
-            'wishlists': [{
-                'team_name': w.team.name,
-                'player_name': w.player.name,
-                'rank': w.rank
-            } for w in Wishlist.query.all()],
-            'draft': []
-        }
+    """Stream a snapshot of every table as NDJSON for backup (?gzip=1 to compress)"""
+    filename = f"fantasy_draft-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson"
+    lines = (line.encode('utf-8') for line in iter_snapshot_lines())
+    mimetype = 'application/x-ndjson'
 
-        draft = Draft.query.first()
-        if draft:
-            data['draft'] = {
-                'current_pick': draft.current_pick,
-                'current_team_index': draft.current_team_index,
-                'is_active': draft.is_active,
-                'current_round': draft.current_round,
-                'is_snake_draft': draft.is_snake_draft
-            }
+    if request.args.get('gzip'):
+        lines = gzip_chunks(lines)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    return Response(stream_with_context(lines), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
 
-        return jsonify(data)
 
+@app.route('/admin/metrics')
+def admin_metrics():
+    """Per-endpoint latency percentiles and query stats for this worker, as JSON.
+
+    ?profiles=1 returns the slowest sampled cProfile reports as plain text instead.
+    """
+    if not session.get('is_admin'):
+        return "Admin access required", 403
+
+    if request.args.get('profiles'):
+        reports = request_metrics.profile_reports()
+        if not reports:
+            return Response('No profiled requests yet - set PROFILE_SAMPLE_RATE to enable profiling\n',
+                            mimetype='text/plain')
+        text = '\n'.join(f'=== {ms:.1f} ms  {endpoint}  {path}\n{report}' for ms, endpoint, path, report in reports)
+        return Response(text, mimetype='text/plain')
+
+    return jsonify(dict(request_metrics.report(), database=db_health.report(), pick_clock=pick_clock.stats(),
+                        pid=os.getpid()))
+
+
+@app.route('/admin/restore_db', methods=['POST'])
+def restore_database():
+    """Replace every table with the contents of an uploaded snapshot"""
+    if not session.get('is_admin'):
+        return "Admin access required", 403
+
+    file = request.files.get('file')
+    if not file or not file.filename:
+        return "No snapshot file selected", 400
+
+    try:
+        counts = restore_snapshot(snapshot_lines(file.stream, file.filename))
     except Exception as e:
-        return jsonify({'error': str(e)})
+        db.session.rollback()
+        app.logger.error(f"Snapshot restore failed: {str(e)}")
+        return f"Restore failed, nothing was changed: {str(e)}", 400
+
+    restored = ''.join(f'<li>{table}: {count} rows</li>' for table, count in counts.items())
+    return f"""
+    <h2>✅ Database Restored!</h2>
+    <ul>{restored}</ul>
+    <p><a href="/">Go to Home</a></p>
+    <p><a href="/admin/database">View Database Info</a></p>
+    """
+
+
+# Database snapshots
+# One header line, then per table a {"table", "columns"} line followed by one JSON array
+# per row. Rows are raw column values (ids included), read with a server-side cursor in
+# SNAPSHOT_BATCH_SIZE batches, so an export holds one batch in memory whatever the size.
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH_SIZE = 1000
+
+
+def snapshot_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def iter_snapshot_lines():
+    tables = db.metadata.sorted_tables  # parents before children, so restore can insert in order
+    yield json.dumps({'snapshot': SNAPSHOT_VERSION, 'created_at': datetime.utcnow().isoformat(),
+                      'tables': [table.name for table in tables]}) + '\n'
+
+    for table in tables:
+        columns = [column.name for column in table.columns]
+        yield json.dumps({'table': table.name, 'columns': columns}) + '\n'
+
+        rows = db.session.execute(
+            table.select().order_by(*table.primary_key.columns),
+            execution_options={'yield_per': SNAPSHOT_BATCH_SIZE}
+        )
+        for row in rows:
+            yield json.dumps([snapshot_value(value) for value in row]) + '\n'
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of byte chunks as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def snapshot_lines(stream, filename):
+    """Decoded lines of a snapshot file, gunzipping .gz files on the fly"""
+    if filename.lower().endswith('.gz'):
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding='utf-8')
+
+
+def restore_snapshot(lines):
+    """Load a snapshot written by iter_snapshot_lines, replacing all current data.
+
+    Rows go in with one executemany per SNAPSHOT_BATCH_SIZE rows, and the whole restore
+    is a single transaction: a bad file leaves the database as it was.
+    Returns the number of rows restored per table.
+    """
+    lines = iter(lines)
+    header = json.loads(next(lines, 'null') or 'null')
+    if not isinstance(header, dict) or header.get('snapshot') != SNAPSHOT_VERSION:
+        raise ValueError('Not a database snapshot from this app')
+
+    tables = db.metadata.tables
+    for table in reversed(db.metadata.sorted_tables):
+        db.session.execute(table.delete())
+
+    counts = {}
+    table, columns, batch = None, None, []
+
+    def flush():
+        if batch:
+            db.session.execute(table.insert(), batch)
+            batch.clear()
+
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+
+        if isinstance(record, dict):
+            flush()
+            if record['table'] not in tables:
+                raise ValueError(f"Unknown table {record['table']}")
+            table = tables[record['table']]
+            columns = [table.columns[name] for name in record['columns'] if name in table.columns]
+            counts[table.name] = 0
+            continue
+
+        if table is None:
+            raise ValueError('Snapshot row appears before any table header')
+        row = {}
+        for column, value in zip(columns, record):
+            if value is not None and isinstance(column.type, db.DateTime):
+                value = datetime.fromisoformat(value)
+            row[column.name] = value
+        batch.append(row)
+        counts[table.name] += 1
+        if len(batch) >= SNAPSHOT_BATCH_SIZE:
+            flush()
+    flush()
+
+    # Explicit ids leave Postgres sequences behind; move them past the restored rows
+    if db.engine.dialect.name == 'postgresql':
+        for table in db.metadata.sorted_tables:
+            if 'id' in table.columns:
+                db.session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                    f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+                ))
+
+    db.session.commit()
+    # Restored drafts can carry the same (draft id, log seq) as the ones they replaced,
+    # so the version tags alone would keep serving the old picks
+    board_index.invalidate()
+    roster_constraints.invalidate()
+    pick_clock.reload()
+    response_cache.bump('players', 'leagues', 'picks')
+    return counts
 
 
 @app.route('/admin/reset_database')
@@ -1192,6 +3563,8 @@ def reset_database():
         db.drop_all()
         # Recreate all tables
         db.create_all()
+        board_index.invalidate()
+        response_cache.bump('players', 'leagues', 'picks')
         return """
         <h2>✅ Database Reset Complete!</h2>
         <p>All tables have been recreated with the new schema.</p>
@@ -1212,7 +3585,12 @@ def toggle_draft_lock():
     draft = Draft.query.first()
     if draft:
         draft.is_locked = not getattr(draft, 'is_locked', False)
+        if draft.pick_seconds:
+            # The clock stops while locked and restarts in full on unlock
+            draft.pick_deadline = None if draft.is_locked else next_pick_deadline(draft)
         db.session.commit()
+        pick_clock.schedule(draft.id, draft.log_seq, draft.pick_deadline)
+        response_cache.bump(f'league:{draft.league_id}')
         status = "locked" if draft.is_locked else "unlocked"
         return f"Draft is now {status}"
     return "No draft found"
@@ -1225,6 +3603,7 @@ def init_database():
     """Manual database initialization - normally happens automatically on startup"""
     try:
         init_and_migrate_db()
+        response_cache.bump('players', 'leagues', 'picks')
         return """
         <h2>✅ Database Re-Initialized!</h2>
         <p>All tables have been checked and migrations applied successfully.</p>
@@ -1247,32 +3626,8 @@ def debug_excel():
         if not os.path.exists(filepath):
             return "No Excel file found. Please upload it first."
 
-        # Read Excel file
-        df = pd.read_excel(filepath, sheet_name='Player Data')
-
-        # Get info about the dataframe
-        info = {
-            'columns': df.columns.tolist(),
-            'shape': f"{len(df)} rows, {len(df.columns)} columns",
-            'first_row': df.iloc[0].to_dict() if len(df) > 0 else {},
-            'sample_data': []
-        }
-
-        # Get sample of first 3 players
-        for i in range(min(3, len(df))):
-            player_data = df.iloc[i].to_dict()
-            # Convert numpy types to Python types for JSON serialization
-            clean_data = {}
-            for k, v in player_data.items():
-                if pd.isna(v):
-                    clean_data[k] = None
-                elif isinstance(v, (np.integer, np.int64)):
-                    clean_data[k] = int(v)
-                elif isinstance(v, (np.floating, np.float64)):
-                    clean_data[k] = float(v)
-                else:
-                    clean_data[k] = str(v)
-            info['sample_data'].append(clean_data)
+        import player_data
+        info = player_data.describe_player_sheet(filepath)
 
         return f"<pre>{json.dumps(info, indent=2)}</pre>"
 
@@ -1307,6 +3662,606 @@ def check_player_stats():
     return output
 
 
+# Maintenance commands
+@app.cli.command('stress-picks')
+@click.option('--requests', 'total_requests', default=300, help='Pick requests to fire')
+@click.option('--threads', default=32, help='Requests in flight at once')
+@click.option('--teams', 'team_count', default=12, help='Teams in the throwaway league')
+def stress_picks(total_requests, threads, team_count):
+    """Race parallel pick requests against a throwaway league and check the draft invariants"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    player_ids = [player_id for (player_id,) in db.session.query(Player.id)]
+    if not player_ids:
+        raise click.ClickException('Import players before running the stress test')
+
+    league = League(name=f'stress-{secrets.token_hex(4)}')
+    league.generate_access_code()
+    db.session.add(league)
+    db.session.commit()
+    teams = [DraftTeam(name=f'Stress {i + 1}', owner='stress', league_id=league.id) for i in range(team_count)]
+    db.session.add_all(teams)
+    db.session.commit()
+    team_ids = [team.id for team in teams]
+    draft = Draft(total_teams=team_count, draft_order=json.dumps(team_ids), league_id=league.id,
+                  pick_schedule=PickSchedule.build(team_ids).to_json())
+    db.session.add(draft)
+    db.session.commit()
+    league_id = league.id
+
+    def fire(_):
+        # Few distinct players so requests collide on both the pick and the player
+        player_id = random.choice(player_ids[:total_requests // 4 or 1])
+        with app.test_client() as client:
+            return client.post(f'/league/{league_id}/draft_player/{player_id}').status_code
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(fire, range(total_requests)))
+
+        db.session.expire_all()
+        draft = Draft.query.filter_by(league_id=league_id).first()
+        picks = league_picks(league_id).order_by(DraftPick.pick_number).all()
+
+        problems = []
+        if [pick.pick_number for pick in picks] != list(range(1, len(picks) + 1)):
+            problems.append('pick numbers are not contiguous - a pick was skipped or repeated')
+        if draft.current_pick != len(picks) + 1:
+            problems.append(f'draft is on pick {draft.current_pick} after {len(picks)} picks')
+        if len({pick.player_id for pick in picks}) != len(picks):
+            problems.append('a player was drafted twice')
+        for pick in picks:
+            if pick.team_id != draft.schedule.team_for(pick.pick_number):
+                problems.append(f'pick {pick.pick_number} went to the wrong team')
+
+        click.echo(f'{total_requests} requests: {len(picks)} picks committed, '
+                   f'{statuses.count(302)} redirects, {statuses.count(400)} rejected, '
+                   f'{len(statuses) - statuses.count(302) - statuses.count(400)} errors')
+        for problem in problems:
+            click.echo(f'INVARIANT VIOLATED: {problem}')
+    finally:
+        clear_pick_log(league_id)
+        league_picks(league_id).delete()
+        Draft.query.filter_by(league_id=league_id).delete()
+        DraftTeam.query.filter_by(league_id=league_id).delete()
+        League.query.filter_by(id=league_id).delete()
+        db.session.commit()
+
+    if problems:
+        raise SystemExit(1)
+
+
+@app.cli.command('replay-draft')
+@click.option('--league-id', type=int, default=None, help='League to replay (default: the original draft)')
+@click.option('--upto', type=int, default=None, help='Replay only up to this pick log entry')
+@click.option('--repair', is_flag=True, help='Rewrite draft_pick and the draft position from the log')
+def replay_draft(league_id, upto, repair):
+    """Rebuild a league's board from its pick log and check it against draft_pick"""
+    draft = Draft.query.filter(Draft.league_id == league_id).first()
+    if not draft:
+        raise click.ClickException('No draft for that league')
+
+    started = time.perf_counter()
+    try:
+        seq, picks = replay_pick_log(league_id, upto)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    elapsed = time.perf_counter() - started
+    click.echo(f'Replayed to log entry {seq}: {len(picks)} picks in {elapsed * 1000:.1f} ms')
+    for pick_number, team_id, player_id in picks[-5:]:
+        click.echo(f'  #{pick_number}: team {team_id} took player {player_id}')
+    if upto is not None:
+        return
+
+    stored = {tuple(row) for row in league_picks(league_id).with_entities(
+        DraftPick.pick_number, DraftPick.team_id, DraftPick.player_id)}
+    problems = [f'pick #{pick[0]} is in the log but not in draft_pick' for pick in picks if pick not in stored]
+    problems += [f'pick #{pick[0]} is in draft_pick but not in the log' for pick in sorted(stored - set(picks))]
+    if draft.current_pick != len(picks) + 1:
+        problems.append(f'draft is on pick {draft.current_pick}, the log says {len(picks) + 1}')
+    if draft.log_seq != seq:
+        problems.append(f'draft is at log entry {draft.log_seq}, the log ends at {seq}')
+
+    for problem in problems:
+        click.echo(f'MISMATCH: {problem}')
+    if not problems:
+        click.echo('draft_pick matches the log')
+    elif repair:
+        click.echo(f'Rebuilt {rebuild_draft_from_log(draft)} picks from the log')
+    else:
+        raise SystemExit(1)
+
+
+@app.cli.command('bench-auto-draft')
+@click.option('--teams', 'team_count', default=12, help='Teams in the throwaway league')
+@click.option('--rounds', 'manual_rounds', default=5, help='Rounds picked one at a time before the fast-forward')
+@click.option('--wishlist', 'wishlist_size', default=20, help='Wishlist entries per team')
+def bench_auto_draft(team_count, manual_rounds, wishlist_size):
+    """Auto-draft a throwaway league: single picks first, then fast-forward the rest at once"""
+    ranked = [player_id for (player_id,) in db.session.query(Player.id).order_by(
+        Player.draft_score.desc().nullslast(), Player.id)]
+    if len(ranked) < team_count * DRAFT_ROUNDS:
+        raise click.ClickException('Import players before running the benchmark')
+
+    league = League(name=f'auto-{secrets.token_hex(4)}')
+    league.generate_access_code()
+    db.session.add(league)
+    db.session.commit()
+    teams = [DraftTeam(name=f'Auto {i + 1}', owner='bench', league_id=league.id, auto_draft=True)
+             for i in range(team_count)]
+    db.session.add_all(teams)
+    db.session.commit()
+    team_ids = [team.id for team in teams]
+    draft = Draft(total_teams=team_count, draft_order=json.dumps(team_ids), league_id=league.id,
+                  pick_schedule=PickSchedule.build(team_ids).to_json())
+    db.session.add(draft)
+    # Each team wants a random handful of the top players, so wishlists collide
+    db.session.execute(db.insert(Wishlist), [
+        {'team_id': team_id, 'player_id': player_id, 'rank': (i + 1) * RANK_GAP}
+        for team_id in team_ids
+        for i, player_id in enumerate(random.sample(ranked[:team_count * 10], wishlist_size))
+    ])
+    db.session.commit()
+    league_id = league.id
+
+    try:
+        started = time.perf_counter()
+        for _ in range(manual_rounds * team_count):
+            run_auto_draft(draft, max_picks=1)
+        single = (time.perf_counter() - started) / (manual_rounds * team_count)
+
+        started = time.perf_counter()
+        remaining = run_auto_draft(draft)
+        elapsed = time.perf_counter() - started
+
+        db.session.expire_all()
+        draft = Draft.query.filter_by(league_id=league_id).first()
+        picks = league_picks(league_id).join(Player, Player.id == DraftPick.player_id).with_entities(
+            DraftPick.pick_number, DraftPick.team_id, Player.position, Player.team).order_by(DraftPick.pick_number).all()
+
+        problems = []
+        if [pick_number for pick_number, _, _, _ in picks] != list(range(1, len(picks) + 1)):
+            problems.append('pick numbers are not contiguous')
+        rules = draft.rules
+        for team_id, counters in roster_constraints.counts(draft).items():
+            for position, n in counters['positions'].items():
+                if n > rules['positions'].get(position, 0):
+                    problems.append(f'team {team_id} has {n} {position}s')
+            for club, n in counters['clubs'].items():
+                if n > rules['max_per_club']:
+                    problems.append(f'team {team_id} has {n} players from {club}')
+
+        click.echo(f'{manual_rounds * team_count} single auto-picks: {single * 1000:.1f} ms each')
+        click.echo(f'fast-forward of {len(remaining)} picks: {elapsed * 1000:.1f} ms '
+                   f'({elapsed * 1000 / max(len(remaining), 1):.2f} ms per pick)')
+        click.echo(f'{len(picks)} picks in total, draft now on pick {draft.current_pick}')
+        for problem in problems:
+            click.echo(f'INVARIANT VIOLATED: {problem}')
+    finally:
+        Wishlist.query.filter(Wishlist.team_id.in_(team_ids)).delete(synchronize_session=False)
+        clear_pick_log(league_id)
+        league_picks(league_id).delete()
+        Draft.query.filter_by(league_id=league_id).delete()
+        DraftTeam.query.filter_by(league_id=league_id).delete()
+        League.query.filter_by(id=league_id).delete()
+        db.session.commit()
+
+    if problems:
+        raise SystemExit(1)
+
+
+@app.cli.command('bench-pick-clock')
+@click.option('--leagues', 'league_count', default=200, help='Throwaway leagues drafting at once')
+@click.option('--teams', 'team_count', default=4, help='Teams per league')
+@click.option('--seconds', default=2, help='Pick clock length')
+@click.option('--rounds', default=2, help='Expired picks to wait for per league, in rounds')
+def bench_pick_clock(league_count, team_count, seconds, rounds):
+    """Let pick clocks expire across many throwaway leagues and report how late the auto-picks land"""
+    if Player.query.count() < team_count * rounds:
+        raise click.ClickException('Import players before running the benchmark')
+
+    leagues = [League(name=f'clock-{secrets.token_hex(4)}') for _ in range(league_count)]
+    for league in leagues:
+        league.generate_access_code()
+    db.session.add_all(leagues)
+    db.session.commit()
+    league_ids = [league.id for league in leagues]
+    teams = [DraftTeam(name=f'Clock {i + 1}', owner='bench', league_id=league_id)
+             for league_id in league_ids for i in range(team_count)]
+    db.session.add_all(teams)
+    db.session.commit()
+
+    # Deadlines spread over one second, so expiries overlap the way a busy night would
+    start = datetime.utcnow() + timedelta(seconds=seconds)
+    drafts = []
+    for league_id in league_ids:
+        team_ids = [team.id for team in teams if team.league_id == league_id]
+        drafts.append(Draft(total_teams=team_count, draft_order=json.dumps(team_ids), league_id=league_id,
+                            pick_schedule=PickSchedule.build(team_ids).to_json(), pick_seconds=seconds,
+                            pick_deadline=start + timedelta(seconds=random.random())))
+    db.session.add_all(drafts)
+    db.session.commit()
+    for draft in drafts:
+        pick_clock.schedule(draft.id, draft.log_seq, draft.pick_deadline)
+
+    target = pick_clock.fired + league_count * team_count * rounds
+    started = time.perf_counter()
+    pick_clock.start()
+    try:
+        timeout = seconds * (team_count * rounds + 1) * 3 + 30
+        while pick_clock.fired < target and time.perf_counter() - started < timeout:
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - started
+        stats = pick_clock.stats()
+        click.echo(f'{league_count} leagues, {seconds}s clock: {stats["fired"]} expired picks in {elapsed:.1f}s')
+        click.echo(f'auto-pick landed after its deadline: p50 {stats["late_p50_ms"]} ms, '
+                   f'p99 {stats["late_p99_ms"]} ms, max {stats["late_max_ms"]} ms')
+        if pick_clock.fired < target:
+            click.echo(f'TIMED OUT waiting for {target - pick_clock.fired} more picks')
+    finally:
+        Draft.query.filter(Draft.league_id.in_(league_ids)).update(
+            {'pick_seconds': None, 'pick_deadline': None}, synchronize_session=False)
+        db.session.commit()
+        for draft_id, in Draft.query.filter(Draft.league_id.in_(league_ids)).with_entities(Draft.id):
+            pick_clock.schedule(draft_id, None, None)
+        time.sleep(0.5)  # let an expiry already in flight finish
+        for league_id in league_ids:
+            clear_pick_log(league_id)
+            league_picks(league_id).delete()
+        Draft.query.filter(Draft.league_id.in_(league_ids)).delete(synchronize_session=False)
+        DraftTeam.query.filter(DraftTeam.league_id.in_(league_ids)).delete(synchronize_session=False)
+        League.query.filter(League.id.in_(league_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+@app.cli.command('bench-lineups')
+@click.option('--teams', 'team_count', default=10000, help='Random squads for the synthetic batch')
+@click.option('--check', 'check_count', default=200, help='Squads checked against brute force')
+def bench_lineups(team_count, check_count):
+    """Time the lineup solver on every drafted squad and on a large random batch, and check it is exact"""
+    import itertools
+
+    import numpy as np
+
+    import lineup
+
+    started = time.perf_counter()
+    lineups = recommended_lineups(all_leagues=True)
+    click.echo(f'Every drafted squad: {len(lineups)} teams in {(time.perf_counter() - started) * 1000:.1f} ms '
+               f'(query included)')
+
+    rows = Player.query.filter(Player.position.in_(lineup.POSITIONS)).with_entities(
+        Player.position, Player.points_per_game, Player.status).all()
+    if not rows:
+        raise click.ClickException('Import players before running the benchmark')
+    pools = [np.array([i for i, row in enumerate(rows) if row[0] == position]) for position in lineup.POSITIONS]
+    scores = lineup.projected_points([row[1] for row in rows], [row[2] for row in rows])
+
+    # Full 2/5/5/3 squads drawn at random from the real player pool
+    rng = np.random.default_rng(0)
+    squad = DEFAULT_ROSTER_RULES['positions']
+    players = np.concatenate([rng.choice(pool, size=(team_count, squad[position]))
+                              for pool, position in zip(pools, lineup.POSITIONS)], axis=1)
+    teams = np.repeat(np.arange(team_count), players.shape[1])
+    positions = np.tile(np.repeat(np.arange(len(lineup.POSITIONS)), [squad[p] for p in lineup.POSITIONS]), team_count)
+    player_scores = scores[players.ravel()]
+
+    started = time.perf_counter()
+    table, choice, starter, total = lineup.best_lineups(teams, positions, player_scores, team_count)
+    elapsed = time.perf_counter() - started
+    click.echo(f'{team_count} random squads: {elapsed * 1000:.1f} ms ({elapsed * 1e6 / team_count:.2f} us per team)')
+
+    # Brute force: every 11 of the squad that fits a formation
+    legal = {tuple(row) for row in table}
+    mismatches = 0
+    for t in range(min(check_count, team_count)):
+        members = np.flatnonzero(teams == t)
+        best = max(
+            (player_scores[list(combo)].sum() for combo in itertools.combinations(members, lineup.STARTERS)
+             if tuple(np.bincount(positions[list(combo)], minlength=len(lineup.POSITIONS))) in legal),
+            default=None)
+        if best is None or abs(best - total[t]) > 1e-9 or starter[members].sum() != lineup.STARTERS:
+            mismatches += 1
+    click.echo(f'Brute force agrees on {min(check_count, team_count) - mismatches} of {min(check_count, team_count)} squads')
+    if mismatches:
+        raise SystemExit(1)
+
+
+@app.cli.command('bench-wishlist')
+@click.option('--moves', default=50, help='Drag-and-drop moves timed per list size')
+def bench_wishlist(moves):
+    """Time wishlist reorders on a throwaway team for growing list lengths"""
+
+    player_ids = [player_id for (player_id,) in db.session.query(Player.id)]
+    if len(player_ids) < 10:
+        raise click.ClickException('Import players before running the benchmark')
+
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+    team = DraftTeam(name=f'bench-{secrets.token_hex(4)}', owner='bench')
+    db.session.add(team)
+    db.session.commit()
+
+    try:
+        for size in [10, 100, 1000]:
+            ids = player_ids[:size]
+            Wishlist.query.filter_by(team_id=team.id).delete()
+            db.session.add_all([Wishlist(team_id=team.id, player_id=player_id, rank=(i + 1) * RANK_GAP)
+                                for i, player_id in enumerate(ids)])
+            db.session.commit()
+
+            statements.clear()
+            started = time.perf_counter()
+            for _ in range(moves):
+                moved, before = random.sample(ids, 2)
+                move_wishlist_item(team.id, moved, before)
+                db.session.commit()
+            move_ms = (time.perf_counter() - started) * 1000 / moves
+            move_statements = len(statements) / moves
+
+            statements.clear()
+            started = time.perf_counter()
+            for _ in range(moves):
+                random.shuffle(ids)
+                respace_wishlist(team.id, ids)
+                db.session.commit()
+            order_ms = (time.perf_counter() - started) * 1000 / moves
+
+            click.echo(f'{len(ids):>5} entries: move {move_ms:6.2f} ms ({move_statements:.1f} statements), '
+                       f'full reorder {order_ms:6.2f} ms ({len(statements) / moves:.1f} statements)')
+    finally:
+        Wishlist.query.filter_by(team_id=team.id).delete()
+        DraftTeam.query.filter_by(id=team.id).delete()
+        db.session.commit()
+
+
+@app.cli.command('export-db')
+@click.argument('path')
+def export_db_command(path):
+    """Write a database snapshot to PATH (gzipped if it ends in .gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.writelines(iter_snapshot_lines())
+    click.echo(f'Wrote {path}')
+
+
+@app.cli.command('restore-db')
+@click.argument('path')
+def restore_db_command(path):
+    """Replace all data with the snapshot at PATH"""
+    with open(path, 'rb') as f:
+        counts = restore_snapshot(snapshot_lines(f, path))
+    for table, count in counts.items():
+        click.echo(f'{table}: {count} rows')
+
+
+@app.cli.command('bench-indexes')
+@click.option('--leagues', default=200, help='Synthetic leagues to generate')
+@click.option('--runs', default=200, help='Timed executions per query')
+def bench_indexes(leagues, runs):
+    """Time the board and wishlist queries with and without the hot-path indexes.
+
+    Runs against a throwaway in-memory SQLite database filled with synthetic leagues
+    (12 teams, a full 15-round draft and a 100-player wishlist per team), so the
+    real database is never touched.
+    """
+    from sqlalchemy import create_engine
+
+    engine = create_engine('sqlite://')
+    db.metadata.create_all(engine)
+    tables = db.metadata.tables
+    hot_indexes = [index for table in db.metadata.sorted_tables for index in table.indexes
+                   if index.name in HOT_PATH_INDEXES]
+
+    with engine.begin() as conn:
+        conn.execute(tables['player'].insert(), [
+            {'id': i, 'first_name': 'P', 'second_name': f'Player{i}', 'team': f'C{i % 20}',
+             'position': POSITIONS[i % 4]} for i in range(1, 701)
+        ])
+        for league_id in range(1, leagues + 1):
+            team_ids = range((league_id - 1) * 12 + 1, league_id * 12 + 1)
+            conn.execute(tables['league'].insert(), {'id': league_id, 'name': f'L{league_id}'})
+            conn.execute(tables['draft'].insert(), {'league_id': league_id, 'total_teams': 12})
+            conn.execute(tables['draft_team'].insert(), [
+                {'id': team_id, 'name': f'T{team_id}', 'owner': 'o', 'league_id': league_id} for team_id in team_ids
+            ])
+            picks = random.sample(range(1, 701), 12 * DRAFT_ROUNDS)
+            conn.execute(tables['draft_pick'].insert(), [
+                {'league_id': league_id, 'player_id': player_id, 'team_id': team_ids[i % 12], 'pick_number': i + 1}
+                for i, player_id in enumerate(picks)
+            ])
+            conn.execute(tables['wishlist'].insert(), [
+                {'team_id': team_id, 'player_id': player_id, 'rank': (i + 1) * RANK_GAP}
+                for team_id in team_ids for i, player_id in enumerate(random.sample(range(1, 701), 100))
+            ])
+
+    queries = {
+        'draft by league': (text('SELECT * FROM draft WHERE league_id = :league'), 'league'),
+        'board teams': (text('SELECT * FROM draft_team WHERE league_id = :league'), 'league'),
+        'board rosters': (text('SELECT player.* FROM player JOIN draft_pick ON draft_pick.player_id = player.id '
+                               'WHERE draft_pick.team_id IN (SELECT id FROM draft_team WHERE league_id = :league)'), 'league'),
+        'wishlist': (text('SELECT * FROM wishlist JOIN player ON player.id = wishlist.player_id '
+                          'WHERE wishlist.team_id = :team ORDER BY wishlist.rank'), 'team'),
+    }
+
+    def time_queries():
+        timings = {}
+        with engine.connect() as conn:
+            for label, (query, param) in queries.items():
+                started = time.perf_counter()
+                for _ in range(runs):
+                    value = random.randint(1, leagues if param == 'league' else leagues * 12)
+                    conn.execute(query, {param: value}).all()
+                timings[label] = (time.perf_counter() - started) * 1000 / runs
+        return timings
+
+    with engine.begin() as conn:
+        for index in hot_indexes:
+            index.drop(conn)
+    without = time_queries()
+    with engine.begin() as conn:
+        for index in hot_indexes:
+            index.create(conn)
+    with_indexes = time_queries()
+
+    click.echo(f'{leagues} leagues, {leagues * 12} teams, {runs} runs per query')
+    for label in queries:
+        click.echo(f'{label:>16}: {without[label]:7.3f} ms -> {with_indexes[label]:7.3f} ms '
+                   f'({without[label] / with_indexes[label]:5.1f}x)')
+
+
+@app.cli.command('bench-startup')
+@click.option('--runs', default=5, help='Fresh interpreters to time')
+@click.option('--max-ms', default=0, help='Fail if the median import time exceeds this (0 = no limit)')
+def bench_startup(runs, max_ms):
+    """Time a cold 'import app' and its peak RSS, as a gunicorn worker pays at boot.
+
+    Also fails if pandas, numpy or openpyxl were loaded at import time - those belong
+    to player_data and must only load on first use.
+    """
+    import statistics
+    import subprocess
+    import sys
+
+    probe = (
+        "import json, resource, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import app\n"
+        "elapsed = (time.perf_counter() - started) * 1000\n"
+        "heavy = [name for name in ('pandas', 'numpy', 'openpyxl') if name in sys.modules]\n"
+        "print(json.dumps({'ms': elapsed, 'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,"
+        " 'heavy': heavy}))\n"
+    )
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', probe], cwd=app.root_path, capture_output=True,
+                                text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    median_ms = statistics.median(result['ms'] for result in results)
+    median_rss = statistics.median(result['rss_kb'] for result in results) / 1024
+    click.echo(f'import app: median {median_ms:.0f} ms over {runs} runs, peak RSS {median_rss:.1f} MB')
+
+    heavy = results[0]['heavy']
+    if heavy:
+        raise click.ClickException(f"Loaded at import time: {', '.join(heavy)} - import them lazily")
+    if max_ms and median_ms > max_ms:
+        raise click.ClickException(f'Import took {median_ms:.0f} ms, over the {max_ms} ms budget')
+
+
+@app.cli.command('value-players')
+def value_players():
+    """Recompute VORP, z-scores and draft scores for every player"""
+    import player_data
+
+    started = time.perf_counter()
+    slots = valuation_slots(db.session)
+    count = player_data.value_players(db.session, Player.__table__, slots)
+    db.session.commit()
+    elapsed = (time.perf_counter() - started) * 1000
+    board_index.invalidate()
+    response_cache.bump('players')
+    click.echo(f"Valued {count} players in {elapsed:.1f} ms (replacement depth {slots})")
+
+
+@app.cli.command('bench-mock-draft')
+@click.option('--simulations', default=10000, help='Simulated drafts per run')
+@click.option('--teams', default=12)
+@click.option('--players', default=600, help='Synthetic player pool size')
+@click.option('--workers', default=0, help='Process pool size (0 = one per CPU)')
+def bench_mock_draft(simulations, teams, players, workers):
+    """Time a whole-draft mock simulation on a synthetic snake draft, in-process and pooled"""
+    import numpy as np
+    import mock_draft
+
+    rules = DEFAULT_ROSTER_RULES
+    rounds = sum(rules['positions'].values())
+    rng = np.random.default_rng(0)
+    schedule = PickSchedule.build(list(range(teams)), 'snake', rounds)
+    state = mock_draft.MockDraftState(
+        scores=np.sort(rng.normal(size=players))[::-1],
+        positions=rng.choice(len(rules['positions']), size=players, p=[0.12, 0.33, 0.38, 0.17]),
+        clubs=rng.integers(20, size=players),
+        pick_teams=schedule.teams,
+        position_counts=np.zeros((teams, len(rules['positions']))),
+        club_counts=np.zeros((teams, 20)),
+        position_limits=list(rules['positions'].values()),
+        max_per_club=rules['max_per_club'],
+        # Every pick of the last team in round one: the longest horizon
+        target_steps=[pick - 1 for pick in schedule.team_picks[teams - 1]]
+    )
+
+    for label, pool_size in [('in-process', 1), ('process pool', workers or None)]:
+        started = time.perf_counter()
+        odds = mock_draft.availability(state, simulations, workers=pool_size, seed=1)
+        elapsed = time.perf_counter() - started
+        click.echo(f'{label:>12}: {simulations} simulations of a {teams}-team, {rounds}-round draft '
+                   f'in {elapsed:.2f} s (top player available at the last pick in {odds[-1][0]:.1%})')
+
+
+@app.cli.command('bench-db-faults')
+@click.option('--requests', 'total_requests', default=400, help='Board and API requests to send')
+@click.option('--fault-rate', default=0.05, help='Chance that any one statement hits an injected connection drop')
+@click.option('--breaker-reset', default=0.25, help='Circuit breaker reset time for the run, in seconds')
+@click.option('--interval', default=0.005, help='Pause between requests, in seconds')
+def bench_db_faults(total_requests, fault_rate, breaker_reset, interval):
+    """Drive the read routes while statements randomly fail with dropped connections.
+
+    Faults are raised from a cursor-execute hook as the driver's own OperationalError,
+    the way a restarting Postgres or a flaky proxy surfaces. The second half of the run
+    adds a 0.3 s total outage so the circuit breaker trips and recovers.
+    """
+    league = League.query.join(Draft, Draft.league_id == League.id).first()
+    if not league or not Player.query.first():
+        raise click.ClickException('Import players and set up a league before running the benchmark')
+    paths = [f'/league/{league.id}/draft', f'/api/league/{league.id}/available_players', '/leagues', '/']
+
+    outage = {'until': 0.0}
+
+    def inject_fault(conn, cursor, statement, parameters, context, executemany):
+        if time.monotonic() < outage['until'] or random.random() < fault_rate:
+            raise conn.dialect.dbapi.OperationalError('server closed the connection unexpectedly (injected)')
+
+    client = app.test_client()
+    with client.session_transaction() as browser:
+        browser['is_admin'] = True
+    db.session.remove()
+
+    statuses = []
+    started_health = dict(vars(db_health))
+    db_breaker.reset_after = breaker_reset
+    event.listen(db.engine, 'before_cursor_execute', inject_fault)
+    try:
+        for i in range(total_requests):
+            if i == total_requests // 2:
+                outage['until'] = time.monotonic() + 0.3
+            response_cache.backend.clear()  # make every request reach the database
+            statuses.append(client.get(random.choice(paths)).status_code)
+            time.sleep(interval)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', inject_fault)
+
+    counts = {status: statuses.count(status) for status in sorted(set(statuses))}
+    click.echo(f'{total_requests} requests at a {fault_rate:.0%} statement fault rate: {counts}')
+    for key, value in vars(db_health).items():
+        click.echo(f'{key:>24}: {value - started_health[key]}')
+    click.echo(f"{'breaker trips':>24}: {db_breaker.trips} (now {db_breaker.state})")
+
+
+# Every view runs behind the database retry / circuit breaker wrapper. The metrics page
+# stays reachable while the circuit is open. Only views that never write are retried:
+# a commit that failed ambiguously may have landed, and running a write again could
+# repeat it (or, for toggle_draft_lock, undo it) - so anything that writes, whatever
+# its HTTP method, runs once and answers 503 instead.
+DB_RESILIENCE_EXEMPT = {'static', 'admin_metrics'}
+DB_RETRY_READ_ONLY = {'index', 'draft', 'league_draft', 'list_leagues', 'available_players', 'search_players',
+                      'team_mock_draft', 'league_lineups', 'view_team', 'team_wishlist', 'admin_database',
+                      'admin_players', 'export_database', 'check_player_stats'}
+for endpoint, view in list(app.view_functions.items()):
+    if endpoint not in DB_RESILIENCE_EXEMPT:
+        app.view_functions[endpoint] = with_db_resilience(view, retry=endpoint in DB_RETRY_READ_ONLY)
+
 # Initialize and migrate database on startup
 with app.app_context():
     init_and_migrate_db()
@@ -1314,4 +4269,4 @@ with app.app_context():
 # Run the app
 if __name__ == '__main__':
     # For development
-    app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
+    socketio.run(app, debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Best starting XI for drafted squads, solved for every team at once.
+
+Only needs numpy. app.py turns drafted squads into flat player arrays and imports this
+module when lineups are asked for, so it stays out of the web worker's boot path like
+player_data and mock_draft.
+
+A legal XI is one keeper plus ten outfield players in one of the usual formations
+(3-5 defenders, 2-5 midfielders, 1-3 forwards). Within a fixed formation the best XI
+just takes the top-k projected players at each position, so once each squad's
+projections are sorted and prefix-summed per position, any formation's best total is
+four lookups. Taking the best formation gives the exact optimum - no search over
+player combinations - and the whole batch of squads is a few (teams x positions x
+slots) array operations.
+"""
+import itertools
+
+import numpy as np
+
+POSITIONS = ['GK', 'DEF', 'MID', 'FWD']
+
+# Starters allowed per position, and the size of the XI
+FORMATION_LIMITS = {'GK': (1, 1), 'DEF': (3, 5), 'MID': (2, 5), 'FWD': (1, 3)}
+STARTERS = 11
+
+# Share of their points-per-game a player is expected to get, by FPL status code
+# (first letter of the status). Anything else - available, or unknown - counts in full.
+STATUS_AVAILABILITY = {'d': 0.5, 'i': 0.0, 's': 0.0, 'u': 0.0, 'n': 0.0}
+
+
+def formations(limits=FORMATION_LIMITS, starters=STARTERS):
+    """Every legal count per position (in POSITIONS order), as an int array of shape (F, 4)"""
+    ranges = [range(limits[position][0], limits[position][1] + 1) for position in POSITIONS]
+    return np.array([counts for counts in itertools.product(*ranges) if sum(counts) == starters])
+
+
+def formation_name(counts):
+    """'4-4-2' style name for a formation row (the keeper is implied)"""
+    return '-'.join(str(int(n)) for n in counts[1:])
+
+
+def projected_points(points_per_game, statuses):
+    """Projected points per player: points per game scaled by availability"""
+    availability = np.array([STATUS_AVAILABILITY.get((status or 'a')[:1].lower(), 1.0) for status in statuses])
+    return np.nan_to_num(np.asarray(points_per_game, dtype=float)) * availability
+
+
+def best_lineups(teams, positions, scores, team_count, limits=FORMATION_LIMITS, starters=STARTERS):
+    """Best XI for every team in one pass.
+
+    teams, positions and scores are parallel arrays over every drafted player: team
+    index 0..team_count-1, position code (index into POSITIONS) and projected points.
+    Returns (formation table, chosen formation row per team or -1 when the squad cannot
+    field a legal XI, starter mask over the players, projected total per team or NaN).
+    """
+    table = formations(limits, starters)
+    teams = np.asarray(teams, dtype=np.intp)
+    positions = np.asarray(positions, dtype=np.intp)
+    scores = np.asarray(scores, dtype=float)
+    position_count = len(POSITIONS)
+    slots = int(table.max())
+
+    # Each player's rank within its team and position, best first
+    order = np.lexsort((-scores, positions, teams))
+    group = teams[order] * position_count + positions[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(group)) + 1] if len(order) else np.zeros(0, dtype=np.intp)
+    sizes = np.diff(np.r_[starts, len(order)])
+    ranked = np.arange(len(order)) - np.repeat(starts, sizes)
+    rank = np.empty_like(ranked)
+    rank[order] = ranked
+
+    # best[t, p, k]: total of team t's top k players at position p; -inf if it has fewer
+    top = np.zeros((team_count, position_count, slots))
+    keep = rank < slots
+    top[teams[keep], positions[keep], rank[keep]] = scores[keep]
+    have = np.bincount(teams * position_count + positions,
+                       minlength=team_count * position_count).reshape(team_count, position_count)
+    best = np.zeros((team_count, position_count, slots + 1))
+    best[:, :, 1:] = np.where(np.arange(1, slots + 1) <= have[:, :, np.newaxis], np.cumsum(top, axis=2), -np.inf)
+
+    # Every formation's total for every team, (teams x formations), and the best of them
+    totals = best[:, np.arange(position_count), table].sum(axis=2)
+    choice = totals.argmax(axis=1)
+    total = totals[np.arange(team_count), choice]
+    feasible = np.isfinite(total)
+    choice = np.where(feasible, choice, -1)
+
+    need = table[np.maximum(choice, 0)][teams, positions]
+    starter = feasible[teams] & (rank < need)
+    return table, choice, starter, np.where(feasible, total, np.nan)
@@ -0,0 +1,315 @@
+"""Draft-night load test for the hot routes.
+
+Seeds a synthetic 700-player pool through the normal import path, creates leagues
+through /create_league and /league/<id>/setup, then runs one thread per manager that
+polls its league's board, pages the player API, makes picks and reorders its wishlist
+for --duration seconds. Reports throughput, p50/p95/p99 latency and queries per
+request (from the Server-Timing header) for every route.
+
+    python loadtest.py                          # in-process, against a scratch SQLite file
+    python loadtest.py --url http://127.0.0.1:8000 --leagues 2
+    python loadtest.py --leagues 2 --teams 8 --think 0.2 --duration 60 --baseline loadtest_baseline.json
+
+The last line is the check against the committed baseline: it exits 1 on a regression.
+A baseline records the run parameters it was measured with and only compares against
+runs with the same ones; --save-baseline writes a new one. Record it below saturation
+(with some --think time), or its latencies measure queueing on that machine rather
+than the routes.
+
+--url drives a running server (e.g. gunicorn) over HTTP instead; it writes players,
+leagues and picks, so point that server at a scratch DATABASE_URL.
+"""
+import functools
+import http.cookiejar
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+import click
+
+SYNTHETIC_PLAYERS = 700
+POSITION_MIX = [('GK', 0.11), ('DEF', 0.33), ('MID', 0.38), ('FWD', 0.18)]
+WISHLIST_SIZE = 30
+
+# Queries per request vary with the mix of accepted and rejected picks, so allow some
+# drift; an N+1 regression multiplies the count
+QUERY_TOLERANCE = 0.25
+
+# Run settings that shape the load, recorded in a baseline and required to match it
+RUN_PARAMETERS = ['target', 'leagues', 'teams', 'duration', 'think']
+
+
+class TestClientSession:
+    """One manager's browser session against the app in this process"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None, json_body=None):
+        response = self.client.open(path, method=method, data=data, json=json_body)
+        return response.status_code, response.headers, response.get_data()
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """One manager's browser session against a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect)
+
+    def request(self, method, path, data=None, json_body=None, files=None):
+        headers = {}
+        body = None
+        if files:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for name, value in (data or {}).items():
+                parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+            for name, file_path in files.items():
+                with open(file_path, 'rb') as f:
+                    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                                 f'filename="{os.path.basename(file_path)}"\r\n\r\n'.encode() + f.read() + b'\r\n')
+            body = b''.join(parts) + f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif data is not None:
+            body = urllib.parse.urlencode(data, doseq=True).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        request = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+
+class Recorder:
+    """Latency, status and query count samples per route, shared by every manager thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}  # route -> [(ms, status, queries)]
+
+    def call(self, session, route, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            status, headers, body = session.request(method, path, **kwargs)
+        except Exception:
+            status, headers, body = 599, {}, b''
+        ms = (time.perf_counter() - started) * 1000
+
+        match = re.search(r'desc="(\d+) queries"', headers.get('Server-Timing', '') if headers else '')
+        with self.lock:
+            self.samples.setdefault(route, []).append((ms, status, int(match.group(1)) if match else None))
+        return status, body
+
+    def report(self, elapsed):
+        results = {}
+        for route, samples in sorted(self.samples.items()):
+            latencies = sorted(ms for ms, _, _ in samples)
+            queries = [q for _, _, q in samples if q is not None]
+            cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+            results[route] = {
+                'requests': len(samples),
+                'per_second': round(len(samples) / elapsed, 1),
+                'p50_ms': round(cuts[49], 2),
+                'p95_ms': round(cuts[94], 2),
+                'p99_ms': round(cuts[98], 2),
+                'mean_queries': round(statistics.mean(queries), 2) if queries else None,
+                'errors': sum(1 for _, status, _ in samples if status >= 500)
+            }
+        return results
+
+
+def write_player_sheet(path, count=SYNTHETIC_PLAYERS, seed=0):
+    """An FPL-style 'Player Data' workbook of synthetic players"""
+    import openpyxl
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet('Player Data')
+    sheet.append(['full_name', 'team', 'position', 'price', 'total_points', 'points_per_game', 'minutes',
+                  'goals_scored', 'assists', 'clean_sheets', 'saves', 'bonus', 'ict_index',
+                  'expected_goal_involvements'])
+    positions, weights = zip(*POSITION_MIX)
+    for i in range(count):
+        points = max(int(rng.gauss(70, 45)), 0)
+        sheet.append([f'Load Player{i:04d}', f'Club{i % 20:02d}', rng.choices(positions, weights)[0],
+                      round(rng.uniform(4.0, 13.0), 1), points, round(points / 38, 1),
+                      min(points * 20, 3420), rng.randint(0, 20), rng.randint(0, 15), rng.randint(0, 15),
+                      rng.randint(0, 120), rng.randint(0, 30), round(rng.uniform(0, 300), 1),
+                      round(rng.uniform(0, 25), 2)])
+    workbook.save(path)
+
+
+def create_leagues(session, leagues, teams, run_id):
+    """Set up the leagues through the setup pages; returns {league id: [team ids]}"""
+    setup = {}
+    for n in range(leagues):
+        status, headers, _ = session.request('POST', '/create_league', data={'league_name': f'Load {run_id} {n}'})
+        match = re.search(r'/league/(\d+)/setup', headers.get('Location', '') if status == 302 else '')
+        if not match:
+            raise click.ClickException(f'Creating a league failed with HTTP {status}')
+        league_id = int(match.group(1))
+        session.request('POST', f'/league/{league_id}/setup', data={
+            'team_names[]': [f'Team {i + 1}' for i in range(teams)],
+            'team_owners[]': [f'Manager {i + 1}' for i in range(teams)]
+        })
+        _, _, page = session.request('GET', f'/league/{league_id}/draft')
+        setup[league_id] = [int(team_id) for team_id in
+                            dict.fromkeys(re.findall(rb'data-team-id="(\d+)"', page))]
+    return setup
+
+
+def manager(session, recorder, league_id, team_id, deadline, think, rng):
+    """One manager: watch the board, pick when the draft is open, shuffle the wishlist"""
+    _, body = recorder.call(session, 'available_players', 'GET',
+                            f'/api/league/{league_id}/available_players?limit={WISHLIST_SIZE}')
+    wishlist = [player['id'] for player in json.loads(body or b'{}').get('players', [])]
+    rng.shuffle(wishlist)
+    for player_id in wishlist:
+        session.request('POST', f'/team/{team_id}/wishlist/add/{player_id}')
+
+    while time.monotonic() < deadline:
+        recorder.call(session, 'league_draft', 'GET', f'/league/{league_id}/draft')
+
+        sort = rng.choice(['total_points', 'draft_score', 'now_cost'])
+        status, body = recorder.call(session, 'available_players', 'GET',
+                                     f'/api/league/{league_id}/available_players?sort={sort}')
+        page = json.loads(body) if status == 200 else {}
+
+        # Everyone races for the pick on the clock; the expected_pick check turns the
+        # losers away, the same as clicks from stale boards on the night
+        if page.get('players') and rng.random() < 0.3:
+            player = rng.choice(page['players'][:10])
+            recorder.call(session, 'draft_player', 'POST', f'/league/{league_id}/draft_player/{player["id"]}',
+                          data={'expected_pick': page['current_pick']})
+
+        if len(wishlist) > 1 and rng.random() < 0.2:
+            moved, before = rng.sample(wishlist, 2)
+            recorder.call(session, 'reorder_wishlist', 'POST', f'/team/{team_id}/wishlist/reorder',
+                          json_body={'move': moved, 'before': before})
+
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+
+
+def compare(results, baseline, tolerance):
+    """Routes whose p95 latency or queries per request regressed past the baseline"""
+    problems = []
+    for route, expected in baseline.items():
+        actual = results.get(route)
+        if actual is None:
+            problems.append(f'{route}: no requests recorded')
+            continue
+        if actual['p95_ms'] > expected['p95_ms'] * (1 + tolerance):
+            problems.append(f"{route}: p95 {actual['p95_ms']} ms vs baseline {expected['p95_ms']} ms")
+        if (actual['mean_queries'] is not None and expected.get('mean_queries') is not None
+                and actual['mean_queries'] > expected['mean_queries'] * (1 + QUERY_TOLERANCE) + 0.5):
+            problems.append(f"{route}: {actual['mean_queries']} queries/request vs baseline "
+                            f"{expected['mean_queries']}")
+        if actual['errors']:
+            problems.append(f"{route}: {actual['errors']} server errors")
+    return problems
+
+
+@click.command()
+@click.option('--url', help='Drive a running server instead of the app in this process')
+@click.option('--leagues', default=4, help='Leagues drafting at once')
+@click.option('--teams', default=12, help='Teams (manager threads) per league')
+@click.option('--duration', default=20.0, help='Seconds of load after seeding')
+@click.option('--think', default=0.0, help='Mean pause between a manager\'s actions, in seconds')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Fail on regressions against this file')
+@click.option('--save-baseline', type=click.Path(dir_okay=False), help='Write this run\'s results as the new baseline')
+@click.option('--tolerance', default=0.25, help='Allowed p95 slowdown over the baseline (0.25 = 25%)')
+@click.option('--seed', 'random_seed', default=1)
+def main(url, leagues, teams, duration, think, baseline, save_baseline, tolerance, random_seed):
+    parameters = {'target': 'http' if url else 'in-process', 'leagues': leagues, 'teams': teams,
+                  'duration': duration, 'think': think}
+    if baseline:
+        with open(baseline) as f:
+            expected = json.load(f)
+        recorded = expected.get('parameters', {})
+        different = [name for name in RUN_PARAMETERS if recorded.get(name) != parameters[name]]
+        if different:
+            raise click.ClickException(
+                f'{baseline} was recorded with ' + ', '.join(f'{name}={recorded.get(name)}' for name in different)
+                + '; this run has ' + ', '.join(f'{name}={parameters[name]}' for name in different))
+
+    scratch = tempfile.mkdtemp(prefix='draft-loadtest-')
+    if url:
+        new_session = functools.partial(HttpSession, url)
+    else:
+        # Imported here so DATABASE_URL points the app at the scratch database first
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(scratch, 'loadtest.db')
+        from app import app
+        new_session = functools.partial(TestClientSession, app)
+
+    sheet_path = os.path.join(scratch, 'players.xlsx')
+    write_player_sheet(sheet_path)
+    if url:
+        status, _, _ = new_session().request('POST', '/import_excel', files={'file': sheet_path})
+        if status != 200:
+            raise click.ClickException(f'Player import failed with HTTP {status}')
+    else:
+        from app import import_fpl_excel
+        with app.app_context():
+            import_fpl_excel(sheet_path)
+    league_teams = create_leagues(new_session(), leagues, teams, uuid.uuid4().hex[:6])
+    click.echo(f'Seeded {SYNTHETIC_PLAYERS} players and {leagues} leagues of {teams} teams')
+
+    recorder = Recorder()
+    deadline = time.monotonic() + duration
+    threads = [threading.Thread(target=manager, args=(new_session(), recorder, league_id, team_id, deadline, think,
+                                                      random.Random(random_seed * 100003 + team_id)))
+               for league_id, team_ids in league_teams.items() for team_id in team_ids]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    results = recorder.report(elapsed)
+    click.echo(f'{len(threads)} managers for {elapsed:.1f} s')
+    click.echo(f"{'route':>18} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+               f"{'queries':>8} {'errors':>7}")
+    for route, row in results.items():
+        queries = '-' if row['mean_queries'] is None else row['mean_queries']
+        click.echo(f"{route:>18} {row['requests']:>9} {row['per_second']:>8} {row['p50_ms']:>8} "
+                   f"{row['p95_ms']:>8} {row['p99_ms']:>8} {queries:>8} {row['errors']:>7}")
+
+    if save_baseline:
+        with open(save_baseline, 'w') as f:
+            json.dump({'parameters': parameters, 'routes': results}, f, indent=2, sort_keys=True)
+        click.echo(f'Baseline written to {save_baseline}')
+
+    if baseline:
+        problems = compare(results, expected['routes'], tolerance)
+        for problem in problems:
+            click.echo(f'REGRESSION: {problem}')
+        if problems:
+            raise SystemExit(1)
+        click.echo('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
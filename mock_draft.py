@@ -0,0 +1,149 @@
+"""Monte Carlo mock drafts: how likely each player is to still be there at a team's picks.
+
+Only needs numpy. app.py turns a league's draft into a MockDraftState (candidates,
+remaining pick order, roster counters) and imports this module when someone asks
+for odds, so it stays out of the web worker's boot path like player_data.
+
+Each simulation draws one noisy ranking of the candidates - player score plus Gumbel
+noise, i.e. a Plackett-Luce sample, so the first pick follows a softmax over scores -
+and then every team on the clock takes the best-ranked player it can still legally
+draft. All simulations advance together one pick at a time as (simulations x
+candidates) array operations; large runs are split across a process pool.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Below this many simulations a process pool costs more than it saves
+PARALLEL_MIN_SIMULATIONS = 2000
+
+# Ranking columns scanned per pick beyond those earlier picks can have used up
+SEARCH_WINDOW = 32
+
+
+class MockDraftState:
+    """Everything a simulation needs, as plain arrays so it pickles cheaply to workers.
+
+    Candidates are indexed 0..K-1 and teams 0..T-1; position and club are small
+    integer codes. pick_teams is the team index for every remaining pick, in order,
+    and target_steps are the offsets into it of the picks we report odds for.
+    """
+
+    def __init__(self, scores, positions, clubs, pick_teams, position_counts, club_counts,
+                 position_limits, max_per_club, target_steps, temperature=0.25):
+        self.scores = np.asarray(scores, dtype=float)
+        self.positions = np.asarray(positions, dtype=np.intp)
+        self.clubs = np.asarray(clubs, dtype=np.intp)
+        self.pick_teams = np.asarray(pick_teams, dtype=np.intp)
+        self.position_counts = np.asarray(position_counts, dtype=np.int16)
+        self.club_counts = np.asarray(club_counts, dtype=np.int16)
+        self.position_limits = np.asarray(position_limits, dtype=np.int16)
+        self.max_per_club = max_per_club
+        self.target_steps = list(target_steps)
+        self.temperature = temperature
+
+
+def simulate(state, simulations, seed=None):
+    """Run simulations and count, per target pick, how often each candidate was still available.
+
+    Returns an int array of shape (len(target_steps), candidates).
+    """
+    rng = np.random.default_rng(seed)
+    candidate_count = len(state.scores)
+    seen = np.zeros((len(state.target_steps), candidate_count), dtype=np.int64)
+    if not candidate_count or not state.target_steps:
+        return seen
+
+    # Each simulation's ranking, best first. Everything below works in ranking order, so
+    # a team's pick is the first column that is still available and not blocked.
+    keys = state.scores / state.temperature + rng.gumbel(size=(simulations, candidate_count))
+    order = np.argsort(-keys, axis=1).astype(np.int32)
+    del keys
+
+    # A player's position and club as one bitmask; a team's full positions and clubs as
+    # another. A candidate is legal when the two masks do not overlap.
+    position_count = len(state.position_limits)
+    club_bits = state.max_per_club > 0
+    bit_count = position_count + (int(state.clubs.max()) + 1 if club_bits else 0)
+    if bit_count > 64:
+        raise ValueError(f'{bit_count} positions and clubs do not fit in a 64-bit roster mask')
+    dtype = np.uint32 if bit_count <= 32 else np.uint64
+    player_bits = (np.left_shift(1, state.positions)
+                   | (np.left_shift(1, position_count + state.clubs) if club_bits else 0)).astype(dtype)
+    ranked_bits = player_bits[order]
+
+    position_counts = np.repeat(state.position_counts[np.newaxis], simulations, axis=0)
+    club_counts = np.repeat(state.club_counts[np.newaxis], simulations, axis=0)
+    blocked = np.zeros((simulations, position_counts.shape[1]), dtype=dtype)
+    for code in range(position_count):
+        blocked |= np.where(position_counts[:, :, code] >= state.position_limits[code], dtype(1 << code), dtype(0))
+    if club_bits:
+        for code in range(club_counts.shape[2]):
+            blocked |= np.where(club_counts[:, :, code] >= state.max_per_club,
+                                dtype(1 << (position_count + code)), dtype(0))
+
+    available = np.ones((simulations, candidate_count), dtype=bool)
+    rows = np.arange(simulations)
+    targets = {step: i for i, step in enumerate(state.target_steps)}
+
+    for step in range(state.target_steps[-1] + 1):
+        if step in targets:
+            seen[targets[step]] = np.bincount(order[available], minlength=candidate_count)
+            if step == state.target_steps[-1]:
+                break
+
+        team = state.pick_teams[step]
+        team_blocked = blocked[:, team, np.newaxis]
+
+        # At most step players are gone from any ranking, so the first SEARCH_WINDOW
+        # columns past that almost always hold the pick; rows that miss scan the rest.
+        width = min(candidate_count, step + SEARCH_WINDOW)
+        eligible = available[:, :width] & ((ranked_bits[:, :width] & team_blocked) == 0)
+        choice = eligible.argmax(axis=1)
+        picked = eligible[rows, choice]
+        if width < candidate_count and not picked.all():
+            missed = rows[~picked]
+            rest = available[missed, width:] & ((ranked_bits[missed, width:] & team_blocked[missed]) == 0)
+            choice[missed] = width + rest.argmax(axis=1)
+            picked[missed] = rest[np.arange(len(missed)), choice[missed] - width]
+
+        # A team with nothing legal left among the candidates just passes
+        picked_rows, picked_columns = rows[picked], choice[picked]
+        available[picked_rows, picked_columns] = False
+        players = order[picked_rows, picked_columns]
+
+        positions = state.positions[players]
+        position_counts[picked_rows, team, positions] += 1
+        full = position_counts[picked_rows, team, positions] >= state.position_limits[positions]
+        blocked[picked_rows[full], team] |= np.left_shift(1, positions[full]).astype(dtype)
+        if club_bits:
+            clubs = state.clubs[players]
+            club_counts[picked_rows, team, clubs] += 1
+            full = club_counts[picked_rows, team, clubs] >= state.max_per_club
+            blocked[picked_rows[full], team] |= np.left_shift(1, position_count + clubs[full]).astype(dtype)
+
+    return seen
+
+
+def availability(state, simulations=2000, workers=None, seed=None):
+    """Fraction of simulations in which each candidate is still available at each target pick.
+
+    Simulations are split into one batch per worker process (os.cpu_count() by default);
+    small runs stay in-process. Workers are spawned rather than forked, so a caller
+    with threads running (a web worker) can use the pool safely. Shape is
+    (len(target_steps), candidates).
+    """
+    workers = workers or os.cpu_count() or 1
+    if simulations < PARALLEL_MIN_SIMULATIONS:
+        workers = 1
+
+    batches = [simulations // workers + (1 if i < simulations % workers else 0) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    if workers == 1:
+        seen = simulate(state, simulations, seeds[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            seen = sum(pool.map(simulate, [state] * workers, batches, seeds))
+    return seen / simulations
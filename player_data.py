@@ -0,0 +1,291 @@
+"""Player file parsing, bulk upserts and valuation.
+
+This is the only module that needs pandas, numpy and openpyxl. app.py imports it
+inside the functions that use it, so a worker only pays for those libraries the
+first time someone imports or inspects a player file - not at boot.
+"""
+import io
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from sqlalchemy import Integer, bindparam, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+# Rows per batched transaction when streaming an import
+IMPORT_CHUNK_SIZE = 500
+
+# Columns copied from the FPL sheet onto Player (matched on (second_name, team))
+PLAYER_STAT_FIELDS = ['total_points', 'points_per_game', 'minutes', 'starts', 'goals_scored',
+                      'assists', 'clean_sheets', 'goals_conceded', 'own_goals', 'penalties_saved',
+                      'penalties_missed', 'yellow_cards', 'red_cards', 'saves', 'bonus', 'bps',
+                      'influence', 'creativity', 'threat', 'ict_index', 'expected_goals',
+                      'expected_assists', 'expected_goal_involvements', 'expected_goals_conceded',
+                      'expected_goals_per_90', 'expected_assists_per_90', 'saves_per_90',
+                      'clean_sheets_per_90']
+
+# Map FPL positions to our positions
+POSITION_MAP = {
+    'GKP': 'GK',
+    'GK': 'GK',
+    'DEF': 'DEF',
+    'Def': 'DEF',
+    'MID': 'MID',
+    'Mid': 'MID',
+    'FWD': 'FWD',
+    'For': 'FWD',
+    'FW': 'FWD'
+}
+
+
+def iter_player_chunks(stream, file_format, chunk_size=IMPORT_CHUNK_SIZE):
+    """Yield DataFrames of at most chunk_size player rows without loading the whole file.
+
+    CSV and JSON Lines are read incrementally by pandas, .xlsx through an openpyxl
+    read_only worksheet. Old .xls files and plain JSON arrays have no streaming reader
+    and arrive as a single chunk.
+    """
+    if file_format == 'csv':
+        yield from pd.read_csv(stream, chunksize=chunk_size)
+
+    elif file_format in ('json', 'jsonl'):
+        stream = io.BufferedReader(stream) if not hasattr(stream, 'peek') else stream
+        if stream.peek(64).lstrip()[:1] == b'[':
+            yield pd.read_json(stream)
+        else:
+            yield from pd.read_json(stream, lines=True, chunksize=chunk_size)
+
+    elif file_format == 'xlsx':
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook['Player Data'].iter_rows(values_only=True)
+            header = next(rows, None)
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunk_size:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+
+    elif file_format == 'xls':
+        yield pd.read_excel(stream, sheet_name='Player Data')
+
+    else:
+        raise ValueError(f"Unsupported player file format '{file_format}'")
+
+
+def upsert_player_frame(session, table, df, first_row=2):
+    """Insert or update a sheet of FPL players with a single executemany.
+
+    Positions and names are normalised column-wise, existing (second_name, team) keys
+    are loaded in one query, and every row goes through INSERT ... ON CONFLICT. Blank
+    stat cells keep the stored value on update and fall back to the column default on
+    insert. first_row is the spreadsheet row number of df's first row (for errors).
+    The chunk is committed on session before returning.
+    """
+    errors = []
+    df = df.reset_index(drop=True)
+    df.columns = [str(column).strip() for column in df.columns]
+    row_numbers = pd.Series(range(first_row, first_row + len(df)))
+
+    def text_column(name):
+        if name in df:
+            return df[name].astype('string').str.strip()
+        return pd.Series(pd.NA, index=df.index, dtype='string')
+
+    # Positions
+    raw_position = text_column('position').fillna('')
+    position = raw_position.map(POSITION_MAP).fillna(raw_position.str.upper())
+    valid = position.isin(['GK', 'DEF', 'MID', 'FWD'])
+    for row, pos in zip(row_numbers[~valid], raw_position[~valid]):
+        errors.append(f"Row {row}: Unknown position '{pos}'")
+
+    # Names - new format has full_name, old format has first_name/second_name
+    full = text_column('full_name').str.split().str.join(' ')
+    has_full = full.notna()
+    parts = full.str.extract(r'^(?:(?P<first>.*) )?(?P<second>\S+)$')
+    old_first = text_column('first_name').fillna('')
+    old_second = text_column('second_name').fillna('')
+
+    frame = pd.DataFrame({
+        'first_name': parts['first'].fillna('').where(has_full, old_first),
+        'second_name': parts['second'].fillna('').where(has_full, old_second),
+        'full_name': full.where(has_full, (old_first + ' ' + old_second).str.strip()),
+        'team': text_column('team').fillna(''),
+        'position': position,
+        'status': df['status'].astype('string') if 'status' in df else 'Available'
+    })
+    frame['web_name'] = frame['second_name']  # Use last name as display name
+
+    # Numeric stats - coerce column-wise, blanks stay NaN for now
+    stat_fields = [field for field in PLAYER_STAT_FIELDS if field in df]
+    for field in stat_fields:
+        frame[field] = pd.to_numeric(df[field], errors='coerce')
+
+    # Price might be 'price' or 'now_cost'
+    prices = [pd.to_numeric(df[name], errors='coerce') for name in ['price', 'now_cost'] if name in df]
+    if prices:
+        frame['now_cost'] = prices[0].combine_first(prices[-1])
+        stat_fields.append('now_cost')
+
+    frame = frame[valid]
+
+    # Load all existing keys in one query
+    names = frame['second_name'].unique().tolist()
+    existing_keys = session.execute(select(table.c.second_name, table.c.team).where(
+        table.c.second_name.in_(names)
+    )).all() if names else []
+    existed = pd.MultiIndex.from_frame(frame[['second_name', 'team']]).isin(existing_keys)
+
+    # A repeated key later in the sheet updates the player created earlier in it
+    repeated = frame.duplicated(['second_name', 'team'], keep='first').to_numpy()
+    imported = int((~existed & ~repeated).sum())
+    updated = len(frame) - imported
+
+    frame = frame.assign(_existed=existed).drop_duplicates(['second_name', 'team'], keep='last')
+    new_rows = ~frame.pop('_existed')
+
+    # New players without BPS get an estimate from bonus points
+    if 'bonus' in frame:
+        estimate = (frame['bonus'] * 3).where(new_rows)
+        frame['bps'] = frame['bps'].fillna(estimate) if 'bps' in frame else estimate
+        if 'bps' not in stat_fields:
+            stat_fields.append('bps')
+
+    # New players fall back to the column default (0) for blank stats
+    frame.loc[new_rows, stat_fields] = frame.loc[new_rows, stat_fields].fillna(0)
+
+    if len(frame):
+        columns = table.c
+        for field in stat_fields:
+            if isinstance(columns[field].type, Integer):
+                frame[field] = frame[field].round().astype('Int64')
+        records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+        dialect_insert = postgresql.insert if session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(table)
+        updates = {field: stmt.excluded[field] for field in
+                   ['first_name', 'full_name', 'web_name', 'position', 'status']}
+        updates.update({field: func.coalesce(stmt.excluded[field], columns[field]) for field in stat_fields})
+        stmt = stmt.on_conflict_do_update(index_elements=['second_name', 'team'], set_=updates)
+
+        session.execute(stmt, records)
+    session.commit()
+
+    return {
+        'imported': imported,
+        'updated': updated,
+        'errors': errors[:10],
+        'total_processed': len(df)
+    }
+
+
+def describe_player_sheet(filepath):
+    """Columns, size and the first few rows of an FPL workbook's 'Player Data' sheet"""
+    df = pd.read_excel(filepath, sheet_name='Player Data')
+
+    # Get info about the dataframe
+    info = {
+        'columns': df.columns.tolist(),
+        'shape': f"{len(df)} rows, {len(df.columns)} columns",
+        'first_row': df.iloc[0].to_dict() if len(df) > 0 else {},
+        'sample_data': []
+    }
+
+    # Get sample of first 3 players
+    for i in range(min(3, len(df))):
+        player_data = df.iloc[i].to_dict()
+        # Convert numpy types to Python types for JSON serialization
+        clean_data = {}
+        for k, v in player_data.items():
+            if pd.isna(v):
+                clean_data[k] = None
+            elif isinstance(v, (np.integer, np.int64)):
+                clean_data[k] = int(v)
+            elif isinstance(v, (np.floating, np.float64)):
+                clean_data[k] = float(v)
+            else:
+                clean_data[k] = str(v)
+        info['sample_data'].append(clean_data)
+
+    return info
+
+
+# Player valuation
+# Per-position z-scores of these stats, weighted into one composite. Each stat is
+# standardised within the player's position, so a keeper's saves only count against
+# other keepers and a stat a position never records (all zeros) contributes nothing.
+VALUATION_WEIGHTS = {
+    'total_points': 3,
+    'points_per_game': 2,
+    'expected_goal_involvements': 1,
+    'ict_index': 1,
+    'bonus': 1,
+    'minutes': 1,
+    'clean_sheets': 1,
+    'saves': 1
+}
+
+
+def grouped_mean_std(values, groups, group_count):
+    """Mean and standard deviation of values within each group, broadcast back per row"""
+    counts = np.maximum(np.bincount(groups, minlength=group_count), 1)
+    mean = np.bincount(groups, weights=values, minlength=group_count) / counts
+    square_mean = np.bincount(groups, weights=values * values, minlength=group_count) / counts
+    std = np.sqrt(np.maximum(square_mean - mean * mean, 0))
+    return mean[groups], std[groups]
+
+
+def value_players(session, table, slots):
+    """Recompute vorp, z_score and draft_score for every player in a few array passes.
+
+    slots maps each position to how many of them a whole league drafts (teams x squad
+    limit); the next best player at the position sets its replacement level, and VORP
+    is total points above that. draft_score adds VORP - in standard deviations of the
+    position's points - to the weighted stat z-score. Results are written back with one
+    executemany on session (a Session or Connection); the caller commits. Returns the
+    number of players valued.
+    """
+    stats = list(VALUATION_WEIGHTS)
+    rows = session.execute(select(table.c.id, table.c.position, *[table.c[stat] for stat in stats])).all()
+    if not rows:
+        return 0
+
+    ids = np.array([row[0] for row in rows])
+    positions, groups = np.unique(np.array([row[1] for row in rows]), return_inverse=True)
+    values = np.array([row[2:] for row in rows], dtype=float)
+    values = np.nan_to_num(values)  # NULL stats count as zero
+
+    # Weighted composite of per-position z-scores
+    z_score = np.zeros(len(rows))
+    for column, stat in enumerate(stats):
+        mean, std = grouped_mean_std(values[:, column], groups, len(positions))
+        z = np.divide(values[:, column] - mean, std, out=np.zeros(len(rows)), where=std > 0)
+        z_score += VALUATION_WEIGHTS[stat] * z
+    z_score /= sum(VALUATION_WEIGHTS.values())
+
+    # Value over the replacement-level player at each position
+    points = values[:, stats.index('total_points')]
+    replacement = np.zeros(len(positions))
+    for group, position in enumerate(positions):
+        ranked = np.sort(points[groups == group])[::-1]
+        replacement[group] = ranked[min(slots.get(position, 0), len(ranked) - 1)]
+    vorp = points - replacement[groups]
+
+    _, points_std = grouped_mean_std(points, groups, len(positions))
+    draft_score = z_score + np.divide(vorp, points_std, out=np.zeros(len(rows)), where=points_std > 0)
+
+    session.execute(
+        update(table).where(table.c.id == bindparam('player_id')).values(
+            vorp=bindparam('vorp_value'), z_score=bindparam('z_value'), draft_score=bindparam('score_value')
+        ),
+        [{'player_id': int(player_id), 'vorp_value': float(v), 'z_value': round(float(z), 4),
+          'score_value': round(float(score), 4)}
+         for player_id, v, z, score in zip(ids, vorp, z_score, draft_score)]
+    )
+    return len(rows)
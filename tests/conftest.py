@@ -0,0 +1,61 @@
+"""Shared test setup: the app on a throwaway SQLite database with synthetic players.
+
+DATABASE_URL is set before app is imported, since importing app creates and
+migrates the database it points at.
+"""
+import json
+import os
+import secrets
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+DB_DIR = tempfile.mkdtemp(prefix='fantasy-draft-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(DB_DIR, 'test.db')
+
+import pytest  # noqa: E402
+
+import app as app_module  # noqa: E402
+import loadtest  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    app_module.app.config['TESTING'] = True
+    with app_module.app.app_context():
+        if not app_module.Player.query.count():
+            sheet = os.path.join(DB_DIR, 'players.xlsx')
+            loadtest.write_player_sheet(sheet, count=300)
+            app_module.import_fpl_excel(sheet)
+        yield app_module.app
+        app_module.db.session.remove()
+
+
+@pytest.fixture
+def admin_client(app):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['is_admin'] = True
+    return client
+
+
+@pytest.fixture
+def make_league(app):
+    """Create a league with a snake draft for n teams; returns (league id, [team ids])"""
+    def make(team_count=4):
+        league = app_module.League(name=f'test-{secrets.token_hex(4)}')
+        league.generate_access_code()
+        app_module.db.session.add(league)
+        app_module.db.session.commit()
+        teams = [app_module.DraftTeam(name=f'Team {i + 1}', owner='test', league_id=league.id)
+                 for i in range(team_count)]
+        app_module.db.session.add_all(teams)
+        app_module.db.session.commit()
+        team_ids = [team.id for team in teams]
+        app_module.db.session.add(app_module.Draft(
+            total_teams=team_count, draft_order=json.dumps(team_ids), league_id=league.id,
+            pick_schedule=app_module.PickSchedule.build(team_ids).to_json()))
+        app_module.db.session.commit()
+        return league.id, team_ids
+    return make
@@ -0,0 +1,32 @@
+import app as app_module
+from app import Draft, DraftTeam, Player, db
+
+
+def test_drafted_sets_are_replaced_not_changed(app, make_league):
+    league_id, team_ids = make_league()
+    draft = Draft.query.filter_by(league_id=league_id).one()
+    before = app_module.board_index.drafted_ids(draft, league_id)
+
+    player = Player.query.first()
+    app_module.commit_pick(draft, player, db.session.get(DraftTeam, team_ids[0]))
+    app_module.announce_pick(draft, player, db.session.get(DraftTeam, team_ids[0]))
+
+    # The pick reached the index through the event bus, without a reload...
+    version, after = app_module.board_index.drafted[league_id]
+    assert version == (draft.id, draft.log_seq) and player.id in after
+    # ...and a reader still holding the old set saw it unchanged
+    assert player.id not in before
+
+
+def test_roster_counters_are_replaced_not_changed(app, make_league):
+    league_id, team_ids = make_league()
+    draft = Draft.query.filter_by(league_id=league_id).one()
+    before = app_module.roster_constraints.counts(draft)
+
+    player = Player.query.first()
+    app_module.commit_pick(draft, player, db.session.get(DraftTeam, team_ids[0]))
+
+    version, after = app_module.roster_constraints.leagues[league_id]
+    assert version == (draft.id, draft.log_seq)
+    assert after[team_ids[0]]['positions'] == {player.position: 1}
+    assert team_ids[0] not in before
@@ -0,0 +1,46 @@
+from sqlalchemy.exc import OperationalError
+
+import app as app_module
+
+
+def transient_error():
+    return OperationalError('COMMIT', {}, Exception('server closed the connection unexpectedly'))
+
+
+def test_writes_behind_get_are_not_retried(app, admin_client, make_league, monkeypatch):
+    make_league()
+    draft = app_module.Draft.query.first()
+    was_locked = bool(draft.is_locked)
+    commits = []
+
+    def failing_commit():
+        commits.append(1)
+        raise transient_error()
+
+    monkeypatch.setattr(app_module.db.session, 'commit', failing_commit)
+    response = admin_client.get('/toggle_draft_lock')
+    monkeypatch.undo()
+
+    assert response.status_code == 503
+    assert len(commits) == 1
+    app_module.db.session.rollback()
+    assert bool(app_module.Draft.query.first().is_locked) == was_locked
+
+
+def test_read_only_views_are_retried(app):
+    calls = []
+
+    def view():
+        calls.append(1)
+        if len(calls) < 3:
+            raise transient_error()
+        return 'ok'
+
+    with app.test_request_context('/leagues'):
+        assert app_module.with_db_resilience(view, retry=True)() == 'ok'
+    assert len(calls) == 3
+
+
+def test_state_changing_gets_are_not_on_the_retry_list():
+    for endpoint in ['toggle_draft_lock', 'reset_database', 'admin_team_links', 'init_db', 'setup', 'team_access']:
+        assert endpoint not in app_module.DB_RETRY_READ_ONLY
@@ -0,0 +1,26 @@
+import loadtest
+
+import app as app_module
+from app import Player, db
+
+
+def player_rows():
+    """Every column of every player, derived columns (valuation, search text) included"""
+    return [tuple(row) for row in db.session.execute(Player.__table__.select().order_by(Player.id))]
+
+
+def test_reimport_leaves_every_row_unchanged(app, tmp_path):
+    sheet = str(tmp_path / 'players.xlsx')
+    loadtest.write_player_sheet(sheet, count=300, seed=5)
+    app_module.import_fpl_excel(sheet)
+    before = player_rows()
+    next_id = max(row[0] for row in before) + 1
+
+    totals = app_module.import_fpl_excel(sheet)
+    assert (totals['imported'], totals['updated'], totals['errors']) == (0, 300, [])
+    assert player_rows() == before
+
+    # Upserts that only updated rows must not have moved the id sequence under new ones
+    loadtest.write_player_sheet(sheet, count=301, seed=5)
+    assert app_module.import_fpl_excel(sheet)['imported'] == 1
+    assert max(row[0] for row in player_rows()) == next_id
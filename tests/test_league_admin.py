@@ -0,0 +1,42 @@
+def league_admin_client(app, league_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['admin_league_ids'] = [league_id]
+    return client
+
+
+def test_creating_a_league_administers_only_that_league(app):
+    client = app.test_client()
+    response = client.post('/create_league', data={'league_name': 'Admin scope league'})
+    assert response.status_code == 302
+    with client.session_transaction() as session:
+        assert len(session['admin_league_ids']) == 1
+
+
+def test_auto_pick_needs_that_leagues_admin(app, make_league):
+    own_league, _ = make_league()
+    other_league, _ = make_league()
+    client = league_admin_client(app, own_league)
+
+    assert client.post(f'/league/{other_league}/auto_pick', data={'picks': '1'}).status_code == 403
+    assert client.post(f'/league/{own_league}/auto_pick', data={'picks': '1'}).status_code == 302
+
+
+def test_undo_needs_that_leagues_admin(app, make_league):
+    own_league, _ = make_league()
+    other_league, _ = make_league()
+    client = league_admin_client(app, own_league)
+
+    assert client.post(f'/league/{other_league}/undo_pick').status_code == 403
+    assert client.post('/undo_pick').status_code == 403
+    assert client.post(f'/league/{own_league}/undo_pick').status_code == 302
+
+
+def test_pick_clock_needs_that_leagues_admin(app, make_league):
+    own_league, _ = make_league()
+    other_league, _ = make_league()
+    client = league_admin_client(app, own_league)
+
+    assert client.post(f'/league/{other_league}/pick_clock', data={'seconds': '0'}).status_code == 403
+    assert client.post('/pick_clock', data={'seconds': '0'}).status_code == 403
+    assert client.post(f'/league/{own_league}/pick_clock', data={'seconds': '0'}).status_code == 302
@@ -0,0 +1,24 @@
+import json
+
+from click.testing import CliRunner
+
+import loadtest
+
+
+def test_baseline_from_a_different_setup_is_refused(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    baseline.write_text(json.dumps({
+        'parameters': {'target': 'in-process', 'leagues': 2, 'teams': 8, 'duration': 20.0, 'think': 0.1},
+        'routes': {}
+    }))
+    result = CliRunner().invoke(loadtest.main, ['--leagues', '4', '--teams', '8', '--think', '0.1',
+                                                '--baseline', str(baseline)])
+    assert result.exit_code != 0
+    assert 'leagues=2' in result.output and 'leagues=4' in result.output
+
+
+def test_regressions_are_reported_per_route():
+    baseline = {'league_draft': {'p95_ms': 50.0, 'mean_queries': 1.5}}
+    assert loadtest.compare({'league_draft': {'p95_ms': 55.0, 'mean_queries': 1.5, 'errors': 0}}, baseline, 0.25) == []
+    problems = loadtest.compare({'league_draft': {'p95_ms': 70.0, 'mean_queries': 4.0, 'errors': 0}}, baseline, 0.25)
+    assert len(problems) == 2
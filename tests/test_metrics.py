@@ -0,0 +1,16 @@
+import app as app_module
+
+
+def test_percentiles_never_exceed_the_max():
+    clock = app_module.PickClock()
+    for late_ms in (11.0, 12.0, 12.1):
+        clock.fired += 1
+        clock.late_buckets[app_module.RequestMetrics.bucket(late_ms)] += 1
+        clock.late_max_ms = max(clock.late_max_ms, late_ms)
+    stats = clock.stats()
+    assert stats['late_p50_ms'] <= stats['late_p99_ms'] <= stats['late_max_ms'] == 12.1
+
+    metrics = app_module.RequestMetrics()
+    metrics.record('index', 3.1, 1, 0.5, 0.5)
+    route = metrics.report()['routes']['index']
+    assert route['p50_ms'] == route['p99_ms'] == route['max_ms'] == 3.1
@@ -0,0 +1,24 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import app as app_module
+
+ROOT = os.path.dirname(app_module.__file__)
+
+# Migrates the database at DATABASE_URL on import, then loads the original draft board
+LOAD_DRAFT = '''
+import app
+response = app.app.test_client().get('/draft')
+print(response.status_code)
+'''
+
+
+def test_committed_database_upgrades_and_serves_the_draft(tmp_path):
+    database = tmp_path / 'fantasy_draft.db'
+    shutil.copy(os.path.join(ROOT, 'instance', 'fantasy_draft.db'), database)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', LOAD_DRAFT], env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '200', result.stderr
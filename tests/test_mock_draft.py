@@ -0,0 +1,14 @@
+import mock_draft
+
+
+def test_web_requests_stay_in_process(admin_client, make_league, monkeypatch):
+    _, team_ids = make_league()
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError('a web request started a process pool')
+
+    monkeypatch.setattr(mock_draft, 'ProcessPoolExecutor', no_pool)
+    for simulations in (2000, 5000):
+        response = admin_client.get(f'/team/{team_ids[0]}/mock_draft?simulations={simulations}')
+        assert response.status_code == 200
+        assert response.get_json()['simulations'] == simulations
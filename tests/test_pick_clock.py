@@ -0,0 +1,20 @@
+from datetime import datetime, timedelta
+
+import app as app_module
+from app import Draft, db
+
+
+def test_a_timed_out_pick_patches_boards_in_place(app, make_league, monkeypatch):
+    league_id, _ = make_league()
+    draft = Draft.query.filter_by(league_id=league_id).one()
+    draft.pick_seconds = 30
+    draft.pick_deadline = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    events = []
+    monkeypatch.setattr(app_module.draft_events, 'publish',
+                        lambda event, payload, league_id=None: events.append((event, payload)))
+    app_module.pick_clock.expire(draft.id, draft.log_seq)
+
+    assert [event for event, _ in events] == ['player_drafted']
+    assert events[0][1]['current_pick'] == 2
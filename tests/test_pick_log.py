@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from sqlalchemy import inspect, text
+
+import app as app_module
+from app import DraftPick, PickLogEntry, db
+
+
+def league_draft(league_id):
+    return app_module.Draft.query.filter_by(league_id=league_id).one()
+
+
+def test_upgrade_from_player_drafted_flags_numbers_picks(app, make_league):
+    # A baseline database: picks live only in Player.drafted / drafted_by
+    league_id, team_ids = make_league(team_count=2)
+    with db.engine.begin() as conn:
+        columns = [col['name'] for col in inspect(conn).get_columns('player')]
+        if 'drafted_by' not in columns:
+            conn.execute(text('ALTER TABLE player ADD COLUMN drafted BOOLEAN'))
+            conn.execute(text('ALTER TABLE player ADD COLUMN drafted_by INTEGER'))
+        conn.execute(text('UPDATE player SET drafted = :no, drafted_by = NULL'), {'no': False})
+        for table in ('pick_log', 'draft_snapshot', 'draft_pick'):
+            conn.execute(text(f'DELETE FROM {table}'))
+        player_ids = conn.execute(text('SELECT id FROM player ORDER BY id LIMIT 3')).scalars().all()
+        for player_id, team_id in zip(player_ids, [team_ids[0], team_ids[1], team_ids[1]]):
+            conn.execute(text('UPDATE player SET drafted = :yes, drafted_by = :team WHERE id = :id'),
+                         {'yes': True, 'team': team_id, 'id': player_id})
+        conn.execute(text('UPDATE draft SET current_pick = 4, current_team_index = 1, log_seq = 0 '
+                          'WHERE league_id = :league'), {'league': league_id})
+        conn.execute(text('DELETE FROM schema_migration WHERE version >= 5'))
+
+    app_module.init_and_migrate_db()
+    db.session.expire_all()
+
+    numbers = [pick.pick_number for pick in DraftPick.query.filter_by(league_id=league_id)]
+    assert sorted(numbers) == [1, 2, 3]
+    seq, picks = app_module.replay_pick_log(league_id)
+    assert seq == 3
+    assert [pick[0] for pick in picks] == [1, 2, 3]
+    assert {pick[2] for pick in picks} == set(player_ids)
+
+    draft = league_draft(league_id)
+    assert draft.current_pick == 4
+    undone = app_module.undo_last_pick(draft)
+    assert undone[0] == 3
+    db.session.expire_all()
+    assert league_draft(league_id).current_pick == 3
+    assert DraftPick.query.filter_by(league_id=league_id).count() == 2
+    assert [pick[0] for pick in app_module.replay_pick_log(league_id)[1]] == [1, 2]
+
+
+def test_migration_numbers_picks_logged_without_numbers(app, make_league):
+    league_id, team_ids = make_league(team_count=2)
+    player_ids = [row[0] for row in db.session.execute(text('SELECT id FROM player ORDER BY id DESC LIMIT 2'))]
+    for seq, (player_id, team_id) in enumerate(zip(player_ids, team_ids), start=1):
+        db.session.add(DraftPick(league_id=league_id, team_id=team_id, player_id=player_id))
+        db.session.add(PickLogEntry(league_id=league_id, seq=seq, action='pick',
+                                    team_id=team_id, player_id=player_id))
+    league_draft(league_id).log_seq = 2
+    db.session.commit()
+
+    with pytest.raises(ValueError):
+        app_module.replay_pick_log(league_id)
+
+    with db.engine.begin() as conn:
+        conn.execute(text('DELETE FROM schema_migration WHERE version >= 13'))
+    app_module.init_and_migrate_db()
+    db.session.expire_all()
+
+    assert app_module.replay_pick_log(league_id) == (2, [(1, team_ids[0], player_ids[0]),
+                                                         (2, team_ids[1], player_ids[1])])
+    draft = league_draft(league_id)
+    assert (draft.current_pick, draft.log_seq) == (3, 2)
+    assert json.loads(draft.draft_order) == team_ids
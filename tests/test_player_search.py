@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app as app_module
+
+MULTI_WORD_QUERY = 'player00 club01'
+
+# Runs both backends against the same Postgres database and prints their prefix hits
+BOTH_BACKENDS = '''
+import json, sys
+import app, loadtest
+with app.app.app_context():
+    if not app.Player.query.count():
+        loadtest.write_player_sheet(sys.argv[2], count=300)
+        app.import_fpl_excel(sys.argv[2])
+    results = {}
+    for name, backend in [('memory', app.PlayerSearchIndex()), ('postgres', app.PostgresPlayerSearch())]:
+        matches = backend.search(sys.argv[1], limit=50)
+        results[name] = sorted(player.id for player, score in matches if score >= 1)
+    print(json.dumps(results))
+'''
+
+
+def prefix_hits(query):
+    matches = app_module.PlayerSearchIndex().search(query, limit=50)
+    return {player.id for player, score in matches if score >= 1}
+
+
+def test_every_word_must_match(app):
+    hits = prefix_hits(MULTI_WORD_QUERY)
+    assert hits
+    for player_id in hits:
+        text = app_module.db.session.get(app_module.Player, player_id).search_text.split()
+        assert any(word.startswith('player00') for word in text)
+        assert 'club01' in text
+
+
+def test_postgres_prefix_filter_matches_index(app):
+    folded = app_module.fold_search_text(MULTI_WORD_QUERY)
+    rows = app_module.Player.query.filter(app_module.PostgresPlayerSearch.prefix_filter(folded))
+    assert {player.id for player in rows} == prefix_hits(MULTI_WORD_QUERY)
+
+
+@pytest.mark.skipif(not os.environ.get('TEST_POSTGRES_URL'),
+                    reason='set TEST_POSTGRES_URL to a scratch Postgres database with pg_trgm')
+def test_backends_agree_on_postgres(tmp_path):
+    env = dict(os.environ, DATABASE_URL=os.environ['TEST_POSTGRES_URL'],
+               PYTHONPATH=os.path.dirname(app_module.__file__))
+    output = subprocess.run([sys.executable, '-c', BOTH_BACKENDS, MULTI_WORD_QUERY, str(tmp_path / 'players.xlsx')],
+                            env=env, capture_output=True, text=True, check=True).stdout
+    results = json.loads(output.strip().splitlines()[-1])
+    assert results['memory']
+    assert results['postgres'] == results['memory']
@@ -0,0 +1,48 @@
+import pytest
+
+import app as app_module
+from app import Draft, DraftTeam, Player, Wishlist, db
+
+
+@pytest.fixture
+def populated_league(make_league):
+    """A league eight picks in, with a ten-player wishlist for its first team"""
+    league_id, team_ids = make_league()
+    draft = Draft.query.filter_by(league_id=league_id).one()
+    players = Player.query.order_by(Player.draft_score.desc()).limit(18).all()
+    for player in players[:8]:
+        team = db.session.get(DraftTeam, draft.schedule.team_for(draft.current_pick))
+        app_module.commit_pick(draft, player, team)
+    db.session.add_all(Wishlist(team_id=team_ids[0], player_id=player.id, rank=(i + 1) * app_module.RANK_GAP,
+                                league_id=league_id) for i, player in enumerate(players[8:]))
+    db.session.commit()
+    return league_id, team_ids
+
+
+@pytest.mark.parametrize('path', ['/api/league/{}/available_players', '/api/league/{}/search?q=club0'])
+def test_cold_index_stays_within_budget(app, make_league, path):
+    league_id, _ = make_league()
+    app_module.board_index.invalidate()
+    client = app.test_client()
+
+    response = client.get(path.format(league_id))
+    assert response.status_code == 200
+    assert response.get_json()['players']
+    # The warm request is held to the same budget
+    assert client.get(path.format(league_id)).status_code == 200
+
+
+@pytest.mark.parametrize('path', ['/', '/draft', '/league/{league_id}/draft', '/team/{team_id}/wishlist'])
+def test_hot_pages_stay_within_budget(app, populated_league, path):
+    league_id, team_ids = populated_league
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session[f'team_{team_ids[0]}_access'] = True
+    url = path.format(league_id=league_id, team_id=team_ids[0])
+
+    # A cold render (empty page cache, fresh roster counters), then a cached one;
+    # an N+1 in either raises QueryBudgetExceeded under TESTING
+    app_module.response_cache.backend.clear()
+    app_module.roster_constraints.invalidate()
+    assert client.get(url).status_code == 200
+    assert client.get(url).status_code == 200
@@ -0,0 +1,28 @@
+import app as app_module
+from app import Player
+
+
+def drafted_events(client):
+    return [event['args'][0] for event in client.get_received() if event['name'] == 'player_drafted']
+
+
+def test_a_pick_reaches_only_its_leagues_room(app, make_league):
+    league_id, team_ids = make_league()
+    other_league_id, _ = make_league()
+    watcher = app_module.socketio.test_client(app)
+    watcher.emit('join_league', {'league_id': league_id})
+    bystander = app_module.socketio.test_client(app)
+    bystander.emit('join_league', {'league_id': other_league_id})
+
+    player = Player.query.order_by(Player.id.desc()).first()
+    response = app.test_client().post(f'/league/{league_id}/draft_player/{player.id}')
+    assert response.status_code == 302
+
+    events = drafted_events(watcher)
+    assert len(events) == 1
+    assert (events[0]['league_id'], events[0]['player_id'], events[0]['team_id']) == (league_id, player.id, team_ids[0])
+    assert events[0]['current_pick'] == 2
+    assert drafted_events(bystander) == []
+
+    watcher.disconnect()
+    bystander.disconnect()
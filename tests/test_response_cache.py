@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app as app_module
+from app import Player, db
+
+
+def test_several_workers_need_a_shared_cache(tmp_path):
+    env = dict(os.environ, WEB_CONCURRENCY='2', DATABASE_URL='sqlite:///' + str(tmp_path / 'workers.db'),
+               PYTHONPATH=os.path.dirname(app_module.__file__))
+    env.pop('RESPONSE_CACHE_URL', None)
+    result = subprocess.run([sys.executable, '-c', 'import app'], env=env, capture_output=True, text=True)
+    assert result.returncode != 0
+    assert 'RESPONSE_CACHE_URL' in result.stderr
+
+
+def test_board_index_follows_the_players_counter(app):
+    players, _, _ = app_module.board_index.snapshot()
+    player_id = next(iter(players))
+    renamed = players[player_id].second_name + ' Jr'
+    db.session.get(Player, player_id).second_name = renamed
+    db.session.commit()
+
+    # Another worker's import only reaches this one through the shared counter
+    assert app_module.board_index.snapshot()[0][player_id].second_name != renamed
+    app_module.response_cache.bump('players')
+    assert app_module.board_index.snapshot()[0][player_id].second_name == renamed
+
+
+@pytest.fixture
+def redis_backend(monkeypatch):
+    """RedisCacheBackend on TEST_REDIS_URL, or on fakeredis when that is installed"""
+    if os.environ.get('TEST_REDIS_URL'):
+        backend = app_module.RedisCacheBackend(os.environ['TEST_REDIS_URL'])
+    else:
+        redis = pytest.importorskip('redis')
+        fakeredis = pytest.importorskip('fakeredis')
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(redis.Redis, 'from_url', lambda url: fakeredis.FakeRedis(server=server))
+        backend = app_module.RedisCacheBackend('redis://cache')
+    backend.client.flushdb()
+    return backend
+
+
+def test_redis_backend_invalidates_by_version_scope(app, redis_backend):
+    # Two workers' caches over one Redis
+    worker, other_worker = app_module.ResponseCache(redis_backend), app_module.ResponseCache(redis_backend)
+    renders = []
+
+    def render():
+        renders.append(1)
+        return f'board v{len(renders)}'
+
+    with app.test_request_context('/'):
+        assert worker.page('board', [1], ['players', 'league:1'], render) == 'board v1'
+        assert other_worker.page('board', [1], ['players', 'league:1'], render) == 'board v1'
+        assert len(renders) == 1
+
+        other_worker.bump('league:2')
+        assert worker.page('board', [1], ['players', 'league:1'], render) == 'board v1'
+
+        other_worker.bump('league:1')
+        assert worker.page('board', [1], ['players', 'league:1'], render) == 'board v2'
+        assert redis_backend.versions(['league:1', 'league:2', 'players']) == [1, 1, 0]
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import app as app_module
+from app import Draft, db
+
+
+def restore(lines):
+    return app_module.restore_snapshot(iter(lines))
+
+
+def test_restore_resets_roster_counters_and_pick_clock(app, make_league):
+    league_id, _ = make_league()
+    draft = Draft.query.filter_by(league_id=league_id).one()
+    draft.pick_seconds = 60
+    draft.pick_deadline = datetime.utcnow() + timedelta(minutes=5)
+    db.session.commit()
+    draft_id, deadline = draft.id, draft.pick_deadline
+    lines = list(app_module.iter_snapshot_lines())
+
+    app_module.roster_constraints.counts(draft)
+    app_module.pick_clock.schedule(draft_id, None, None)
+    assert league_id in app_module.roster_constraints.leagues
+
+    restore(lines)
+    assert league_id not in app_module.roster_constraints.leagues
+    assert app_module.pick_clock.current[draft_id] == (deadline, 0)
+
+
+def test_export_restore_round_trip(app, make_league):
+    league_id, team_ids = make_league()
+    draft = Draft.query.filter_by(league_id=league_id).one()
+    player = app_module.Player.query.first()
+    app_module.commit_pick(draft, player, db.session.get(app_module.DraftTeam, team_ids[0]))
+    lines = list(app_module.iter_snapshot_lines())
+
+    counts = restore(lines)
+    assert counts['draft_pick'] >= 1 and counts['pick_log'] >= 1
+    # Every row and column comes back as it was, header timestamp aside
+    assert list(app_module.iter_snapshot_lines())[1:] == lines[1:]
+
+    # and new rows get fresh ids, past the restored ones
+    max_id = db.session.query(db.func.max(app_module.League.id)).scalar()
+    league = app_module.League(name='after restore')
+    league.generate_access_code()
+    db.session.add(league)
+    db.session.commit()
+    assert league.id == max_id + 1